@@ -0,0 +1,72 @@
+"""Edit detection cost: capped edit distance vs the previous difflib path.
+
+Times both on message-sized texts for the edits users actually make: a
+typo fix, a sentence appended, and a full rewrite.
+
+    python -m benchmarks.bench_edit_distance [--repeat N]
+"""
+
+import argparse
+import difflib
+import random
+import timeit
+
+from src_py.telegram_utils.deleted_message_tracker import _count_changed_chars
+
+WORDS = "привет как дела сегодня завтра встреча созвон договорились ок".split()
+SIZES = (80, 500, 4096)
+
+
+def difflib_changed_chars(old: str, new: str) -> int:
+    if old == new:
+        return 0
+    changed = 0
+    matcher = difflib.SequenceMatcher(None, old, new)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed += max(i2 - i1, j2 - j1)
+    return changed
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words: list[str] = []
+    while sum(len(w) + 1 for w in words) < size:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:size]
+
+
+def _cases(size: int) -> dict[str, tuple[str, str]]:
+    rng = random.Random(size)
+    old = _text(rng, size)
+    mid = len(old) // 2
+    return {
+        "typo": (old, old[:mid] + "ё" + old[mid + 1 :]),
+        "append": (old, old + " и ещё одна фраза в конце"),
+        "rewrite": (old, _text(rng, size)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'chars':>6} {'edit':>8} {'difflib us':>11} {'banded us':>10} {'speedup':>8}"
+    )
+    for size in SIZES:
+        for name, (old, new) in _cases(size).items():
+            legacy = timeit.timeit(
+                lambda: difflib_changed_chars(old, new), number=args.repeat
+            )
+            banded = timeit.timeit(
+                lambda: _count_changed_chars(old, new), number=args.repeat
+            )
+            print(
+                f"{size:>6} {name:>8} {legacy / args.repeat * 1e6:>11.1f} "
+                f"{banded / args.repeat * 1e6:>10.1f} {legacy / banded:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Bytes per cached message in the deleted-message tracker.
+
+Builds the same synthetic private-chat traffic twice, once with the
+previous plain-dataclass entry layout and once with ``CachedMessage``,
+and reports traced allocations per entry.
+
+    python -m benchmarks.bench_tracker_memory [--messages N]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.telegram_utils.tracker_entries import CachedMessage
+
+SENDERS = 300
+WORDS = "привет как дела сегодня завтра встреча ок да нет спасибо".split()
+
+
+@dataclass
+class LegacyCachedMessage:
+    message_id: int
+    text: str | None
+    date: object
+    cached_at: float
+    sender_id: str | None
+    sender_name: str
+    peer: types.TypePeer
+    chat_label: str
+    media_description: str | None
+    media: object
+    channel_id: str | None
+
+
+def _traffic(count: int, seed: int = 1) -> list[tuple[int, int, str]]:
+    rng = random.Random(seed)
+    rows = []
+    for msg_id in range(count):
+        user_id = 10_000_000 + rng.randrange(SENDERS)
+        # Mostly short chat lines, with the occasional long message.
+        words = rng.randrange(150, 400) if rng.random() < 0.05 else rng.randrange(1, 15)
+        rows.append((msg_id, user_id, " ".join(rng.choice(WORDS) for _ in range(words))))
+    return rows
+
+
+def _build(factory: type, rows: list[tuple[int, int, str]]) -> list[object]:
+    entries = []
+    for msg_id, user_id, text in rows:
+        # Every arrival carries fresh objects, as Telethon messages do.
+        entries.append(
+            factory(
+                message_id=msg_id,
+                text=text.encode().decode(),
+                date=datetime.fromtimestamp(1_700_000_000 + msg_id, tz=timezone.utc),
+                cached_at=time.time(),
+                sender_id=str(user_id),
+                sender_name=f"User {user_id}",
+                peer=types.PeerUser(user_id),
+                chat_label=f"user-{user_id}",
+                media_description=None,
+                media=None,
+                channel_id=None,
+            )
+        )
+    return entries
+
+
+def _bytes_per_entry(factory: type, rows: list[tuple[int, int, str]]) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    entries = _build(factory, rows)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_entry = (after - before) / len(entries)
+    del entries
+    return per_entry
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rows = _traffic(args.messages)
+    legacy = _bytes_per_entry(LegacyCachedMessage, rows)
+    compact = _bytes_per_entry(CachedMessage, rows)
+    print(f"messages:           {args.messages}")
+    print(f"before (dataclass): {legacy:8.0f} B/message")
+    print(f"after  (compact):   {compact:8.0f} B/message")
+    print(f"saved:              {1 - compact / legacy:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
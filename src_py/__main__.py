@@ -11,13 +11,31 @@ from telethon import TelegramClient
 from telethon.sessions import StringSession
 from telethon.tl import types
 
+from src_py import metrics
 from src_py.application.diary.dead_hand import DeadHand
+from src_py.application.use_cases.disappearing_media import DisappearingMediaCapture
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription_scheduler import (
+    TranscriptionScheduler,
+)
+from src_py.application.use_cases.voice_burst import VoiceBurstCoalescer
+from src_py.application.use_cases.voice_prefetch import VoicePrefetcher
 from src_py.config import settings
+from src_py.domain.summarizer import Summarizer
+from src_py.domain.transcriber import Transcriber
+from src_py.impl.extractive_summarizer import ExtractiveSummarizer
 from src_py.impl.speech_recognition_transcriber import SpeechRecognitionTranscriber
 from src_py.impl.groq_summarizer import GroqSummarizer
 from src_py.impl.groq_whisper_transcriber import GroqWhisperTranscriber
+from src_py.impl.racing_summarizer import RacingSummarizer
+from src_py.impl.telegram_transcriber import TelegramTranscriber
 from src_py.presentation.bot import TgUserbot
 from src_py.presentation.handlers import create_handlers
+from src_py.telegram_utils.deleted_message_tracker import CACHE_TTL_S
+from src_py.telegram_utils.media_fetch import media_fetcher
+from src_py.telegram_utils.parallel_download import ParallelDownloader
+from src_py.telegram_utils.tracker_media import TrackerMediaBudget
+from src_py.telegram_utils.tracker_store import TrackerStore
 
 logging.basicConfig(
     level=logging.INFO,
@@ -88,6 +106,30 @@ async def _resolve_userbot_target(
     return "me"
 
 
+def _build_summarizer() -> Summarizer | None:
+    if not settings.transcribe_summary_enabled:
+        return None
+
+    engine = settings.transcribe_summary_engine.strip().lower()
+    if engine == "extractive":
+        logger.info("Transcription TL;DR enabled (local extractive)")
+        return ExtractiveSummarizer()
+    if not settings.groq_api_key:
+        logger.info("GROQ_API_KEY not set; transcription TL;DR is local extractive")
+        return ExtractiveSummarizer()
+    if engine == "groq":
+        logger.info("Transcription TL;DR enabled (Groq)")
+        return GroqSummarizer(settings.groq_api_key)
+
+    budget = settings.transcribe_summary_budget_s
+    logger.info("Transcription TL;DR enabled (Groq, local fallback after %ss)", budget)
+    return RacingSummarizer(
+        GroqSummarizer(settings.groq_api_key),
+        ExtractiveSummarizer(),
+        latency_budget_s=budget,
+    )
+
+
 async def _run() -> None:
     client = TelegramClient(
         StringSession(settings.tg_session), settings.tg_api_id, settings.tg_api_hash
@@ -106,18 +148,77 @@ async def _run() -> None:
         userbot_target = "me"
 
     if settings.groq_api_key:
-        transcriber = GroqWhisperTranscriber(settings.groq_api_key)
+        transcriber: Transcriber = GroqWhisperTranscriber(settings.groq_api_key)
         logger.info("Using Groq Whisper API for transcription")
     else:
         transcriber = SpeechRecognitionTranscriber()
         logger.info("GROQ_API_KEY not set; using Google Speech Recognition")
 
-    summarizer: GroqSummarizer | None = None
-    if settings.transcribe_summary_enabled and settings.groq_api_key:
-        summarizer = GroqSummarizer(settings.groq_api_key)
-        logger.info("Transcription TL;DR enabled (Groq)")
-    elif settings.transcribe_summary_enabled:
-        logger.info("GROQ_API_KEY not set; transcription TL;DR disabled")
+    if settings.telegram_transcribe_enabled:
+        telegram_transcriber = TelegramTranscriber(client, transcriber)
+        telegram_transcriber.start()
+        transcriber = telegram_transcriber
+        logger.info("Using Telegram server-side transcription first")
+
+    summarizer = _build_summarizer()
+
+    parallel_downloader: ParallelDownloader | None = None
+    if settings.media_download_connections > 1:
+        parallel_downloader = ParallelDownloader(
+            client, connections=settings.media_download_connections
+        )
+        try:
+            await parallel_downloader.warm(client.session.dc_id)
+        except Exception:
+            logger.exception("Could not warm up the download pool")
+        metrics.register("downloads", parallel_downloader.stats)
+
+    media_fetcher.configure(
+        budget_bytes=settings.media_cache_budget_mb * 1024 * 1024,
+        downloader=parallel_downloader,
+    )
+    metrics.register("media_fetch", media_fetcher.stats)
+
+    # Registered before every other handler so TTL media is never queued
+    # behind the tracker or the handler pipeline.
+    disappearing_capture = DisappearingMediaCapture(client, channel_id=userbot_target)
+    disappearing_capture.start()
+    metrics.register("disappearing", disappearing_capture.stats)
+
+    transcript_cache = TranscriptCache()
+    metrics.register("transcripts", transcript_cache.stats)
+
+    transcription_scheduler = TranscriptionScheduler(
+        max_concurrency=settings.transcribe_max_concurrency,
+        on_demand_concurrency=settings.transcribe_backfill_concurrency,
+        weights=settings.get_transcribe_peer_weights(),
+        minute_cap_s=settings.transcribe_peer_minute_cap_s,
+        day_cap_s=settings.transcribe_peer_day_cap_s,
+    )
+    metrics.register("transcription_peers", transcription_scheduler.stats)
+
+    prefetch_peer_ids = settings.get_transcribe_prefetch_peer_ids()
+    voice_prefetcher: VoicePrefetcher | None = None
+    if prefetch_peer_ids:
+        voice_prefetcher = VoicePrefetcher(
+            transcriber=transcriber,
+            cache=transcript_cache,
+            budget_s_per_hour=settings.transcribe_prefetch_budget_s,
+            scheduler=transcription_scheduler,
+        )
+        metrics.register("prefetch", voice_prefetcher.stats)
+        logger.info("Voice prefetch enabled in %d chats", len(prefetch_peer_ids))
+
+    voice_burst: VoiceBurstCoalescer | None = None
+    if settings.transcribe_burst_window_s > 0:
+        voice_burst = VoiceBurstCoalescer(
+            transcriber=transcriber,
+            summarizer=summarizer,
+            transcript_cache=transcript_cache,
+            scheduler=transcription_scheduler,
+            window_s=settings.transcribe_burst_window_s,
+        )
+        metrics.register("voice_bursts", voice_burst.stats)
 
     eliza_bot_username = settings.eliza_bot_username.strip() or None
 
@@ -155,14 +256,49 @@ async def _run() -> None:
         summarizer=summarizer,
         ytdlp_cookies_file=settings.ytdlp_cookies_file.strip(),
         quote_api_url=settings.quote_api_url.strip(),
+        transcript_cache=transcript_cache,
+        voice_prefetcher=voice_prefetcher,
+        prefetch_peer_ids=prefetch_peer_ids,
+        backfill_concurrency=settings.transcribe_backfill_concurrency,
+        voice_burst=voice_burst,
+        transcription_scheduler=transcription_scheduler,
+    )
+
+    tracker_store: TrackerStore | None = None
+    store_dir = settings.deleted_tracker_store_dir.strip()
+    if settings.deleted_tracker_enabled and store_dir:
+        tracker_store = TrackerStore(store_dir, ttl_s=CACHE_TTL_S)
+        metrics.register("tracker_store", tracker_store.stats)
+        logger.info("Deleted message tracker persists to %s", store_dir)
+
+    tracker_media_budget = TrackerMediaBudget(
+        memory_bytes=settings.deleted_tracker_memory_mb * 1024 * 1024,
+        inline_max_bytes=settings.deleted_tracker_inline_max_mb * 1024 * 1024,
+        type_caps=settings.get_deleted_tracker_media_caps(),
+        eager_max_bytes=settings.deleted_tracker_eager_max_kb * 1024,
+        blob_path=tracker_store.blob_path if tracker_store is not None else None,
     )
+    tracker_media_budget.clear_spill()
+    metrics.register("tracker_media", tracker_media_budget.stats)
 
     bot = TgUserbot(
         client,
         handlers,
         deleted_tracker_enabled=settings.deleted_tracker_enabled,
         channel_id=userbot_target,
+        tracker_store=tracker_store,
+        tracker_media_budget=tracker_media_budget,
+        tracker_digest_threshold=settings.deleted_tracker_digest_threshold,
+        tracker_batch_window_s=settings.deleted_tracker_batch_window_s,
+        tracker_edit_quiet_s=settings.deleted_tracker_edit_quiet_s,
+        tracker_group_ids=settings.get_deleted_tracker_group_ids(),
+        tracker_group_max_entries=settings.deleted_tracker_group_max_entries,
+        tracker_group_max_bytes=settings.deleted_tracker_group_max_mb * 1024 * 1024,
+        tracker_prime_dialogs=settings.deleted_tracker_prime_dialogs,
+        tracker_prime_interval_s=settings.deleted_tracker_prime_interval_s,
     )
+    if voice_burst is not None:
+        voice_burst.set_unread_hook(bot.preserve_dialog_unread)
     await bot.start()
 
     if dead_hand is not None:
@@ -172,8 +308,11 @@ async def _run() -> None:
     try:
         await client.run_until_disconnected()
     finally:
+        await bot.stop()
         if dead_hand is not None:
             await dead_hand.stop()
+        if parallel_downloader is not None:
+            await parallel_downloader.close()
 
 
 def _handle_signal(sig: int, _frame) -> None:
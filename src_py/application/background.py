@@ -0,0 +1,28 @@
+import asyncio
+import logging
+from typing import Coroutine
+
+logger = logging.getLogger(__name__)
+
+# asyncio only keeps weak references to tasks; hold fire-and-forget work here
+# until it finishes so it cannot be garbage-collected mid-flight.
+_tasks: set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine[object, object, object], *, name: str) -> asyncio.Task:
+    """Run ``coro`` in the background, logging (not raising) its failure."""
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+def _on_done(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(
+            "Background task %s failed", task.get_name(), exc_info=exc
+        )
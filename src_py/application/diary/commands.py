@@ -4,8 +4,14 @@ from datetime import datetime, timedelta, timezone
 from telethon import TelegramClient
 from telethon.tl import types
 
+from src_py.application.background import spawn
 from src_py.application.diary.dead_hand import DeadHand
-from src_py.domain.transcriber import Transcriber, TranscribeOptions
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription import transcribe_voice_message
+from src_py.application.use_cases.transcription_scheduler import (
+    TranscriptionScheduler,
+)
+from src_py.domain.transcriber import Transcriber
 from src_py.telegram_utils.sender_name import get_sender_display_name
 from src_py.telegram_utils.utils import (
     get_replied_message,
@@ -13,10 +19,6 @@ from src_py.telegram_utils.utils import (
     is_voice_message,
     reply_to,
 )
-from src_py.telegram_utils.voice import (
-    save_video_note_from_message,
-    save_voice_from_message,
-)
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +51,8 @@ async def command_diary(
     channel_id: object,
     dead_hand: DeadHand,
     transcriber: Transcriber,
+    transcript_cache: TranscriptCache | None = None,
+    scheduler: TranscriptionScheduler | None = None,
 ) -> None:
     if dead_hand.is_released():
         await reply_to(client, message, RELEASED_NOTICE)
@@ -65,9 +69,22 @@ async def command_diary(
 
     try:
         if replied:
-            await _forward_replied(client, replied, channel_id)
+            forwarded = await _forward_replied(client, replied, channel_id)
             if is_voice_message(replied) or is_video_note(replied):
-                await _send_transcript(client, replied, channel_id, transcriber)
+                # The entry is already stored; the transcript follows up in
+                # the channel whenever it is ready.
+                spawn(
+                    _send_transcript(
+                        client,
+                        replied,
+                        channel_id,
+                        forwarded,
+                        transcriber=transcriber,
+                        transcript_cache=transcript_cache,
+                        scheduler=scheduler,
+                    ),
+                    name=f"diary-transcript-{replied.id}",
+                )
         if inline_text:
             await _send_inline(client, channel_id, inline_text)
         await client.delete_messages(message.peer_id, [message.id], revoke=True)
@@ -80,17 +97,19 @@ async def _forward_replied(
     client: TelegramClient,
     replied: types.Message,
     channel_id: object,
-) -> None:
+) -> types.Message | None:
+    """Store the replied message in the channel; returns the forwarded copy
+    when it carried media."""
     sender_name = await get_sender_display_name(client, replied)
     header = f"{DIARY_TAG} {_local_timestamp()}\nОт: {sender_name}"
     if replied.media:
         await client.send_message(channel_id, header)
-        await client.forward_messages(channel_id, replied)
-    else:
-        lines = [header]
-        if replied.message:
-            lines.extend(["", replied.message])
-        await client.send_message(channel_id, "\n".join(lines))
+        return await client.forward_messages(channel_id, replied)
+    lines = [header]
+    if replied.message:
+        lines.extend(["", replied.message])
+    await client.send_message(channel_id, "\n".join(lines))
+    return None
 
 
 async def _send_inline(
@@ -106,25 +125,31 @@ async def _send_transcript(
     client: TelegramClient,
     voice_msg: types.Message,
     channel_id: object,
+    forwarded: types.Message | None,
+    *,
     transcriber: Transcriber,
+    transcript_cache: TranscriptCache | None,
+    scheduler: TranscriptionScheduler | None,
 ) -> None:
     try:
-        if is_video_note(voice_msg):
-            file_path = await save_video_note_from_message(client, voice_msg)
-            text = await transcriber.transcribe_file(
-                file_path, "video/mp4", TranscribeOptions(language="Russian")
-            )
-        else:
-            file_path = await save_voice_from_message(client, voice_msg)
-            text = await transcriber.transcribe_ogg_file(
-                file_path, TranscribeOptions(language="Russian")
-            )
+        text = await transcribe_voice_message(
+            client,
+            voice_msg,
+            transcriber=transcriber,
+            cache=transcript_cache,
+            scheduler=scheduler,
+            on_demand=True,
+        )
         cleaned = (text or "").strip()
         if not cleaned:
             logger.warning("[diary] empty transcription, skipping follow-up")
             return
         header = f"{DIARY_TAG} #transcript {_local_timestamp()}"
-        await client.send_message(channel_id, f"{header}\n\n{cleaned}")
+        await client.send_message(
+            channel_id,
+            f"{header}\n\n{cleaned}",
+            reply_to=forwarded.id if isinstance(forwarded, types.Message) else None,
+        )
     except Exception:
         logger.exception("[diary] transcription failed; entry kept without transcript")
 
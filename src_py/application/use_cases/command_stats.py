@@ -0,0 +1,20 @@
+import logging
+
+from telethon import TelegramClient
+from telethon.tl import types
+
+from src_py import metrics
+from src_py.telegram_utils.utils import reply_to
+
+logger = logging.getLogger(__name__)
+
+
+async def command_stats(
+    client: TelegramClient,
+    message: types.Message,
+) -> None:
+    try:
+        await reply_to(client, message, metrics.format_snapshot())
+    except Exception:
+        logger.exception("Error handling .stats")
+        await reply_to(client, message, "Ошибка при получении статистики.")
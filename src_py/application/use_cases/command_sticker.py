@@ -5,6 +5,7 @@ from PIL import Image
 from telethon import TelegramClient
 from telethon.tl import types
 
+from src_py.telegram_utils.media_fetch import media_fetcher
 from src_py.telegram_utils.utils import get_replied_message, reply_to
 
 logger = logging.getLogger(__name__)
@@ -47,8 +48,8 @@ async def command_sticker_to_photo(
         return
 
     try:
-        data = await client.download_media(replied, file=bytes)
-        if not isinstance(data, bytes):
+        data = await media_fetcher.fetch_bytes(client, replied)
+        if data is None:
             await reply_to(client, message, "Не удалось скачать стикер.")
             return
 
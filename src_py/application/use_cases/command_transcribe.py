@@ -1,25 +1,50 @@
+import asyncio
 import logging
 
 from telethon import TelegramClient
 from telethon.tl import types
 
 from src_py import messages
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription_scheduler import (
+    TranscriptionScheduler,
+)
 from src_py.application.use_cases.transcription import (
-    build_summary,
+    reply_with_transcript,
     transcribe_voice_message,
 )
 from src_py.domain.summarizer import Summarizer
 from src_py.domain.transcriber import Transcriber
+from src_py.telegram_utils.audio_extract import SpoolLimitError
+from src_py.telegram_utils.sender_name import get_sender_display_name
 from src_py.telegram_utils.utils import (
+    get_message_link,
     get_replied_message,
-    is_video_note,
-    is_voice_message,
+    is_transcribable_media,
     reply_to,
-    send_transcription_reply,
 )
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BACKFILL_CONCURRENCY = 4
+MAX_BACKFILL = 50
+ALL_UNREAD_ARG = "all-unread"
+# ``all-unread`` looks this far back for unplayed notes among played ones.
+MAX_UNREAD_SCAN = 500
+
+
+def _parse_backfill_arg(text: str | None) -> int | str | None:
+    """``.convert N`` -> N, ``.convert all-unread`` -> "all-unread", else None."""
+    parts = (text or "").strip().split()
+    if len(parts) != 2:
+        return None
+    arg = parts[1].lower()
+    if arg == ALL_UNREAD_ARG:
+        return ALL_UNREAD_ARG
+    if arg.isdigit() and int(arg) > 0:
+        return min(int(arg), MAX_BACKFILL)
+    return None
+
 
 async def command_transcribe_voice(
     client: TelegramClient,
@@ -27,22 +52,140 @@ async def command_transcribe_voice(
     *,
     transcriber: Transcriber,
     summarizer: Summarizer | None = None,
+    transcript_cache: TranscriptCache | None = None,
+    scheduler: TranscriptionScheduler | None = None,
+    backfill_concurrency: int = DEFAULT_BACKFILL_CONCURRENCY,
 ) -> None:
+    backfill = _parse_backfill_arg(message.message)
+    if backfill is not None:
+        await _backfill_transcribe(
+            client,
+            message,
+            backfill,
+            transcriber=transcriber,
+            transcript_cache=transcript_cache,
+            scheduler=scheduler,
+            concurrency=backfill_concurrency,
+        )
+        return
+
     replied = await get_replied_message(client, message)
-    if not replied or (not is_voice_message(replied) and not is_video_note(replied)):
+    if not replied or not is_transcribable_media(replied):
         await reply_to(client, message, messages.NOT_VOICE_REPLY)
         return
 
     try:
-        text = await transcribe_voice_message(client, replied, transcriber=transcriber)
+        text = await transcribe_voice_message(
+            client,
+            replied,
+            transcriber=transcriber,
+            cache=transcript_cache,
+            scheduler=scheduler,
+            on_demand=True,
+        )
 
         cleaned = text.strip()
         if not cleaned:
             await reply_to(client, message, "Расшифровка: <empty>")
             return
 
-        summary = await build_summary(cleaned, summarizer=summarizer)
-        await send_transcription_reply(client, message, cleaned, summary)
+        await reply_with_transcript(
+            client, message, cleaned, summarizer=summarizer
+        )
+    except SpoolLimitError as e:
+        await reply_to(
+            client, message, messages.MEDIA_TOO_LARGE.format(limit_mb=e.limit >> 20)
+        )
     except Exception:
         logger.exception("Error transcribing group/private convert")
         await reply_to(client, message, messages.ERROR)
+
+
+async def _collect_voice_notes(
+    client: TelegramClient, peer: types.TypePeer, backfill: int | str
+) -> tuple[list[types.Message], bool]:
+    """Newest voice/video notes of the chat, oldest first. ``all-unread``
+    means incoming notes nobody has played yet — sending the command already
+    marked the chat itself as read. The flag is set when older unplayed
+    notes were left out, past ``MAX_BACKFILL`` matches or the scan cap."""
+    unread_only = backfill == ALL_UNREAD_ARG
+    limit = MAX_BACKFILL if unread_only else backfill
+    found: list[types.Message] = []
+    truncated = False
+    scanned = 0
+    async for msg in client.iter_messages(
+        peer,
+        limit=MAX_UNREAD_SCAN if unread_only else limit,
+        filter=types.InputMessagesFilterRoundVoice,
+    ):
+        scanned += 1
+        if not isinstance(msg, types.Message):
+            continue
+        if unread_only and (msg.out or not msg.media_unread):
+            continue
+        if len(found) >= limit:
+            truncated = True
+            break
+        found.append(msg)
+    else:
+        truncated = unread_only and scanned >= MAX_UNREAD_SCAN
+    found.reverse()
+    return found, truncated
+
+
+async def _backfill_transcribe(
+    client: TelegramClient,
+    message: types.Message,
+    backfill: int | str,
+    *,
+    transcriber: Transcriber,
+    transcript_cache: TranscriptCache | None,
+    scheduler: TranscriptionScheduler | None,
+    concurrency: int,
+) -> None:
+    try:
+        notes, truncated = await _collect_voice_notes(
+            client, message.peer_id, backfill
+        )
+        if not notes:
+            await reply_to(client, message, "Голосовых для расшифровки не найдено.")
+            return
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def transcribe_one(note: types.Message) -> str:
+            async with semaphore:
+                try:
+                    text = await transcribe_voice_message(
+                        client,
+                        note,
+                        transcriber=transcriber,
+                        cache=transcript_cache,
+                        scheduler=scheduler,
+                        on_demand=True,
+                    )
+                except SpoolLimitError:
+                    return "(файл слишком большой)"
+                except Exception:
+                    logger.exception("Backfill transcription failed for msg %d", note.id)
+                    return "(ошибка транскрибации)"
+            return text.strip() or "<empty>"
+
+        texts, names = await asyncio.gather(
+            asyncio.gather(*(transcribe_one(n) for n in notes)),
+            asyncio.gather(*(get_sender_display_name(client, n) for n in notes)),
+        )
+
+        sections = [f"Расшифровка голосовых: {len(notes)}"]
+        if truncated:
+            sections[0] += (
+                "\nПоказаны только самые свежие: более старые непрослушанные "
+                f"не вошли (не больше {MAX_BACKFILL}, просмотрено до "
+                f"{MAX_UNREAD_SCAN} голосовых)."
+            )
+        for i, (note, name, text) in enumerate(zip(notes, names, texts), start=1):
+            sections.append(f"{i}. {name} — {get_message_link(note)}\n{text}")
+        await reply_to(client, message, "\n\n".join(sections))
+    except Exception:
+        logger.exception("Error handling .convert backfill")
+        await reply_to(client, message, messages.ERROR)
@@ -1,14 +1,29 @@
-import io
 import logging
+import os
+import time
+from datetime import datetime
 
 from telethon import TelegramClient
 from telethon.tl import types
 
+from src_py.application.background import spawn
+from src_py.telegram_utils.deleted_message_tracker import detect_media_type
+from src_py.telegram_utils.media_fetch import media_fetcher
 from src_py.telegram_utils.sender_name import get_sender_display_name
 from src_py.telegram_utils.utils import get_peer_label
 
 logger = logging.getLogger(__name__)
 
+CAPTURE_DIR = os.path.join(os.getcwd(), "disappearing")
+# Message ids already being captured; updates can arrive twice.
+MAX_SEEN = 1000
+
+
+def _safe_file_name(file_name: str) -> str:
+    """The sender picks the document name; keep only its last component."""
+    name = os.path.basename(file_name.replace("\\", "/"))
+    return name.lstrip(".").strip() or "file"
+
 
 def is_disappearing_media(message: types.Message) -> bool:
     if not message.media:
@@ -17,24 +32,116 @@ def is_disappearing_media(message: types.Message) -> bool:
     return ttl is not None and ttl > 0
 
 
-async def forward_disappearing_media(
-    client: TelegramClient,
-    message: types.Message,
-    *,
-    channel_id: object,
-) -> None:
-    try:
-        data = await client.download_media(message, file=bytes)
-        if not isinstance(data, bytes):
+class DisappearingMediaCapture:
+    """Saves self-destructing media to the userbot channel before its TTL.
+
+    Captures start straight from the raw update stream, ahead of the
+    handler pipeline and the deleted-message tracker, and each one runs as
+    its own task. The file goes through the shared media fetcher, so other
+    consumers of the same arrival reuse the download, and is written under
+    its real type and name, uploaded from there, and removed once it is in
+    the channel.
+    """
+
+    def __init__(self, client: TelegramClient, *, channel_id: object) -> None:
+        self._client = client
+        self._channel_id = channel_id
+        self._seen: dict[tuple[str, int], None] = {}
+        self._captured = 0
+        self._failed = 0
+        self._late = 0
+        self._last_capture_s = 0.0
+        self._max_capture_s = 0.0
+        self._max_ttl_share = 0.0
+
+    def start(self) -> None:
+        self._client.add_event_handler(self._on_raw_update)
+
+    async def _on_raw_update(self, update: object) -> None:
+        if not isinstance(update, (types.UpdateNewMessage, types.UpdateNewChannelMessage)):
             return
+        message = update.message
+        if not isinstance(message, types.Message) or not is_disappearing_media(message):
+            return
+        key = (get_peer_label(message), message.id)
+        if key in self._seen:
+            return
+        self._seen[key] = None
+        if len(self._seen) > MAX_SEEN:
+            self._seen.pop(next(iter(self._seen)))
+        spawn(self._capture(message), name=f"disappearing-{message.id}")
+
+    async def _capture(self, message: types.Message) -> None:
+        media_info = detect_media_type(message)
+        if media_info is None:
+            return
+        media_type, _mime, file_name = media_info
+        ttl = message.media.ttl_seconds
+        os.makedirs(CAPTURE_DIR, exist_ok=True)
+        path = os.path.join(
+            CAPTURE_DIR,
+            f"{get_peer_label(message)}-{message.id}-{_safe_file_name(file_name)}",
+        )
+        saved: str | None = None
+        try:
+            try:
+                saved = await media_fetcher.fetch_to_file(self._client, message, path)
+            except ValueError:
+                self._failed += 1
+                logger.warning(
+                    "Disappearing media %d expired before capture", message.id
+                )
+                return
+            self._record_capture(message, ttl)
+
+            sender_name = await get_sender_display_name(self._client, message)
+            header = (
+                f"#disappearing\nОт: {sender_name}\n"
+                f"Чат: {get_peer_label(message)}\nTTL: {ttl} с"
+            )
+            await self._upload(saved, media_type, header)
+            logger.info("Forwarded disappearing media from %s", sender_name)
+        except Exception:
+            self._failed += 1
+            logger.exception("Error forwarding disappearing media")
+        finally:
+            # Telethon may add an extension, so the file is wherever it says.
+            try:
+                os.remove(saved or path)
+            except OSError:
+                pass
+
+    async def _upload(self, path: str, media_type: str, caption: str) -> None:
+        dest = self._channel_id
+        if media_type == "voiceNote":
+            await self._client.send_file(dest, path, caption=caption, voice_note=True)
+        elif media_type == "videoNote":
+            await self._client.send_message(dest, caption)
+            await self._client.send_file(dest, path, video_note=True)
+        else:
+            await self._client.send_file(
+                dest, path, caption=caption, force_document=False
+            )
 
-        sender_name = await get_sender_display_name(client, message)
-        chat_label = get_peer_label(message)
-        header = f"#disappearing\nОт: {sender_name}\nЧат: {chat_label}"
+    def _record_capture(self, message: types.Message, ttl: int) -> None:
+        # The TTL counter starts when the recipient opens the media, so
+        # the time since sending is an upper bound on how much of it we used.
+        capture_s = 0.0
+        if isinstance(message.date, datetime):
+            capture_s = max(time.time() - message.date.timestamp(), 0.0)
+        self._captured += 1
+        self._last_capture_s = capture_s
+        self._max_capture_s = max(self._max_capture_s, capture_s)
+        self._max_ttl_share = max(self._max_ttl_share, capture_s / ttl)
+        if capture_s > ttl:
+            self._late += 1
 
-        f = io.BytesIO(data)
-        f.name = "disappearing.jpg"
-        await client.send_file(channel_id, f, caption=header, force_document=False)
-        logger.info("Forwarded disappearing media from %s", sender_name)
-    except Exception:
-        logger.exception("Error forwarding disappearing media")
+    def stats(self) -> dict[str, object]:
+        return {
+            "captured": self._captured,
+            "failed": self._failed,
+            "slower_than_ttl": self._late,
+            "last_capture_s": round(self._last_capture_s, 1),
+            "max_capture_s": round(self._max_capture_s, 1),
+            "max_ttl_share": round(self._max_ttl_share, 2),
+        }
@@ -4,8 +4,13 @@ from telethon import TelegramClient
 from telethon.tl import types
 
 from src_py import messages
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription_scheduler import (
+    BudgetExceeded,
+    TranscriptionScheduler,
+)
 from src_py.application.use_cases.transcription import (
-    build_summary,
+    reply_with_transcript,
     transcribe_voice_message,
 )
 from src_py.domain.summarizer import Summarizer
@@ -14,7 +19,6 @@ from src_py.telegram_utils.utils import (
     is_video_note,
     is_voice_message,
     reply_to,
-    send_transcription_reply,
 )
 
 logger = logging.getLogger(__name__)
@@ -26,19 +30,30 @@ async def private_transcribe_voice(
     *,
     transcriber: Transcriber,
     summarizer: Summarizer | None = None,
+    transcript_cache: TranscriptCache | None = None,
+    scheduler: TranscriptionScheduler | None = None,
 ) -> None:
     if not is_voice_message(message) and not is_video_note(message):
         return
 
     try:
-        text = await transcribe_voice_message(client, message, transcriber=transcriber)
+        text = await transcribe_voice_message(
+            client,
+            message,
+            transcriber=transcriber,
+            cache=transcript_cache,
+            scheduler=scheduler,
+        )
 
         cleaned = text.strip()
         if not cleaned:
             return
 
-        summary = await build_summary(cleaned, summarizer=summarizer)
-        await send_transcription_reply(client, message, cleaned, summary)
+        await reply_with_transcript(
+            client, message, cleaned, summarizer=summarizer
+        )
+    except BudgetExceeded:
+        logger.info("Auto-transcription budget used up for msg %d", message.id)
     except Exception:
         logger.exception("Error transcribing private voice/videonote")
         await reply_to(client, message, messages.ERROR)
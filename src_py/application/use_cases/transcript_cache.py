@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_TTL_S = 24 * 60 * 60
+MAX_ENTRIES = 2000
+
+
+@dataclass
+class _Entry:
+    text: str
+    stored_at: float
+    prefetched: bool
+    used: bool = False
+
+
+class TranscriptCache:
+    """Transcripts keyed by media id, shared by every transcription path.
+
+    Concurrent requests for the same media share one transcription. Entries
+    produced by background prefetch are tracked separately so the prefetch
+    budget can be tuned from hit/waste counts.
+    """
+
+    def __init__(
+        self, *, ttl_s: float = TRANSCRIPT_TTL_S, max_entries: int = MAX_ENTRIES
+    ) -> None:
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[str]] = {}
+        # In-flight prefetches that an on-demand request has already joined.
+        self._claimed: set[str] = set()
+        self._hits = 0
+        self._misses = 0
+        self._prefetched = 0
+        self._prefetch_used = 0
+        self._prefetch_wasted = 0
+
+    def get(self, key: str) -> str | None:
+        entry = self._fresh(key)
+        if entry is None:
+            return None
+        if entry.prefetched and not entry.used:
+            self._prefetch_used += 1
+        entry.used = True
+        return entry.text
+
+    def _fresh(self, key: str) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry.stored_at > self._ttl_s:
+            self._drop(key)
+            return None
+        return entry
+
+    def contains(self, key: str) -> bool:
+        return key in self._entries or key in self._inflight
+
+    async def get_or_transcribe(
+        self,
+        key: str,
+        transcribe: Callable[[], Awaitable[str]],
+        *,
+        prefetch: bool = False,
+    ) -> str:
+        if prefetch:
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry.text
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                self._hits += 1
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._misses += 1
+            task = asyncio.ensure_future(transcribe())
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda t, k=key, p=prefetch: self._on_transcribed(k, t, p)
+            )
+        elif not prefetch:
+            # A prefetch for this media is already running: join it.
+            self._hits += 1
+            self._claimed.add(key)
+        return await asyncio.shield(task)
+
+    def _on_transcribed(self, key: str, task: asyncio.Task[str], prefetch: bool) -> None:
+        self._inflight.pop(key, None)
+        claimed = key in self._claimed
+        self._claimed.discard(key)
+        if task.cancelled() or task.exception() is not None:
+            return
+        # Engines raise on failure, so any non-empty text is a transcript.
+        text = task.result()
+        if not text.strip():
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = _Entry(
+            text=text,
+            stored_at=time.time(),
+            prefetched=prefetch,
+            used=not prefetch or claimed,
+        )
+        if prefetch:
+            self._prefetched += 1
+            if claimed:
+                self._prefetch_used += 1
+        self._prune()
+
+    def _prune(self) -> None:
+        now = time.time()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if (
+                len(self._entries) <= self._max_entries
+                and now - entry.stored_at <= self._ttl_s
+            ):
+                break
+            self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.prefetched and not entry.used:
+            self._prefetch_wasted += 1
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "prefetched": self._prefetched,
+            "prefetch_used": self._prefetch_used,
+            "prefetch_wasted": self._prefetch_wasted,
+        }
@@ -1,20 +1,70 @@
+import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 
 from telethon import TelegramClient
 from telethon.tl import types
 
+from src_py.application.background import spawn
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription_scheduler import (
+    TranscriptionScheduler,
+)
 from src_py.domain.summarizer import Summarizer
-from src_py.domain.transcriber import Transcriber, TranscribeOptions
-from src_py.telegram_utils.utils import is_video_note
-from src_py.telegram_utils.voice import (
-    save_video_note_from_message,
-    save_voice_from_message,
+from src_py.domain.transcriber import (
+    MessageTranscriber,
+    Transcriber,
+    TranscribeOptions,
+)
+from src_py.telegram_utils.audio_extract import extract_audio_track
+from src_py.telegram_utils.utils import (
+    edit_transcription_summary,
+    get_media_duration,
+    get_media_key,
+    get_peer_id,
+    is_video_note,
+    is_voice_message,
+    send_transcription_reply,
 )
+from src_py.telegram_utils.voice import save_voice_from_message
 
 logger = logging.getLogger(__name__)
 
 # Below this length a TL;DR costs more attention than it saves.
 SUMMARY_MIN_CHARS = 600
+# A TL;DR that is not ready by then is dropped; the transcript is already out.
+SUMMARY_DEADLINE_S = 45
+SUMMARY_CACHE_SIZE = 256
+
+
+class SummaryCache:
+    """Bounded LRU of finished summaries keyed by transcript hash."""
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_SIZE) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    @staticmethod
+    def _key(transcript: str) -> str:
+        return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+    def get(self, transcript: str) -> str | None:
+        key = self._key(transcript)
+        summary = self._entries.get(key)
+        if summary is not None:
+            self._entries.move_to_end(key)
+        return summary
+
+    def put(self, transcript: str, summary: str) -> None:
+        key = self._key(transcript)
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+_summary_cache = SummaryCache()
 
 
 async def transcribe_voice_message(
@@ -22,18 +72,60 @@ async def transcribe_voice_message(
     message: types.Message,
     *,
     transcriber: Transcriber,
+    cache: TranscriptCache | None = None,
+    scheduler: TranscriptionScheduler | None = None,
+    on_demand: bool = False,
+    prefetch: bool = False,
 ) -> str:
-    """Download a voice message / video note and return its transcript."""
-    if is_video_note(message):
-        file_path = await save_video_note_from_message(client, message)
-        return await transcriber.transcribe_file(
-            file_path, "video/mp4", TranscribeOptions(language="Russian")
+    """Download a voice message / video note and return its transcript.
+
+    With a ``cache``, a transcript already produced for the same media (by
+    prefetch or an earlier request) is returned without any work. With a
+    ``scheduler``, the actual work waits for the peer's fair share and may
+    raise ``BudgetExceeded`` unless the request is ``on_demand``.
+    """
+
+    async def transcribe() -> str:
+        if scheduler is None:
+            return await _transcribe_uncached(client, message, transcriber)
+        return await scheduler.run(
+            get_peer_id(message) or "unknown",
+            get_media_duration(message),
+            lambda: _transcribe_uncached(client, message, transcriber),
+            on_demand=on_demand,
+            background=prefetch,
+            key=key,
         )
 
-    file_path = await save_voice_from_message(client, message)
-    return await transcriber.transcribe_ogg_file(
-        file_path, TranscribeOptions(language="Russian")
-    )
+    key = get_media_key(message)
+    if cache is None or key is None:
+        return await transcribe()
+    if scheduler is not None and not prefetch:
+        scheduler.promote(key, on_demand=on_demand)
+    return await cache.get_or_transcribe(key, transcribe, prefetch=prefetch)
+
+
+async def _transcribe_uncached(
+    client: TelegramClient,
+    message: types.Message,
+    transcriber: Transcriber,
+) -> str:
+    options = TranscribeOptions(language="Russian")
+    voice = is_voice_message(message)
+    video_note = is_video_note(message)
+    if (voice or video_note) and isinstance(transcriber, MessageTranscriber):
+        text = await transcriber.transcribe_message(message, options)
+        if text is not None:
+            return text
+
+    if voice:
+        file_path = await save_voice_from_message(client, message)
+        return await transcriber.transcribe_ogg_file(file_path, options)
+
+    # Video notes and arbitrary audio/video: only the audio track is pulled
+    # out, as it streams in.
+    file_path = await extract_audio_track(client, message)
+    return await transcriber.transcribe_ogg_file(file_path, options)
 
 
 async def build_summary(
@@ -44,8 +136,70 @@ async def build_summary(
 ) -> str | None:
     if summarizer is None or len(transcript) < min_chars:
         return None
+    cached = _summary_cache.get(transcript)
+    if cached is not None:
+        return cached
     try:
-        return await summarizer.summarize(transcript)
+        summary = await summarizer.summarize(transcript)
     except Exception:
         logger.exception("Summarization failed")
         return None
+    if summary:
+        _summary_cache.put(transcript, summary)
+    return summary
+
+
+async def reply_with_transcript(
+    client: TelegramClient,
+    message: types.Message,
+    transcript: str,
+    *,
+    summarizer: Summarizer | None,
+) -> None:
+    """Send the transcript right away and patch its TL;DR in once ready."""
+    if summarizer is None or len(transcript) < SUMMARY_MIN_CHARS:
+        await send_transcription_reply(client, message, transcript)
+        return
+
+    cached = _summary_cache.get(transcript)
+    if cached is not None:
+        await send_transcription_reply(client, message, transcript, cached)
+        return
+
+    summary_task = asyncio.create_task(
+        build_summary(transcript, summarizer=summarizer)
+    )
+    try:
+        sent = await send_transcription_reply(
+            client, message, transcript, summary_pending=True
+        )
+    except BaseException:
+        summary_task.cancel()
+        raise
+    if not sent:
+        summary_task.cancel()
+        return
+
+    spawn(
+        _patch_summary(client, sent[0], transcript, summary_task),
+        name=f"tldr-{message.id}",
+    )
+
+
+async def _patch_summary(
+    client: TelegramClient,
+    first_reply: types.Message,
+    transcript: str,
+    summary_task: asyncio.Task,
+) -> None:
+    try:
+        summary = await asyncio.wait_for(summary_task, SUMMARY_DEADLINE_S)
+    except asyncio.TimeoutError:
+        logger.warning("TL;DR not ready within %ss; dropped", SUMMARY_DEADLINE_S)
+        return
+    if not summary:
+        return
+    try:
+        await edit_transcription_summary(client, first_reply, transcript, summary)
+    except Exception:
+        logger.exception("Failed to patch TL;DR into transcript reply")
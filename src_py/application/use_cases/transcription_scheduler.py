@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MINUTE_S = 60
+DAY_S = 24 * 60 * 60
+DEFAULT_MAX_CONCURRENCY = 2
+# On-demand jobs (``.convert``, ``.convert N`` backfill) have their own slots,
+# so a backlog of automatic jobs never delays what the user just asked for.
+DEFAULT_ON_DEMAND_CONCURRENCY = 4
+# Jobs with unknown duration are charged this much audio.
+UNKNOWN_DURATION_S = 60
+
+
+class BudgetExceeded(Exception):
+    """The peer used up its daily audio budget; only ``.convert`` still runs."""
+
+
+@dataclass
+class _Job:
+    audio_s: float
+    on_demand: bool
+    background: bool
+    granted: asyncio.Future[None]
+    key: str | None = None
+    deferred: bool = False
+    # Which lane the job was granted in; set at dispatch.
+    on_demand_slot: bool = False
+
+
+@dataclass
+class _PeerState:
+    weight: int
+    queue: deque[_Job] = field(default_factory=deque)
+    usage: deque[tuple[float, float]] = field(default_factory=deque)
+    vtime: float = 0.0
+    jobs: int = 0
+    audio_s: float = 0.0
+    deferred: int = 0
+    rejected: int = 0
+
+
+class TranscriptionScheduler:
+    """Fair-share admission for transcription jobs.
+
+    Peers are served by weighted fair queueing: each peer has a virtual
+    clock advanced by ``audio seconds / weight`` per dispatched job, and the
+    waiting peer with the smallest clock goes next, so one chatty group
+    cannot starve private chats. Per-peer minute caps hold automatic jobs
+    back until the window frees up; day caps reject them outright.
+    On-demand jobs (``.convert``) ignore caps and run in their own lane of
+    ``on_demand_concurrency`` slots, still queueing fairly among
+    themselves; background jobs (prefetch) only run when nothing else is
+    waiting.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        on_demand_concurrency: int = DEFAULT_ON_DEMAND_CONCURRENCY,
+        weights: dict[str, int] | None = None,
+        minute_cap_s: int = 0,
+        day_cap_s: int = 0,
+    ) -> None:
+        self._max_concurrency = max(1, max_concurrency)
+        self._on_demand_concurrency = max(1, on_demand_concurrency)
+        self._weights = weights or {}
+        self._minute_cap_s = minute_cap_s
+        self._day_cap_s = day_cap_s
+        self._peers: dict[str, _PeerState] = {}
+        self._running = 0
+        self._running_on_demand = 0
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    async def run(
+        self,
+        peer_id: str,
+        audio_s: float,
+        job: Callable[[], Awaitable[T]],
+        *,
+        on_demand: bool = False,
+        background: bool = False,
+        key: str | None = None,
+    ) -> T:
+        peer = self._peer(peer_id)
+        audio_s = audio_s or UNKNOWN_DURATION_S
+        if not on_demand and self._day_cap_s > 0:
+            # Queued jobs are only charged at dispatch; count them now so a
+            # burst cannot slip past the cap all at once.
+            committed = self._used(peer, DAY_S) + self._queued_audio(peer)
+            if committed + audio_s > self._day_cap_s:
+                peer.rejected += 1
+                raise BudgetExceeded(peer_id)
+
+        granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queued = _Job(audio_s, on_demand, background and not on_demand, granted, key)
+        self._enter_queue(peer, queued)
+        self._dispatch()
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.done() and not granted.cancelled():
+                self._finish(queued)
+            else:
+                self._remove(peer, granted)
+            raise
+
+        try:
+            return await job()
+        finally:
+            self._finish(queued)
+
+    def promote(self, key: str, *, on_demand: bool) -> None:
+        """A foreground request now waits on a queued background job for the
+        same media: lift it out of the background lane."""
+        for peer in self._peers.values():
+            for job in peer.queue:
+                if job.key == key:
+                    job.background = False
+                    job.on_demand = job.on_demand or on_demand
+        self._dispatch()
+
+    def _peer(self, peer_id: str) -> _PeerState:
+        peer = self._peers.get(peer_id)
+        if peer is None:
+            peer = _PeerState(weight=max(1, self._weights.get(peer_id, 1)))
+            self._peers[peer_id] = peer
+        return peer
+
+    def _enter_queue(self, peer: _PeerState, job: _Job) -> None:
+        if not peer.queue:
+            # A peer returning from idle starts at the current frontier
+            # instead of cashing in the time it was away.
+            waiting = [p.vtime for p in self._peers.values() if p.queue]
+            if waiting:
+                peer.vtime = max(peer.vtime, min(waiting))
+        peer.queue.append(job)
+
+    def _remove(self, peer: _PeerState, granted: asyncio.Future[None]) -> None:
+        for job in peer.queue:
+            if job.granted is granted:
+                peer.queue.remove(job)
+                break
+
+    def _finish(self, job: _Job) -> None:
+        if job.on_demand_slot:
+            self._running_on_demand -= 1
+        else:
+            self._running -= 1
+        self._dispatch()
+
+    @staticmethod
+    def _queued_audio(peer: _PeerState) -> float:
+        return sum(
+            j.audio_s
+            for j in peer.queue
+            if not j.on_demand and not j.granted.cancelled()
+        )
+
+    def _lane_open(self, job: _Job) -> bool:
+        if job.on_demand:
+            return self._running_on_demand < self._on_demand_concurrency
+        return self._running < self._max_concurrency
+
+    def _used(self, peer: _PeerState, window_s: float) -> float:
+        now = time.time()
+        while peer.usage and now - peer.usage[0][0] > DAY_S:
+            peer.usage.popleft()
+        return sum(s for t, s in peer.usage if now - t <= window_s)
+
+    def _minute_blocked(self, peer: _PeerState, job: _Job) -> bool:
+        if job.on_demand or self._minute_cap_s <= 0:
+            return False
+        used = self._used(peer, MINUTE_S)
+        # A single job longer than the cap still runs once the window is empty.
+        return used > 0 and used + job.audio_s > self._minute_cap_s
+
+    def _next_job(self, peer: _PeerState) -> _Job | None:
+        """First runnable job of the peer; a deferred head must not hold
+        back an on-demand job queued behind it."""
+        for job in peer.queue:
+            if job.granted.cancelled() or not self._lane_open(job):
+                continue
+            if not self._minute_blocked(peer, job):
+                return job
+            if not job.deferred:
+                job.deferred = True
+                peer.deferred += 1
+        return None
+
+    def _pick(self) -> tuple[_PeerState, _Job] | None:
+        best: tuple[_PeerState, _Job] | None = None
+        for peer in self._peers.values():
+            job = self._next_job(peer)
+            if job is None:
+                continue
+            if best is None or (best[1].background, best[0].vtime) > (
+                job.background,
+                peer.vtime,
+            ):
+                best = (peer, job)
+        return best
+
+    def _dispatch(self) -> None:
+        while True:
+            picked = self._pick()
+            if picked is None:
+                break
+            peer, job = picked
+            peer.queue.remove(job)
+            job.on_demand_slot = job.on_demand
+            if job.on_demand_slot:
+                self._running_on_demand += 1
+            else:
+                self._running += 1
+            peer.vtime += job.audio_s / peer.weight
+            peer.usage.append((time.time(), job.audio_s))
+            peer.jobs += 1
+            peer.audio_s += job.audio_s
+            job.granted.set_result(None)
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        """Re-run dispatch when the oldest minute-window charge expires."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        blocked = [
+            p
+            for p in self._peers.values()
+            if any(not j.granted.cancelled() for j in p.queue)
+        ]
+        # Only automatic jobs wait on minute windows, so a full automatic
+        # lane has nothing to wake up for.
+        if not blocked or self._running >= self._max_concurrency:
+            return
+        now = time.time()
+        delays = []
+        for peer in blocked:
+            recent = [t for t, _ in peer.usage if now - t <= MINUTE_S]
+            if recent:
+                delays.append(MINUTE_S - (now - min(recent)))
+        if delays:
+            self._wakeup = asyncio.get_running_loop().call_later(
+                max(min(delays), 0.1), self._dispatch
+            )
+
+    def stats(self) -> dict[str, object]:
+        result: dict[str, object] = {
+            "running": self._running,
+            "running_on_demand": self._running_on_demand,
+        }
+        for peer_id, peer in self._peers.items():
+            result[peer_id] = (
+                f"min {self._used(peer, MINUTE_S):.0f}s, "
+                f"day {self._used(peer, DAY_S):.0f}s, "
+                f"jobs {peer.jobs}, queued {len(peer.queue)}, "
+                f"deferred {peer.deferred}, rejected {peer.rejected}"
+            )
+        return result
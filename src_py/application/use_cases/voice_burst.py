@@ -0,0 +1,169 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from telethon import TelegramClient
+from telethon.tl import types
+
+from src_py import messages
+from src_py.application.background import spawn
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription_scheduler import (
+    BudgetExceeded,
+    TranscriptionScheduler,
+)
+from src_py.application.use_cases.transcription import (
+    reply_with_transcript,
+    transcribe_voice_message,
+)
+from src_py.domain.summarizer import Summarizer
+from src_py.domain.transcriber import Transcriber
+from src_py.telegram_utils.utils import (
+    get_peer_id,
+    get_sender_user_id,
+    mark_dialog_unread,
+    reply_to,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_S = 8.0
+# A burst this long is flushed without waiting for the sender to pause.
+MAX_BURST = 10
+
+BurstKey = tuple[str | None, str | None]
+UnreadHook = Callable[..., Awaitable[None]]
+
+
+@dataclass
+class _Burst:
+    client: TelegramClient
+    messages: list[types.Message] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class VoiceBurstCoalescer:
+    """Groups consecutive voice notes from one sender in one chat.
+
+    Each note restarts a short quiet-period timer; when it fires, the whole
+    burst is transcribed in parallel and answered with a single reply, and
+    the dialog is marked unread once instead of once per note.
+
+    ``set_unread_hook`` lets the bot take over that last step, so every
+    note of the burst is also kept unread for the deleted-message tracker.
+    """
+
+    def __init__(
+        self,
+        *,
+        transcriber: Transcriber,
+        summarizer: Summarizer | None = None,
+        transcript_cache: TranscriptCache | None = None,
+        scheduler: TranscriptionScheduler | None = None,
+        window_s: float = DEFAULT_WINDOW_S,
+    ) -> None:
+        self._transcriber = transcriber
+        self._summarizer = summarizer
+        self._transcript_cache = transcript_cache
+        self._scheduler = scheduler
+        self._window_s = window_s
+        self._bursts: dict[BurstKey, _Burst] = {}
+        self._unread_hook: UnreadHook | None = None
+        self._notes = 0
+        self._replies = 0
+
+    def set_unread_hook(self, hook: UnreadHook) -> None:
+        """``hook(*notes)`` runs after a successful reply instead of a plain
+        ``mark_dialog_unread``."""
+        self._unread_hook = hook
+
+    async def submit(self, client: TelegramClient, message: types.Message) -> None:
+        key = (get_peer_id(message), get_sender_user_id(message))
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = _Burst(client=client)
+            self._bursts[key] = burst
+        burst.messages.append(message)
+        self._notes += 1
+
+        if burst.timer is not None:
+            burst.timer.cancel()
+        if len(burst.messages) >= MAX_BURST:
+            self._start_flush(key)
+        else:
+            burst.timer = asyncio.get_running_loop().call_later(
+                self._window_s, self._start_flush, key
+            )
+
+    def _start_flush(self, key: BurstKey) -> None:
+        burst = self._bursts.pop(key, None)
+        if burst is None:
+            return
+        if burst.timer is not None:
+            burst.timer.cancel()
+        spawn(self._flush(burst), name=f"voice-burst-{key[0]}")
+
+    async def _flush(self, burst: _Burst) -> None:
+        client = burst.client
+        notes = burst.messages
+        last = notes[-1]
+        try:
+            texts = await asyncio.gather(
+                *(
+                    transcribe_voice_message(
+                        client,
+                        note,
+                        transcriber=self._transcriber,
+                        cache=self._transcript_cache,
+                        scheduler=self._scheduler,
+                    )
+                    for note in notes
+                ),
+                return_exceptions=True,
+            )
+            parts: list[str] = []
+            for note, text in zip(notes, texts):
+                if isinstance(text, BudgetExceeded):
+                    logger.info("Auto-transcription budget used up for msg %d", note.id)
+                    continue
+                if isinstance(text, BaseException):
+                    logger.error(
+                        "Burst transcription failed for msg %d", note.id, exc_info=text
+                    )
+                    text = "(ошибка транскрибации)"
+                cleaned = text.strip()
+                if cleaned:
+                    parts.append(cleaned)
+            if not parts:
+                return
+
+            if len(parts) == 1:
+                combined = parts[0]
+            else:
+                combined = "\n\n".join(
+                    f"{i}/{len(parts)}: {part}" for i, part in enumerate(parts, start=1)
+                )
+            await reply_with_transcript(
+                client, last, combined, summarizer=self._summarizer
+            )
+            self._replies += 1
+        except Exception:
+            logger.exception("Error transcribing voice burst")
+            await reply_to(client, last, messages.ERROR)
+            return
+
+        if self._unread_hook is not None:
+            await self._unread_hook(*notes)
+            return
+        try:
+            await mark_dialog_unread(client, last.peer_id)
+        except Exception:
+            logger.exception("Failed to mark dialog as unread")
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "notes": self._notes,
+            "replies": self._replies,
+            "open_bursts": len(self._bursts),
+        }
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from telethon import TelegramClient
+from telethon.tl import types
+
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription import transcribe_voice_message
+from src_py.application.use_cases.transcription_scheduler import (
+    BudgetExceeded,
+    TranscriptionScheduler,
+)
+from src_py.domain.transcriber import Transcriber
+from src_py.telegram_utils.utils import get_media_duration, get_media_key
+
+logger = logging.getLogger(__name__)
+
+BUDGET_WINDOW_S = 60 * 60
+DEFAULT_BUDGET_S = 30 * 60  # audio seconds per hour
+# Unknown durations are charged as this many seconds.
+UNKNOWN_DURATION_S = 60
+MAX_QUEUED = 50
+# Give interactive work a head start before each background job.
+START_DELAY_S = 2.0
+
+
+class VoicePrefetcher:
+    """Speculatively transcribes voice notes in watched chats, one at a time
+    and within an hourly audio budget, so a later ``.convert`` is a cache hit.
+    Nothing is posted."""
+
+    def __init__(
+        self,
+        *,
+        transcriber: Transcriber,
+        cache: TranscriptCache,
+        budget_s_per_hour: int = DEFAULT_BUDGET_S,
+        scheduler: TranscriptionScheduler | None = None,
+    ) -> None:
+        self._transcriber = transcriber
+        self._cache = cache
+        self._scheduler = scheduler
+        self._budget_s = budget_s_per_hour
+        self._spent: deque[tuple[float, float]] = deque()
+        self._queue: asyncio.Queue[tuple[TelegramClient, types.Message]] = (
+            asyncio.Queue(maxsize=MAX_QUEUED)
+        )
+        self._worker: asyncio.Task | None = None
+        self._submitted = 0
+        self._over_budget = 0
+        self._dropped = 0
+        self._failed = 0
+
+    async def submit(self, client: TelegramClient, message: types.Message) -> None:
+        key = get_media_key(message)
+        if key is None or self._cache.contains(key):
+            return
+
+        duration = get_media_duration(message) or UNKNOWN_DURATION_S
+        if self._spent_in_window() + duration > self._budget_s:
+            self._over_budget += 1
+            return
+
+        try:
+            self._queue.put_nowait((client, message))
+        except asyncio.QueueFull:
+            self._dropped += 1
+            return
+        self._spent.append((time.time(), duration))
+        self._submitted += 1
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def _spent_in_window(self) -> float:
+        cutoff = time.time() - BUDGET_WINDOW_S
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return sum(seconds for _, seconds in self._spent)
+
+    async def _run(self) -> None:
+        while not self._queue.empty():
+            client, message = self._queue.get_nowait()
+            await asyncio.sleep(START_DELAY_S)
+            try:
+                await transcribe_voice_message(
+                    client,
+                    message,
+                    transcriber=self._transcriber,
+                    cache=self._cache,
+                    scheduler=self._scheduler,
+                    prefetch=True,
+                )
+            except BudgetExceeded:
+                self._over_budget += 1
+            except Exception:
+                self._failed += 1
+                logger.exception("Voice prefetch failed for msg %d", message.id)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "submitted": self._submitted,
+            "queued": self._queue.qsize(),
+            "over_budget": self._over_budget,
+            "dropped": self._dropped,
+            "failed": self._failed,
+            "budget_used_s": round(self._spent_in_window()),
+            "budget_s": self._budget_s,
+        }
@@ -8,8 +8,34 @@ class Settings(BaseSettings):
     userbot_channel_id: str = ""
     auto_transcribe_peer_ids: str = ""
     transcribe_disabled_peer_ids: str = ""
+    transcribe_max_concurrency: int = 2
+    transcribe_peer_weights: str = ""
+    transcribe_peer_minute_cap_s: int = 0
+    transcribe_peer_day_cap_s: int = 0
+    transcribe_prefetch_peer_ids: str = ""
+    transcribe_prefetch_budget_s: int = 1800
+    transcribe_backfill_concurrency: int = 4
+    transcribe_burst_window_s: float = 8.0
     deleted_tracker_enabled: bool = True
+    deleted_tracker_store_dir: str = ""
+    deleted_tracker_memory_mb: int = 128
+    deleted_tracker_inline_max_mb: int = 8
+    deleted_tracker_media_caps_mb: str = ""
+    deleted_tracker_eager_max_kb: int = 2048
+    deleted_tracker_digest_threshold: int = 5
+    deleted_tracker_batch_window_s: float = 2.0
+    deleted_tracker_edit_quiet_s: float = 10.0
+    deleted_tracker_group_ids: str = ""
+    deleted_tracker_group_max_entries: int = 2000
+    deleted_tracker_group_max_mb: int = 16
+    deleted_tracker_prime_dialogs: int = 100
+    deleted_tracker_prime_interval_s: float = 0.5
+    media_cache_budget_mb: int = 64
+    media_download_connections: int = 4
+    telegram_transcribe_enabled: bool = False
     transcribe_summary_enabled: bool = True
+    transcribe_summary_engine: str = "auto"
+    transcribe_summary_budget_s: float = 15.0
     groq_api_key: str = ""
     ytdlp_cookies_file: str = ""
     quote_api_url: str = "http://127.0.0.1:3100/generate"
@@ -33,6 +59,30 @@ class Settings(BaseSettings):
     def get_transcribe_disabled_peer_ids(self) -> set[str]:
         return self._parse_comma_separated(self.transcribe_disabled_peer_ids)
 
+    def get_transcribe_peer_weights(self) -> dict[str, int]:
+        """``"123:3,456:1"`` -> ``{"123": 3, "456": 1}``."""
+        weights: dict[str, int] = {}
+        for item in self._parse_comma_separated(self.transcribe_peer_weights):
+            peer_id, _, weight = item.partition(":")
+            if peer_id.strip() and weight.strip().isdigit():
+                weights[peer_id.strip()] = int(weight)
+        return weights
+
+    def get_deleted_tracker_media_caps(self) -> dict[str, int]:
+        """``"document:20,videoNote:50"`` -> byte caps per media type."""
+        caps: dict[str, int] = {}
+        for item in self._parse_comma_separated(self.deleted_tracker_media_caps_mb):
+            media_type, _, mb = item.partition(":")
+            if media_type.strip() and mb.strip().isdigit():
+                caps[media_type.strip()] = int(mb) * 1024 * 1024
+        return caps
+
+    def get_deleted_tracker_group_ids(self) -> set[str]:
+        return self._parse_comma_separated(self.deleted_tracker_group_ids)
+
+    def get_transcribe_prefetch_peer_ids(self) -> set[str]:
+        return self._parse_comma_separated(self.transcribe_prefetch_peer_ids)
+
     @staticmethod
     def _parse_comma_separated(v: str) -> set[str]:
         if not v:
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Protocol, runtime_checkable
 
 
 @dataclass
@@ -16,3 +16,13 @@ class Transcriber(Protocol):
     async def transcribe_file(
         self, file_path: str, mime_type: str, options: TranscribeOptions | None = None
     ) -> str: ...
+
+
+@runtime_checkable
+class MessageTranscriber(Transcriber, Protocol):
+    """A transcriber that can work from the chat message itself, before any
+    audio is downloaded. ``None`` means "not available, use the file path"."""
+
+    async def transcribe_message(
+        self, message: object, options: TranscribeOptions | None = None
+    ) -> str | None: ...
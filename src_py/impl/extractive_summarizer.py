@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_WORD = re.compile(r"[^\W\d_]+")
+
+# Speech recognition may return text without punctuation; such text is cut
+# into pseudo-sentences of this many words.
+FALLBACK_SENTENCE_WORDS = 25
+# Crude stemming: Russian inflection mostly lives in the last 2-3 letters.
+STEM_LEN = 6
+MIN_TOKEN_LEN = 3
+CHARS_PER_BULLET = 1500
+MAX_BULLETS = 4
+MAX_BULLET_CHARS = 300
+
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+STOPWORDS = frozenset(
+    """
+    это этот эта эти того тому том там тут так как какой когда кто что чтобы
+    чем через где если или либо ещё еще уже вот вон всё все всех всем
+    весь вся она они оно его ему её ее ним них нам нас вам вас вами тебе тебя
+    меня мне мой моя мои твой твоя свой своя наш ваш себя себе был была было
+    были быть будет будут буду есть нет даже только очень тоже также потом
+    просто вообще короче типа значит ладно ну ага давай давайте может можно
+    нужно надо сейчас тогда здесь которые который которая которое после перед
+    между около более менее чуть хотя потому поэтому однако the and that this
+    with for you your are was were have has had not but what when where which
+    who will would can could should just like from they them their there then
+    than into about been being also some any all our out get got
+    """.split()
+)
+
+
+def _split_sentences(text: str) -> list[str]:
+    sentences = [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+    result: list[str] = []
+    for sentence in sentences:
+        words = sentence.split()
+        if len(words) <= FALLBACK_SENTENCE_WORDS * 2:
+            result.append(sentence)
+            continue
+        for i in range(0, len(words), FALLBACK_SENTENCE_WORDS):
+            result.append(" ".join(words[i : i + FALLBACK_SENTENCE_WORDS]))
+    return result
+
+
+def _tokens(sentence: str) -> list[str]:
+    return [
+        w[:STEM_LEN]
+        for w in _WORD.findall(sentence.lower().replace("ё", "е"))
+        if len(w) >= MIN_TOKEN_LEN and w not in STOPWORDS
+    ]
+
+
+def _tfidf_matrix(token_lists: list[list[str]]) -> np.ndarray:
+    vocab: dict[str, int] = {}
+    for tokens in token_lists:
+        for token in tokens:
+            vocab.setdefault(token, len(vocab))
+
+    counts = np.zeros((len(token_lists), len(vocab)), dtype=np.float64)
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            counts[row, vocab[token]] += 1.0
+
+    doc_freq = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + len(token_lists)) / (1.0 + doc_freq)) + 1.0
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return tfidf / norms
+
+
+def _textrank(similarity: np.ndarray) -> np.ndarray:
+    n = similarity.shape[0]
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no words with the rest link to everything equally.
+    safe_weight = np.where(out_weight > 0, out_weight, 1.0)
+    transition = np.where(out_weight > 0, similarity / safe_weight, 1.0 / n)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1.0 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def _truncate(sentence: str) -> str:
+    if len(sentence) <= MAX_BULLET_CHARS:
+        return sentence
+    cut = sentence.rfind(" ", 0, MAX_BULLET_CHARS)
+    return sentence[: cut if cut > 0 else MAX_BULLET_CHARS].rstrip(" ,;:") + "…"
+
+
+def extract_key_sentences(text: str, count: int) -> list[str]:
+    """Return the ``count`` most central sentences, in original order."""
+    sentences = _split_sentences(text)
+    if len(sentences) <= count:
+        return sentences
+
+    token_lists = [_tokens(s) for s in sentences]
+    tfidf = _tfidf_matrix(token_lists)
+    scores = _textrank(tfidf @ tfidf.T)
+    # Near-empty fragments ("Ага.", "Ну да.") are never worth a bullet.
+    scores[[len(t) < 2 for t in token_lists]] = -1.0
+
+    top = np.argsort(-scores, kind="stable")[:count]
+    return [sentences[i] for i in sorted(top)]
+
+
+class ExtractiveSummarizer:
+    """Local TextRank summary: no network, a few milliseconds of CPU."""
+
+    async def summarize(self, text: str) -> str | None:
+        try:
+            return await asyncio.to_thread(self._summarize_sync, text)
+        except Exception:
+            logger.exception("Extractive summarization failed")
+            return None
+
+    @staticmethod
+    def _summarize_sync(text: str) -> str | None:
+        bullets = max(1, min(MAX_BULLETS, len(text) // CHARS_PER_BULLET))
+        sentences = extract_key_sentences(text, bullets)
+        if not sentences:
+            return None
+        return "\n".join(f"• {_truncate(s)}" for s in sentences)
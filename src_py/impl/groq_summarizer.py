@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import re
 
 import aiohttp
 
@@ -15,40 +17,146 @@ SYSTEM_PROMPT = (
     "Не пересказывай дословно и не добавляй ничего, чего нет в тексте."
 )
 
+REDUCE_PROMPT = (
+    "Тебе дают краткие пункты по нескольким последовательным частям одной "
+    "расшифровки голосового сообщения. Объедини их в одно резюме. "
+    "Отвечай на русском. Выдай от 1 до 4 пунктов, каждый с новой строки, "
+    "каждый начинается с «• ». Убери повторы, сохрани порядок событий. "
+    "Без вступлений, без выводов, ничего не добавляй от себя."
+)
+
 REQUEST_TIMEOUT_S = 30
-MAX_INPUT_CHARS = 40_000
+# Longer transcripts are summarized part by part (map) and the partial
+# summaries merged in one more request (reduce), so latency is bounded by the
+# chunk size instead of the transcript length.
+CHUNK_CHARS = 12_000
+# Parallel requests per summarizer; keeps map bursts under Groq's rate limit.
+MAX_CONCURRENT_REQUESTS = 3
+MAX_RETRIES = 2
+DEFAULT_RETRY_AFTER_S = 2.0
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> list[str]:
+    parts: list[str] = []
+    remaining = sentence
+    while len(remaining) > max_chars:
+        split_index = remaining.rfind(" ", 0, max_chars)
+        if split_index <= 0:
+            split_index = max_chars
+        parts.append(remaining[:split_index].rstrip())
+        remaining = remaining[split_index:].lstrip()
+    if remaining:
+        parts.append(remaining)
+    return parts
+
+
+def _split_into_chunks(text: str, max_chars: int = CHUNK_CHARS) -> list[str]:
+    """Split text into chunks of at most ``max_chars``, at sentence ends."""
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        for piece in _split_long_sentence(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _retry_after(raw: str | None) -> float:
+    try:
+        return max(float(raw), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_S
 
 
 class GroqSummarizer:
-    def __init__(self, api_key: str) -> None:
+    def __init__(
+        self, api_key: str, *, max_concurrency: int = MAX_CONCURRENT_REQUESTS
+    ) -> None:
         self._api_key = api_key
+        self._semaphore = asyncio.Semaphore(max_concurrency)
 
     async def summarize(self, text: str) -> str | None:
+        chunks = _split_into_chunks(text, CHUNK_CHARS)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_S)
+
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                if len(chunks) == 1:
+                    return await self._complete(session, SYSTEM_PROMPT, text)
+
+                partials = await asyncio.gather(
+                    *(self._complete(session, SYSTEM_PROMPT, c) for c in chunks),
+                    return_exceptions=True,
+                )
+                # A failed part is treated like an empty one: the rest still
+                # make a TL;DR.
+                found: list[str] = []
+                for partial in partials:
+                    if isinstance(partial, Exception):
+                        logger.warning("Groq map part failed: %r", partial)
+                    elif partial:
+                        found.append(partial)
+                if len(found) < len(chunks):
+                    logger.warning(
+                        "Groq map step: %d of %d parts summarized",
+                        len(found),
+                        len(chunks),
+                    )
+                if not found:
+                    return None
+                if len(found) == 1:
+                    return found[0]
+
+                merged = "\n\n".join(
+                    f"Часть {i}:\n{p}" for i, p in enumerate(found, start=1)
+                )
+                return await self._complete(session, REDUCE_PROMPT, merged)
+        except Exception:
+            logger.exception("Groq summarization request failed")
+            return None
+
+    async def _complete(
+        self, session: aiohttp.ClientSession, system_prompt: str, text: str
+    ) -> str | None:
         payload = {
             "model": MODEL,
             "temperature": 0.2,
             "max_tokens": 400,
             "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": text[:MAX_INPUT_CHARS]},
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text},
             ],
         }
         headers = {"Authorization": f"Bearer {self._api_key}"}
-        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_S)
 
-        try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+        data: object = None
+        for attempt in range(MAX_RETRIES + 1):
+            delay = 0.0
+            async with self._semaphore:
                 async with session.post(
                     GROQ_CHAT_URL, headers=headers, json=payload
                 ) as resp:
-                    if resp.status != 200:
+                    if resp.status == 429 and attempt < MAX_RETRIES:
+                        delay = _retry_after(resp.headers.get("Retry-After"))
+                        logger.warning("Groq chat API rate limited; retry in %ss", delay)
+                    elif resp.status != 200:
                         body = await resp.text()
                         logger.error("Groq chat API error %s: %s", resp.status, body)
                         return None
-                    data = await resp.json()
-        except Exception:
-            logger.exception("Groq summarization request failed")
-            return None
+                    else:
+                        data = await resp.json()
+                        break
+            await asyncio.sleep(delay)
 
         try:
             content = data["choices"][0]["message"]["content"]
@@ -103,8 +103,7 @@ class GroqWhisperTranscriber:
             ) as resp:
                 if resp.status != 200:
                     body = await resp.text()
-                    logger.error("Groq API error %s: %s", resp.status, body)
-                    return "(ошибка транскрибации)"
+                    raise RuntimeError(f"Groq API error {resp.status}: {body[:500]}")
                 text = await resp.text()
                 return _strip_hallucinations(text)
 
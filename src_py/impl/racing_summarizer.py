@@ -0,0 +1,43 @@
+import asyncio
+import logging
+
+from src_py.domain.summarizer import Summarizer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUDGET_S = 15.0
+
+
+class RacingSummarizer:
+    """Use the primary summarizer when it answers within the latency budget,
+    otherwise (or when it fails) fall back to the secondary one."""
+
+    def __init__(
+        self,
+        primary: Summarizer,
+        fallback: Summarizer,
+        *,
+        latency_budget_s: float = DEFAULT_LATENCY_BUDGET_S,
+    ) -> None:
+        self._primary = primary
+        self._fallback = fallback
+        self._latency_budget_s = latency_budget_s
+
+    async def summarize(self, text: str) -> str | None:
+        try:
+            summary = await asyncio.wait_for(
+                self._primary.summarize(text), self._latency_budget_s
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Primary summarizer exceeded %ss; using fallback",
+                self._latency_budget_s,
+            )
+            summary = None
+        except Exception:
+            logger.exception("Primary summarizer failed; using fallback")
+            summary = None
+
+        if summary:
+            return summary
+        return await self._fallback.summarize(text)
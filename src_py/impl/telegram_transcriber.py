@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from telethon import TelegramClient, errors
+from telethon.tl import types
+from telethon.tl.functions.messages import TranscribeAudioRequest
+
+from src_py.domain.transcriber import TranscribeOptions, Transcriber
+
+logger = logging.getLogger(__name__)
+
+# How long to wait for UpdateTranscribedAudio after a "pending" answer.
+PENDING_TIMEOUT_S = 60
+# Without Premium, re-check occasionally in case the account was upgraded.
+PREMIUM_RECHECK_S = 6 * 60 * 60
+# Finished transcriptions that arrived before anyone waited for them.
+EARLY_RESULTS_LIMIT = 64
+
+
+class TelegramTranscriber:
+    """Server-side transcription via ``messages.TranscribeAudio``.
+
+    Voice notes and video notes are transcribed by Telegram itself (Premium,
+    or the free trial quota), so nothing is downloaded or sent to Groq.
+    Whenever Telegram cannot help, ``transcribe_message`` returns ``None``
+    and the file-based methods go to the fallback engine.
+    """
+
+    def __init__(
+        self,
+        client: TelegramClient,
+        fallback: Transcriber,
+        *,
+        pending_timeout_s: float = PENDING_TIMEOUT_S,
+    ) -> None:
+        self._client = client
+        self._fallback = fallback
+        self._pending_timeout_s = pending_timeout_s
+        self._waiters: dict[int, asyncio.Future[str]] = {}
+        self._early_results: OrderedDict[int, str] = OrderedDict()
+        self._unavailable_until = 0.0
+
+    def start(self) -> None:
+        self._client.add_event_handler(self._on_raw_update)
+
+    async def transcribe_ogg_file(
+        self, file_path: str, options: TranscribeOptions | None = None
+    ) -> str:
+        return await self._fallback.transcribe_ogg_file(file_path, options)
+
+    async def transcribe_file(
+        self, file_path: str, mime_type: str, options: TranscribeOptions | None = None
+    ) -> str:
+        return await self._fallback.transcribe_file(file_path, mime_type, options)
+
+    async def transcribe_message(
+        self, message: object, options: TranscribeOptions | None = None
+    ) -> str | None:
+        if not isinstance(message, types.Message):
+            return None
+        if time.time() < self._unavailable_until:
+            return None
+
+        try:
+            result = await self._client(
+                TranscribeAudioRequest(peer=message.peer_id, msg_id=message.id)
+            )
+        except errors.FloodWaitError as e:
+            self._pause(e.seconds, "flood wait")
+            return None
+        except (
+            errors.PremiumAccountRequiredError,
+            errors.PremiumCurrentlyUnavailableError,
+        ):
+            self._pause(PREMIUM_RECHECK_S, "no Premium / trial")
+            return None
+        except errors.RPCError as e:
+            logger.warning("Telegram transcription failed: %s", e)
+            return None
+
+        self._note_quota(result)
+        if not result.pending:
+            return result.text
+        return await self._wait_for_completion(result.transcription_id)
+
+    def _pause(self, seconds: float, reason: str) -> None:
+        self._unavailable_until = time.time() + seconds
+        logger.info(
+            "Telegram transcription paused for %ds (%s); using fallback",
+            seconds,
+            reason,
+        )
+
+    def _note_quota(self, result: object) -> None:
+        remains = getattr(result, "trial_remains_num", None)
+        if remains is None:
+            return
+        logger.info("Telegram transcription trial: %d left", remains)
+        if remains > 0:
+            return
+        until = getattr(result, "trial_remains_until_date", None)
+        if until is not None:
+            self._pause(max(until.timestamp() - time.time(), 0), "trial used up")
+        else:
+            self._pause(PREMIUM_RECHECK_S, "trial used up")
+
+    async def _wait_for_completion(self, transcription_id: int) -> str | None:
+        early = self._early_results.pop(transcription_id, None)
+        if early is not None:
+            return early
+
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._waiters[transcription_id] = future
+        try:
+            return await asyncio.wait_for(future, self._pending_timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Telegram transcription %d still pending after %ss",
+                transcription_id,
+                self._pending_timeout_s,
+            )
+            return None
+        finally:
+            self._waiters.pop(transcription_id, None)
+
+    async def _on_raw_update(self, update: object) -> None:
+        if not isinstance(update, types.UpdateTranscribedAudio) or update.pending:
+            return
+        future = self._waiters.get(update.transcription_id)
+        if future is not None:
+            if not future.done():
+                future.set_result(update.text)
+            return
+        self._early_results[update.transcription_id] = update.text
+        while len(self._early_results) > EARLY_RESULTS_LIMIT:
+            self._early_results.popitem(last=False)
@@ -1,3 +1,7 @@
-NOT_VOICE_REPLY = "Ответьте командой .convert на голосовое сообщение."
+NOT_VOICE_REPLY = "Ответьте командой .convert на голосовое, аудио или видео."
 ERROR = "Произошла ошибка при обработке запроса."
+MEDIA_TOO_LARGE = (
+    "Файл слишком большой: звук из такого видео можно извлечь, только скачав "
+    "его целиком, а лимит — {limit_mb} МБ."
+)
 USERBOT_MARK = "dmi4er4-bot"
@@ -0,0 +1,32 @@
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+MetricsProvider = Callable[[], dict[str, object]]
+
+_providers: dict[str, MetricsProvider] = {}
+
+
+def register(name: str, provider: MetricsProvider) -> None:
+    """Expose a subsystem's counters under ``name`` (shown by ``.stats``)."""
+    _providers[name] = provider
+
+
+def snapshot() -> dict[str, dict[str, object]]:
+    result: dict[str, dict[str, object]] = {}
+    for name, provider in _providers.items():
+        try:
+            result[name] = provider()
+        except Exception:
+            logger.exception("Metrics provider %s failed", name)
+    return result
+
+
+def format_snapshot() -> str:
+    sections = []
+    for name, values in snapshot().items():
+        lines = [f"[{name}]"]
+        lines.extend(f"{key}: {value}" for key, value in values.items())
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections) or "Нет метрик."
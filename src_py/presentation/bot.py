@@ -2,14 +2,26 @@ import logging
 
 from telethon import TelegramClient, events
 from telethon.tl import types
-from telethon.tl.functions.messages import (
-    MarkDialogUnreadRequest,
-    UpdatePinnedMessageRequest,
-)
+from telethon.tl.functions.messages import UpdatePinnedMessageRequest
 from telethon.tl.types import InputMessagesFilterPinned
 
+from src_py import metrics
 from src_py.presentation.handlers import Handler
-from src_py.telegram_utils.deleted_message_tracker import DeletedMessageTracker
+from src_py.telegram_utils.deleted_message_tracker import (
+    EDIT_QUIET_S,
+    GROUP_MAX_BYTES,
+    GROUP_MAX_ENTRIES,
+    PRIME_DIALOGS,
+    PRIME_INTERVAL_S,
+    DeletedMessageTracker,
+)
+from src_py.telegram_utils.tracker_batch import (
+    DEFAULT_DIGEST_THRESHOLD,
+    DEFAULT_WINDOW_S,
+)
+from src_py.telegram_utils.tracker_media import TrackerMediaBudget
+from src_py.telegram_utils.tracker_store import TrackerStore
+from src_py.telegram_utils.utils import mark_dialog_unread
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +31,8 @@ logger = logging.getLogger(__name__)
 HELP_TEXT = """**📋 Userbot — команды и возможности**
 
 **Команды** (отправляй в любой чат):
-`.convert` — транскрибация голосового/видеокружка (ответом на сообщение)
+`.convert` — транскрибация голосового, видеокружка, аудио или видео (ответом на сообщение)
+`.convert N` / `.convert all-unread` — расшифровать последние N / непрослушанные голосовые чата одним сообщением
 `.save [#тег]` — сохранить сообщение в канал юзербота (по умолчанию #save)
 `.id` — получить ID пользователя (ответом) или чата
 `.sticker` — конвертировать стикер в фото (ответом на стикер)
@@ -31,11 +44,13 @@ HELP_TEXT = """**📋 Userbot — команды и возможности**
 `.ym <ссылка>` — скачать трек из Яндекс Музыки в MP3
 `.dl <url>` — скачать видео (YouTube/TikTok/X/…), `.dl -a <url>` — только MP3
 `.q [N]` — цитата-стикер из сообщения (ответом), N — сколько сообщений подряд
+`.stats` — метрики кэшей и фоновых задач
 
 **Автоматические функции:**
 • Транскрибация голосовых в личных сообщениях
 • TL;DR для длинных расшифровок (от 600 символов)
 • Транскрибация в выбранных группах (AUTO\\_TRANSCRIBE\\_PEER\\_IDS)
+• Фоновая предрасшифровка для мгновенного .convert (TRANSCRIBE\\_PREFETCH\\_PEER\\_IDS)
 • Сохранение исчезающих медиа (#disappearing)
 • Трекинг удалённых/отредактированных сообщений (#deleted / #edited)"""
 
@@ -48,11 +63,31 @@ class TgUserbot:
         *,
         deleted_tracker_enabled: bool = True,
         channel_id: object,
+        tracker_store: TrackerStore | None = None,
+        tracker_media_budget: TrackerMediaBudget | None = None,
+        tracker_digest_threshold: int = DEFAULT_DIGEST_THRESHOLD,
+        tracker_batch_window_s: float = DEFAULT_WINDOW_S,
+        tracker_edit_quiet_s: float = EDIT_QUIET_S,
+        tracker_group_ids: set[str] | None = None,
+        tracker_group_max_entries: int = GROUP_MAX_ENTRIES,
+        tracker_group_max_bytes: int = GROUP_MAX_BYTES,
+        tracker_prime_dialogs: int = PRIME_DIALOGS,
+        tracker_prime_interval_s: float = PRIME_INTERVAL_S,
     ) -> None:
         self._client = client
         self._handlers = handlers
         self._deleted_tracker_enabled = deleted_tracker_enabled
         self._channel_id = channel_id
+        self._tracker_store = tracker_store
+        self._tracker_media_budget = tracker_media_budget
+        self._tracker_digest_threshold = tracker_digest_threshold
+        self._tracker_batch_window_s = tracker_batch_window_s
+        self._tracker_edit_quiet_s = tracker_edit_quiet_s
+        self._tracker_group_ids = tracker_group_ids
+        self._tracker_group_max_entries = tracker_group_max_entries
+        self._tracker_group_max_bytes = tracker_group_max_bytes
+        self._tracker_prime_dialogs = tracker_prime_dialogs
+        self._tracker_prime_interval_s = tracker_prime_interval_s
         self._self_user_id: str | None = None
         self._deleted_tracker: DeletedMessageTracker | None = None
 
@@ -63,14 +98,31 @@ class TgUserbot:
 
         if self._deleted_tracker_enabled and isinstance(me, types.User):
             self._deleted_tracker = DeletedMessageTracker(
-                self._client, str(me.id), self._channel_id
+                self._client,
+                str(me.id),
+                self._channel_id,
+                store=self._tracker_store,
+                media_budget=self._tracker_media_budget,
+                digest_threshold=self._tracker_digest_threshold,
+                batch_window_s=self._tracker_batch_window_s,
+                edit_quiet_s=self._tracker_edit_quiet_s,
+                group_ids=self._tracker_group_ids,
+                group_max_entries=self._tracker_group_max_entries,
+                group_max_bytes=self._tracker_group_max_bytes,
+                prime_dialogs=self._tracker_prime_dialogs,
+                prime_interval_s=self._tracker_prime_interval_s,
             )
             self._deleted_tracker.start()
+            metrics.register("deleted_tracker", self._deleted_tracker.stats)
 
         await self._pin_help_message()
 
         self._client.add_event_handler(self._on_new_message, events.NewMessage)
 
+    async def stop(self) -> None:
+        if self._deleted_tracker:
+            await self._deleted_tracker.close()
+
     async def _pin_help_message(self) -> None:
         if self._channel_id == "me":
             return
@@ -151,23 +203,21 @@ class TgUserbot:
                     logger.info("[handler:%s] started", h.name)
                     await h.handle(self._client, message)
                     if h.preserve_unread:
-                        await self._preserve_dialog_unread(message)
+                        await self.preserve_dialog_unread(message)
                     logger.info("[handler:%s] finished", h.name)
                     break
             except Exception:
                 logger.exception("[handler:%s] errored", h.name)
 
-    async def _preserve_dialog_unread(self, message: types.Message) -> None:
+    async def preserve_dialog_unread(self, *messages: types.Message) -> None:
+        """Mark the messages' dialog unread once and keep each of them
+        logically unread for the tracker."""
         try:
-            await self._client(
-                MarkDialogUnreadRequest(
-                    peer=message.peer_id,
-                    unread=True,
-                )
-            )
+            await mark_dialog_unread(self._client, messages[-1].peer_id)
         except Exception:
             logger.exception("Failed to mark dialog as unread")
             return
 
         if self._deleted_tracker:
-            self._deleted_tracker.preserve_unread(message)
+            for message in messages:
+                self._deleted_tracker.preserve_unread(message)
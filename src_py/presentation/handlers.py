@@ -15,11 +15,18 @@ from src_py.application.use_cases.command_id import command_id
 from src_py.application.use_cases.command_n import command_n
 from src_py.application.use_cases.command_save import command_save
 from src_py.application.use_cases.command_screenshot import command_screenshot
+from src_py.application.use_cases.command_stats import command_stats
 from src_py.application.use_cases.command_sticker import command_sticker_to_photo
 from src_py.application.use_cases.command_transcribe import command_transcribe_voice
 from src_py.application.use_cases.command_wiki import command_wiki
-from src_py.application.use_cases.disappearing_media import forward_disappearing_media, is_disappearing_media
+from src_py.application.use_cases.disappearing_media import is_disappearing_media
 from src_py.application.use_cases.private_transcribe import private_transcribe_voice
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+from src_py.application.use_cases.transcription_scheduler import (
+    TranscriptionScheduler,
+)
+from src_py.application.use_cases.voice_burst import VoiceBurstCoalescer
+from src_py.application.use_cases.voice_prefetch import VoicePrefetcher
 from src_py.domain.summarizer import Summarizer
 from src_py.domain.transcriber import Transcriber
 from src_py.telegram_utils.utils import get_peer_id, is_private_peer, is_video_note, is_voice_message
@@ -56,22 +63,48 @@ def create_handlers(
     summarizer: Summarizer | None = None,
     ytdlp_cookies_file: str = "",
     quote_api_url: str = DEFAULT_QUOTE_API_URL,
+    transcript_cache: TranscriptCache | None = None,
+    voice_prefetcher: VoicePrefetcher | None = None,
+    prefetch_peer_ids: set[str] | None = None,
+    backfill_concurrency: int = 4,
+    voice_burst: VoiceBurstCoalescer | None = None,
+    transcription_scheduler: TranscriptionScheduler | None = None,
 ) -> list[Handler]:
-    handlers = [
+    # With a coalescer, group voice notes are answered per burst (it marks
+    # the dialog unread itself, after the combined reply).
+    group_auto_ids = auto_transcribe_peer_ids if voice_burst is None else set()
+    handlers: list[Handler] = [
+        # DisappearingMediaCapture saves TTL media from the update stream;
+        # claiming it here keeps it away from transcription and prefetch.
         Handler(
-            name="Disappearing media auto-save",
+            name="Disappearing media (captured from updates)",
             is_triggered=lambda _c, msg, _s: _disappearing_trigger(msg),
-            handle=lambda c, msg: forward_disappearing_media(
-                c, msg, channel_id=channel_id
-            ),
+            handle=_skip_message,
         ),
+    ]
+    if voice_burst is not None:
+        handlers.append(
+            Handler(
+                name="Group auto voice/videonote burst",
+                is_triggered=lambda _c, msg, _s: _group_burst_trigger(
+                    msg, auto_transcribe_peer_ids, transcribe_disabled_peer_ids
+                ),
+                handle=voice_burst.submit,
+            )
+        )
+    handlers += [
         Handler(
             name="Private auto voice/videonote",
             is_triggered=lambda _c, msg, _s: _auto_voice_trigger(
-                msg, auto_transcribe_peer_ids, transcribe_disabled_peer_ids
+                msg, group_auto_ids, transcribe_disabled_peer_ids
             ),
             handle=lambda c, msg: private_transcribe_voice(
-                c, msg, transcriber=transcriber, summarizer=summarizer
+                c,
+                msg,
+                transcriber=transcriber,
+                summarizer=summarizer,
+                transcript_cache=transcript_cache,
+                scheduler=transcription_scheduler,
             ),
             preserve_unread=True,
         ),
@@ -79,9 +112,20 @@ def create_handlers(
             name="Command .convert",
             is_triggered=lambda _c, msg, s: _self_command_trigger(msg, s, ".convert"),
             handle=lambda c, msg: command_transcribe_voice(
-                c, msg, transcriber=transcriber, summarizer=summarizer
+                c,
+                msg,
+                transcriber=transcriber,
+                summarizer=summarizer,
+                transcript_cache=transcript_cache,
+                scheduler=transcription_scheduler,
+                backfill_concurrency=backfill_concurrency,
             ),
         ),
+        Handler(
+            name="Command .stats",
+            is_triggered=lambda _c, msg, s: _self_command_trigger(msg, s, ".stats"),
+            handle=lambda c, msg: command_stats(c, msg),
+        ),
         Handler(
             name="Command .q",
             is_triggered=lambda _c, msg, s: _self_command_trigger(msg, s, ".q"),
@@ -131,6 +175,17 @@ def create_handlers(
         ),
     ]
 
+    if voice_prefetcher is not None and prefetch_peer_ids:
+        handlers.append(
+            Handler(
+                name="Voice prefetch",
+                is_triggered=lambda _c, msg, s: _prefetch_trigger(
+                    msg, s, prefetch_peer_ids
+                ),
+                handle=voice_prefetcher.submit,
+            )
+        )
+
     if eliza_bot_username is not None:
         handlers.append(
             Handler(
@@ -166,6 +221,8 @@ def create_handlers(
                     channel_id=channel_id,
                     dead_hand=dead_hand,
                     transcriber=transcriber,
+                    transcript_cache=transcript_cache,
+                    scheduler=transcription_scheduler,
                 ),
             )
         )
@@ -187,6 +244,10 @@ async def _disappearing_trigger(message: types.Message) -> bool:
     return is_disappearing_media(message)
 
 
+async def _skip_message(_client: TelegramClient, _message: types.Message) -> None:
+    return None
+
+
 async def _auto_voice_trigger(
     message: types.Message,
     auto_ids: set[str],
@@ -200,6 +261,29 @@ async def _auto_voice_trigger(
     return is_private_peer(message.peer_id) or (bool(peer_id) and peer_id in auto_ids)
 
 
+async def _group_burst_trigger(
+    message: types.Message,
+    auto_ids: set[str],
+    disabled_ids: set[str],
+) -> bool:
+    if is_private_peer(message.peer_id):
+        return False
+    return await _auto_voice_trigger(message, auto_ids, disabled_ids)
+
+
+async def _prefetch_trigger(
+    message: types.Message,
+    self_user_id: str | None,
+    prefetch_ids: set[str],
+) -> bool:
+    if not is_voice_message(message) and not is_video_note(message):
+        return False
+    if _is_sender_self(message, self_user_id):
+        return False
+    peer_id = get_peer_id(message)
+    return bool(peer_id) and peer_id in prefetch_ids
+
+
 async def _self_command_trigger(
     message: types.Message, self_user_id: str | None, prefix: str
 ) -> bool:
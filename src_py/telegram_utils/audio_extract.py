@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+from typing import AsyncIterator
+
+from telethon import TelegramClient
+from telethon.tl import types
+
+from src_py.telegram_utils.utils import get_peer_label
+from src_py.telegram_utils.voice import VOICES_DIR, _ensure_voices_dir
+
+logger = logging.getLogger(__name__)
+
+# Mono 16 kHz Opus is all speech recognition needs; an hour is ~10 MB.
+FFMPEG_OUTPUT_ARGS = [
+    "-vn",
+    "-sn",
+    "-dn",
+    "-ac",
+    "1",
+    "-ar",
+    "16000",
+    "-c:a",
+    "libopus",
+    "-b:a",
+    "24k",
+    "-f",
+    "ogg",
+]
+# MP4s with the index at the end have to be spooled whole before ffmpeg
+# can read them; anything larger is refused rather than filling the disk.
+MAX_SPOOL_BYTES = 512 * 1024 * 1024
+# Top-level MP4 boxes that may precede the index without being media data.
+_MP4_PREAMBLE_BOXES = {b"ftyp", b"free", b"skip", b"wide", b"uuid", b"pdin"}
+
+
+class SpoolLimitError(RuntimeError):
+    """The file would have to be spooled to disk and is over the cap."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(
+            f"MP4 with the index at the end is over the {limit >> 20} MB spool cap"
+        )
+        self.limit = limit
+
+
+def _mp4_index_at_end(head: bytes) -> bool:
+    """True when an MP4/MOV stream puts ``mdat`` before ``moov``.
+
+    Such files cannot be demuxed from a pipe: the index describing where the
+    audio samples are is only known once the whole file has been read.
+    """
+    offset = 0
+    while offset + 8 <= len(head):
+        size, box = struct.unpack(">I4s", head[offset : offset + 8])
+        if box == b"moov":
+            return False
+        if box == b"mdat":
+            return True
+        if box not in _MP4_PREAMBLE_BOXES:
+            return False
+        if size == 1 and offset + 16 <= len(head):
+            size = struct.unpack(">Q", head[offset + 8 : offset + 16])[0]
+        if size < 8:
+            return False
+        offset += size
+    return False
+
+
+def _document_size(message: types.Message) -> int:
+    media = message.media
+    if isinstance(media, types.MessageMediaDocument) and isinstance(
+        media.document, types.Document
+    ):
+        return media.document.size or 0
+    return 0
+
+
+async def _remaining(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Telethon's download iterator restarts when re-entered with ``async for``,
+    # so the rest of an already started download is pulled by hand.
+    while True:
+        try:
+            yield await chunks.__anext__()
+        except StopAsyncIteration:
+            return
+
+
+def _build_audio_path(message: types.Message) -> str:
+    peer = get_peer_label(message)
+    return os.path.join(
+        VOICES_DIR, f"audio-{peer}-{message.id}-{int(time.time() * 1000)}.ogg"
+    )
+
+
+async def _run_ffmpeg(source: str, dest: str) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        source,
+        *FFMPEG_OUTPUT_ARGS,
+        dest,
+        stdin=asyncio.subprocess.PIPE if source == "pipe:0" else None,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+
+async def _finish_ffmpeg(
+    proc: asyncio.subprocess.Process, stderr_task: asyncio.Task
+) -> None:
+    returncode = await proc.wait()
+    stderr = await stderr_task
+    if returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg exited with {returncode}: {stderr.decode(errors='replace')[-500:]}"
+        )
+
+
+async def extract_audio_track(
+    client: TelegramClient,
+    message: types.Message,
+    *,
+    max_spool_bytes: int = MAX_SPOOL_BYTES,
+) -> str:
+    """Download only as much as needed and return a path to an Ogg/Opus file
+    with the message's audio track.
+
+    The document is streamed chunk by chunk into ffmpeg's stdin, which drops
+    every non-audio stream, so neither the full file nor the decoded video
+    is ever held in memory or written to disk. MP4s with the index at the
+    end cannot be demuxed from a pipe and are spooled to a temporary file of
+    at most ``max_spool_bytes``; larger ones raise ``SpoolLimitError``.
+    """
+    await _ensure_voices_dir()
+    dest = _build_audio_path(message)
+    download = client.iter_download(message.media).__aiter__()
+    try:
+        head = bytes(await download.__anext__())
+    except StopAsyncIteration:
+        raise RuntimeError("media has no content") from None
+    chunks = _remaining(download)
+
+    if _mp4_index_at_end(head):
+        if _document_size(message) > max_spool_bytes:
+            raise SpoolLimitError(max_spool_bytes)
+        await _extract_via_file(chunks, head, dest, max_spool_bytes)
+        return dest
+
+    proc = await _run_ffmpeg("pipe:0", dest)
+    stderr_task = asyncio.ensure_future(proc.stderr.read())
+    try:
+        proc.stdin.write(head)
+        await proc.stdin.drain()
+        async for chunk in chunks:
+            proc.stdin.write(chunk)
+            await proc.stdin.drain()
+        proc.stdin.close()
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg stopped reading (e.g. it found no audio); its exit code says why.
+        pass
+    except BaseException:
+        proc.kill()
+        await proc.wait()
+        raise
+    await _finish_ffmpeg(proc, stderr_task)
+    return dest
+
+
+async def _extract_via_file(
+    chunks: AsyncIterator[bytes], head: bytes, dest: str, max_bytes: int
+) -> None:
+    spool = f"{dest}.part"
+    try:
+        with open(spool, "wb") as f:
+            await asyncio.to_thread(f.write, head)
+            written = len(head)
+            async for chunk in chunks:
+                # The declared size can be missing; the cap holds regardless.
+                written += len(chunk)
+                if written > max_bytes:
+                    raise SpoolLimitError(max_bytes)
+                await asyncio.to_thread(f.write, chunk)
+        proc = await _run_ffmpeg(spool, dest)
+        await _finish_ffmpeg(proc, asyncio.ensure_future(proc.stderr.read()))
+    finally:
+        try:
+            os.remove(spool)
+        except OSError:
+            logger.warning("Could not remove spool file %s", spool)
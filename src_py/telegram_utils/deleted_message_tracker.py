@@ -3,20 +3,73 @@ import difflib
 import io
 import logging
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 
-from telethon import TelegramClient
-from telethon.tl import types
+from telethon import TelegramClient, errors
+from telethon.tl import functions, types
+from telethon.tl.custom import Dialog
 
 from src_py.telegram_utils.media_description import format_media_message
+from src_py.telegram_utils.media_fetch import media_fetcher
 from src_py.telegram_utils.sender_name import get_sender_display_name
+from src_py.telegram_utils.tracker_batch import (
+    ALBUM_MAX,
+    DEFAULT_DIGEST_THRESHOLD,
+    DEFAULT_WINDOW_S,
+    ForwardBatcher,
+    PendingForward,
+    album_caption,
+    album_kind,
+    digest_line,
+    split_digest,
+)
+from src_py.telegram_utils.tracker_entries import (
+    CachedMedia,
+    CachedMessage,
+    MediaReference,
+    MediaType,
+    peer_to_string,
+)
+from src_py.telegram_utils.tracker_expiry import ExpiryIndex
+from src_py.telegram_utils.tracker_media import TrackerMediaBudget
+from src_py.telegram_utils.tracker_store import TrackerStore
 from src_py.telegram_utils.utils import get_peer_label
 
 logger = logging.getLogger(__name__)
 
 CACHE_TTL_S = 24 * 60 * 60  # 24 hours
+# Store eviction still runs on this cadence; in-memory entries expire on
+# their own deadlines.
 EVICT_INTERVAL_S = 60 * 60  # 1 hour
+# The archive set follows folder updates; this often its size is checked
+# against the server's, and only a mismatch triggers a full rescan.
+ARCHIVE_CHECK_INTERVAL_S = 15 * 60
+ARCHIVE_FOLDER_ID = 1
+# Cold start: read state and the unread tail of this many recent dialogs are
+# loaded in the background, one history request per dialog at most every
+# PRIME_INTERVAL_S so startup traffic stays well under flood limits.
+PRIME_DIALOGS = 100
+PRIME_INTERVAL_S = 0.5
+PRIME_TAIL_MAX = 50
+# GetPeerDialogs accepts up to this many peers per call.
+PRIME_PEER_BATCH = 100
+# Expired entries dropped per slice before yielding to the event loop.
+EVICT_SLICE = 256
+# Longest sleep between expiry checks when nothing is due sooner.
+EVICT_MAX_SLEEP_S = 60.0
 MIN_EDIT_CHAR_THRESHOLD = 3
+# Edits of one message are merged until it has been left alone this long.
+EDIT_QUIET_S = 10.0
+# Per-chat limits for opted-in groups, so one busy group cannot crowd out
+# private chats.
+GROUP_MAX_ENTRIES = 2000
+GROUP_MAX_BYTES = 16 * 1024 * 1024
+# Quota charge for media kept only as a file reference: its metadata.
+DEFERRED_MEDIA_COST = 256
+_UPLOAD_NAMES = {"voiceNote": "voice.ogg", "videoNote": "video_note.mp4"}
+DELETED_TITLE = "\U0001f5d1 Удалённое сообщение"
+EDITED_TITLE = "\u270f\ufe0f Изменённое сообщение"
 
 MIME_TO_EXT: dict[str, str] = {
     "image/jpeg": "jpg",
@@ -28,44 +81,110 @@ MIME_TO_EXT: dict[str, str] = {
     "application/pdf": "pdf",
 }
 
-MediaType = str  # "photo" | "voiceNote" | "videoNote" | "document"
 
-
-@dataclass
-class CachedMedia:
-    data: bytes
-    media_type: MediaType
-    mime_type: str
-    file_name: str
-
-
-@dataclass
-class CachedMessage:
-    message_id: int
-    text: str | None
-    date: object
-    cached_at: float
-    sender_id: str | None
-    sender_name: str
-    peer: types.TypePeer
-    chat_label: str
-    media_description: str | None
-    media: CachedMedia | None
-    channel_id: str | None
+def _common_prefix_len(a: str, b: str) -> int:
+    # Binary search over slice comparisons: the compares run in C, so this
+    # beats a per-character loop on anything longer than a few words.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
 
 
-def _count_changed_chars(old_text: str | None, new_text: str | None) -> int:
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid :] == b[len(b) - mid :]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _count_changed_chars(
+    old_text: str | None,
+    new_text: str | None,
+    limit: int = MIN_EDIT_CHAR_THRESHOLD,
+) -> int:
+    """Edit distance between the texts, capped at ``limit``.
+
+    The common prefix and suffix are skipped first, then only the band of
+    the DP table within ``limit - 1`` of the diagonal is filled (Ukkonen),
+    stopping as soon as a whole row reaches ``limit``: O(n * limit) instead
+    of matching the full texts.
+    """
     old = old_text or ""
     new = new_text or ""
     if old == new:
         return 0
-    sm = difflib.SequenceMatcher(None, old, new)
-    changed = 0
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
-        if tag == "equal":
-            continue
-        changed += max(i2 - i1, j2 - j1)
-    return changed
+    prefix = _common_prefix_len(old, new)
+    suffix = _common_suffix_len(old, new, min(len(old), len(new)) - prefix)
+    a = old[prefix : len(old) - suffix]
+    b = new[prefix : len(new) - suffix]
+    n, m = len(a), len(b)
+    if abs(n - m) >= limit:
+        return limit
+    if not n or not m:
+        return max(n, m)
+
+    band = limit - 1
+    prev = [limit] * (m + 1)
+    prev[: min(m, band) + 1] = range(min(m, band) + 1)
+    cur = [limit] * (m + 1)
+    for i in range(1, n + 1):
+        lo = max(1, i - band)
+        hi = min(m, i + band)
+        cur[lo - 1] = min(i, limit) if lo == 1 else limit
+        char = a[i - 1]
+        row_min = cur[lo - 1]
+        for j in range(lo, hi + 1):
+            value = prev[j - 1] + (char != b[j - 1])
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if cur[j - 1] + 1 < value:
+                value = cur[j - 1] + 1
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min >= limit:
+            return limit
+        if hi < m:
+            # The next row's band reaches one cell further right.
+            cur[hi + 1] = limit
+        prev, cur = cur, prev
+    return min(prev[m], limit)
+
+
+def _edit_summary(
+    old: str | None, new: str | None, media_changed: bool = False
+) -> str:
+    lines = []
+    if media_changed:
+        lines.append("Медиа изменено.")
+    if old and new:
+        diff_lines = list(
+            difflib.unified_diff(
+                old.splitlines(keepends=True),
+                new.splitlines(keepends=True),
+                lineterm="",
+            )
+        )
+        # skip --- / +++ headers
+        diff_body = [l for l in diff_lines if not l.startswith(("---", "+++"))]
+        if diff_body:
+            lines.append("\n".join(diff_body))
+        else:
+            lines.append("(текст не изменён)")
+    elif old:
+        lines.append(f"Было:\n{old}")
+    elif new:
+        lines.append(f"Стало:\n{new}")
+    return "\n".join(lines)
 
 
 def _mime_to_ext(mime: str) -> str:
@@ -74,7 +193,7 @@ def _mime_to_ext(mime: str) -> str:
     return mime.split("/")[-1] or "bin"
 
 
-def _detect_media_type(
+def detect_media_type(
     message: types.Message,
 ) -> tuple[MediaType, str, str] | None:
     media = message.media
@@ -109,11 +228,100 @@ def _detect_media_type(
     return None
 
 
+def _largest_photo_size(photo: types.Photo) -> tuple[str, int] | None:
+    best: tuple[str, int] | None = None
+    for size in photo.sizes or []:
+        if isinstance(size, types.PhotoSize):
+            byte_size = size.size
+        elif isinstance(size, types.PhotoSizeProgressive):
+            byte_size = max(size.sizes or [0])
+        else:
+            continue
+        if best is None or byte_size > best[1]:
+            best = (size.type, byte_size)
+    return best
+
+
+def _media_size(message: types.Message) -> int:
+    media = message.media
+    if isinstance(media, types.MessageMediaDocument) and isinstance(
+        media.document, types.Document
+    ):
+        return media.document.size or 0
+    if isinstance(media, types.MessageMediaPhoto) and isinstance(
+        media.photo, types.Photo
+    ):
+        largest = _largest_photo_size(media.photo)
+        return largest[1] if largest else 0
+    return 0
+
+
+def _media_reference(message: types.Message) -> MediaReference | None:
+    media = message.media
+    if isinstance(media, types.MessageMediaDocument) and isinstance(
+        media.document, types.Document
+    ):
+        doc = media.document
+        return MediaReference(
+            location=types.InputDocumentFileLocation(
+                id=doc.id,
+                access_hash=doc.access_hash,
+                file_reference=doc.file_reference,
+                thumb_size="",
+            ),
+            dc_id=doc.dc_id,
+            size=doc.size or 0,
+        )
+    if isinstance(media, types.MessageMediaPhoto) and isinstance(
+        media.photo, types.Photo
+    ):
+        photo = media.photo
+        largest = _largest_photo_size(photo)
+        if largest is None:
+            return None
+        return MediaReference(
+            location=types.InputPhotoFileLocation(
+                id=photo.id,
+                access_hash=photo.access_hash,
+                file_reference=photo.file_reference,
+                thumb_size=largest[0],
+            ),
+            dc_id=photo.dc_id,
+            size=largest[1],
+        )
+    return None
+
+
+@dataclass(slots=True)
+class _EditDraft:
+    """A message being edited: its version from before the first edit."""
+
+    text: str | None
+    media: CachedMedia | None
+    timer: asyncio.TimerHandle
+
+
 class DeletedMessageTracker:
     def __init__(
-        self, client: TelegramClient, self_user_id: str, channel_id: int
+        self,
+        client: TelegramClient,
+        self_user_id: str,
+        channel_id: int,
+        *,
+        store: TrackerStore | None = None,
+        media_budget: TrackerMediaBudget | None = None,
+        digest_threshold: int = DEFAULT_DIGEST_THRESHOLD,
+        batch_window_s: float = DEFAULT_WINDOW_S,
+        edit_quiet_s: float = EDIT_QUIET_S,
+        group_ids: set[str] | None = None,
+        group_max_entries: int = GROUP_MAX_ENTRIES,
+        group_max_bytes: int = GROUP_MAX_BYTES,
+        prime_dialogs: int = PRIME_DIALOGS,
+        prime_interval_s: float = PRIME_INTERVAL_S,
     ) -> None:
         self._client = client
+        self._store = store
+        self._media_budget = media_budget or TrackerMediaBudget()
         self._self_user_id = self_user_id
         self._channel_id = channel_id
         self._cache: dict[str, CachedMessage] = {}
@@ -122,16 +330,89 @@ class DeletedMessageTracker:
         # read-history max_id backwards. Keep the auto-transcribed message as a
         # local unread override until the dialog's unread mark is cleared.
         self._preserved_unread: dict[str, set[int]] = {}
+        # Deadlines for cache entries, read marks and unread overrides; a
+        # read mark outlives every entry it was needed for (see
+        # ``_handle_read_inbox``).
+        self._entry_expiry = ExpiryIndex()
+        self._read_expiry = ExpiryIndex()
+        self._preserved_expiry = ExpiryIndex()
+        self._expired = 0
         self._evict_task: asyncio.Task | None = None
+        self._load_task: asyncio.Task | None = None
         self._refresh_task: asyncio.Task | None = None
+        self._prime_task: asyncio.Task | None = None
+        self._prime_dialogs = prime_dialogs
+        self._prime_interval_s = prime_interval_s
+        self._primed_read_marks = 0
+        self._primed_dialogs = 0
+        self._primed_messages = 0
+        self._prime_s: float | None = None
         self._archived_peer_ids: set[str] = set()
+        self._archive_updates = 0
+        self._archive_drifts = 0
+        self._archive_rescans = 0
+        self._captured_eager = 0
+        self._captured_deferred = 0
+        self._eager_used = 0
+        self._deferred_recovered = 0
+        self._deferred_missed = 0
+        self._references_refreshed = 0
+        self._digest_threshold = digest_threshold
+        self._batcher = ForwardBatcher(self._forward_batch, window_s=batch_window_s)
+        self._live_forwards = 0
+        self._digests = 0
+        self._albums = 0
+        self._edit_quiet_s = edit_quiet_s
+        self._edit_drafts: dict[str, _EditDraft] = {}
+        self._edits_seen = 0
+        self._edits_settled = 0
+        self._group_ids = group_ids or set()
+        self._group_max_entries = group_max_entries
+        self._group_max_bytes = group_max_bytes
+        # Group chats only: entry key -> approximate bytes, oldest first.
+        self._chat_usage: dict[str, OrderedDict[str, int]] = {}
+        self._chat_bytes: dict[str, int] = {}
+        self._quota_evictions = 0
 
     def start(self) -> None:
         self._client.add_event_handler(self._on_raw_update)
         self._evict_task = asyncio.create_task(self._evict_loop())
         self._refresh_task = asyncio.create_task(self._initial_refresh())
+        if self._store is not None:
+            self._load_task = asyncio.create_task(self._load_from_store())
+        if self._prime_dialogs > 0:
+            self._prime_task = asyncio.create_task(self._prime())
         logger.info("[DeletedMessageTracker] started")
 
+    async def _load_from_store(self) -> None:
+        assert self._store is not None
+        try:
+            entries, read_state = await self._store.open()
+        except Exception:
+            logger.exception("[DeletedMessageTracker] could not open the store")
+            self._store = None
+            return
+        # Messages cached while the store was loading are newer; keep them.
+        for key, cached in entries.items():
+            if key not in self._cache:
+                self._cache[key] = cached
+                self._entry_expiry.schedule(key, cached.cached_at + CACHE_TTL_S)
+                self._charge_quota(key, cached)
+        read_deadline = time.time() + CACHE_TTL_S
+        for peer_str, max_id in read_state.items():
+            if peer_str not in self._read_up_to:
+                self._read_up_to[peer_str] = max_id
+                self._read_expiry.schedule(peer_str, read_deadline)
+        logger.info(
+            "[DeletedMessageTracker] restored %d entries from disk", len(entries)
+        )
+
+    async def close(self) -> None:
+        self.stop()
+        await self.flush_forwards()
+        if self._store is not None:
+            await self._store.close()
+
     def stop(self) -> None:
         if self._evict_task:
             self._evict_task.cancel()
@@ -139,6 +420,105 @@ class DeletedMessageTracker:
         if self._refresh_task:
             self._refresh_task.cancel()
             self._refresh_task = None
+        if self._prime_task:
+            self._prime_task.cancel()
+            self._prime_task = None
+
+    async def _prime(self) -> None:
+        """Rebuild read state and the unread tail after a restart.
+
+        Without it every message counts as unread and nothing received
+        before the restart can be reported when it is deleted.
+        """
+        started = time.monotonic()
+        try:
+            if self._load_task is not None:
+                await asyncio.gather(self._load_task, return_exceptions=True)
+            dialogs = await self._prime_recent_dialogs()
+            await self._prime_read_state(dialogs)
+            for dialog in dialogs:
+                await self._prime_unread_tail(dialog)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[DeletedMessageTracker] cold-start priming failed")
+            return
+        self._prime_s = time.monotonic() - started
+        logger.info(
+            "[DeletedMessageTracker] primed %d dialogs, %d messages in %.1fs",
+            self._primed_dialogs,
+            self._primed_messages,
+            self._prime_s,
+        )
+
+    async def _prime_recent_dialogs(self) -> list[Dialog]:
+        """Recent tracked dialogs; their first page already carries read state."""
+        dialogs: list[Dialog] = []
+        async for dialog in self._client.iter_dialogs(
+            limit=self._prime_dialogs, folder=0
+        ):
+            peer = dialog.dialog.peer
+            if not self._is_tracked_peer(peer) or self._should_skip_peer(peer):
+                continue
+            peer_str = self._peer_to_string(peer)
+            if peer_str:
+                self._prime_read_mark(peer_str, dialog.dialog.read_inbox_max_id)
+            dialogs.append(dialog)
+        return dialogs
+
+    async def _prime_read_state(self, dialogs: list[Dialog]) -> None:
+        """Fetch read marks for restored entries outside the recent page."""
+        listed = {self._peer_to_string(d.dialog.peer) for d in dialogs}
+        peers = {
+            cached.peer_key: cached.peer
+            for cached in list(self._cache.values())
+            if cached.peer_key and cached.peer_key not in listed
+        }
+        input_peers = []
+        for peer in peers.values():
+            try:
+                input_peers.append(
+                    types.InputDialogPeer(
+                        peer=await self._client.get_input_entity(peer)
+                    )
+                )
+            except (ValueError, TypeError):
+                continue
+        for start in range(0, len(input_peers), PRIME_PEER_BATCH):
+            result = await self._client(
+                functions.messages.GetPeerDialogsRequest(
+                    peers=input_peers[start : start + PRIME_PEER_BATCH]
+                )
+            )
+            for dialog in result.dialogs:
+                peer_str = self._peer_to_string(dialog.peer)
+                if peer_str:
+                    self._prime_read_mark(peer_str, dialog.read_inbox_max_id)
+
+    def _prime_read_mark(self, peer_str: str, max_id: int) -> None:
+        # Live read updates may have arrived meanwhile; marks only advance.
+        if max_id > self._read_up_to.get(peer_str, 0):
+            self._set_read_mark(peer_str, max_id)
+            self._primed_read_marks += 1
+
+    async def _prime_unread_tail(self, dialog: Dialog) -> None:
+        limit = min(dialog.unread_count, PRIME_TAIL_MAX)
+        if limit <= 0:
+            return
+        messages = await self._client.get_messages(
+            dialog.input_entity,
+            limit=limit,
+            min_id=dialog.dialog.read_inbox_max_id,
+        )
+        self._primed_dialogs += 1
+        for message in reversed(messages):
+            if not isinstance(message, types.Message) or message.out:
+                continue
+            if self._message_key(message) in self._cache:
+                continue
+            await self.cache_message(message)
+            self._primed_messages += 1
+        await asyncio.sleep(self._prime_interval_s)
 
     async def _initial_refresh(self) -> None:
         try:
@@ -148,13 +528,54 @@ class DeletedMessageTracker:
 
     async def _refresh_archived_peers(self) -> None:
         ids: set[str] = set()
-        async for dialog in self._client.iter_dialogs(folder=1):
-            entity = dialog.entity
-            if isinstance(entity, (types.Channel, types.Chat, types.User)):
-                ids.add(str(entity.id))
+        async for dialog in self._client.iter_dialogs(folder=ARCHIVE_FOLDER_ID):
+            peer_id = self._get_raw_peer_id(dialog.dialog.peer)
+            if peer_id is not None:
+                ids.add(peer_id)
         self._archived_peer_ids = ids
+        self._archive_rescans += 1
         logger.info("[DeletedMessageTracker] refreshed archived peers: %d", len(ids))
 
+    def _handle_folder_peers(self, update: types.UpdateFolderPeers) -> None:
+        for folder_peer in update.folder_peers:
+            peer_id = self._get_raw_peer_id(folder_peer.peer)
+            if peer_id is None:
+                continue
+            if folder_peer.folder_id == ARCHIVE_FOLDER_ID:
+                self._archived_peer_ids.add(peer_id)
+            else:
+                self._archived_peer_ids.discard(peer_id)
+            self._archive_updates += 1
+
+    async def _check_archived_peers(self) -> None:
+        """Rescan the archive only when its size no longer matches ours.
+
+        One dialog is enough to get the folder's total count, so the
+        common case costs a single small request.
+        """
+        result = await self._client(
+            functions.messages.GetDialogsRequest(
+                offset_date=None,
+                offset_id=0,
+                offset_peer=types.InputPeerEmpty(),
+                limit=1,
+                hash=0,
+                folder_id=ARCHIVE_FOLDER_ID,
+            )
+        )
+        count = getattr(result, "count", None)
+        if count is None:
+            count = len(result.dialogs)
+        if count == len(self._archived_peer_ids):
+            return
+        logger.info(
+            "[DeletedMessageTracker] archive drift: server %d, tracked %d",
+            count,
+            len(self._archived_peer_ids),
+        )
+        self._archive_drifts += 1
+        await self._refresh_archived_peers()
+
     def _should_skip_peer(self, peer: types.TypePeer) -> bool:
         peer_id_str = self._get_raw_peer_id(peer)
         return peer_id_str is not None and peer_id_str in self._archived_peer_ids
@@ -169,8 +590,25 @@ class DeletedMessageTracker:
             return str(peer.channel_id)
         return None
 
+    def _is_tracked_peer(self, peer: types.TypePeer) -> bool:
+        """Private chats always; groups and channels only when opted in."""
+        if isinstance(peer, types.PeerUser):
+            return True
+        return self._get_raw_peer_id(peer) in self._group_ids
+
+    def _message_key(self, message: types.Message) -> str | None:
+        if not self._is_tracked_peer(message.peer_id):
+            return None
+        channel_id = (
+            str(message.peer_id.channel_id)
+            if isinstance(message.peer_id, types.PeerChannel)
+            else None
+        )
+        return self._make_cache_key(message.id, channel_id)
+
     async def cache_message(self, message: types.Message) -> None:
-        if not isinstance(message.peer_id, types.PeerUser):
+        key = self._message_key(message)
+        if key is None:
             return
 
         if (
@@ -199,12 +637,12 @@ class DeletedMessageTracker:
             else None
         )
 
-        key = self._make_cache_key(message.id, channel_id)
+        now = time.time()
         self._cache[key] = CachedMessage(
             message_id=message.id,
             text=message.message,
             date=message.date,
-            cached_at=time.time(),
+            cached_at=now,
             sender_id=sender_id,
             sender_name=sender_name,
             peer=message.peer_id,
@@ -213,21 +651,87 @@ class DeletedMessageTracker:
             media=cached_media,
             channel_id=channel_id,
         )
+        self._entry_expiry.schedule(key, now + CACHE_TTL_S)
+        if cached_media is not None:
+            await self._media_budget.add(key, cached_media)
+        self._charge_quota(key, self._cache[key])
+        if self._store is not None:
+            self._store.put(key, self._cache[key])
+
+    def _charge_quota(self, key: str, cached: CachedMessage) -> None:
+        """Account a group entry against its chat's quota, evicting the
+        chat's oldest entries when it is over."""
+        chat = cached.peer_key
+        if chat is None or isinstance(cached.peer, types.PeerUser):
+            return
+        usage = self._chat_usage.setdefault(chat, OrderedDict())
+        size = self._entry_size(key, cached)
+        self._chat_bytes[chat] = (
+            self._chat_bytes.get(chat, 0) - usage.get(key, 0) + size
+        )
+        usage[key] = size
+        usage.move_to_end(key)
+        while len(usage) > 1 and (
+            len(usage) > self._group_max_entries
+            or self._chat_bytes[chat] > self._group_max_bytes
+        ):
+            old_key = next(iter(usage))
+            old = self._cache.get(old_key)
+            if old is None:
+                self._chat_bytes[chat] -= usage.pop(old_key)
+                continue
+            self._quota_evictions += 1
+            self._drop_entry(old_key, old)
+
+    def _entry_size(self, key: str, cached: CachedMessage) -> int:
+        # Downloaded media counts whether it sits in memory or was spilled;
+        # a deferred file costs no more than its reference.
+        size = len(cached.text or "")
+        if cached.media is not None:
+            size += self._media_budget.stored_size(key) or DEFERRED_MEDIA_COST
+        return size
+
+    def _release_quota(self, key: str, cached: CachedMessage) -> None:
+        chat = cached.peer_key
+        usage = self._chat_usage.get(chat) if chat else None
+        if usage is None or key not in usage:
+            return
+        self._chat_bytes[chat] -= usage.pop(key)
+        if not usage:
+            del self._chat_usage[chat]
+            del self._chat_bytes[chat]
 
     async def _on_raw_update(self, update: object) -> None:
         if isinstance(update, types.UpdateReadHistoryInbox):
             self._handle_read_inbox(update)
+        elif isinstance(update, types.UpdateReadChannelInbox):
+            self._set_read_mark(f"channel:{update.channel_id}", update.max_id)
         elif isinstance(update, types.UpdateDialogUnreadMark):
             self._handle_dialog_unread_mark(update)
-        elif isinstance(update, types.UpdateDeleteMessages):
+        elif isinstance(update, types.UpdateFolderPeers):
+            self._handle_folder_peers(update)
+        elif isinstance(
+            update, (types.UpdateDeleteMessages, types.UpdateDeleteChannelMessages)
+        ):
             await self._handle_delete_messages(update)
-        elif isinstance(update, types.UpdateEditMessage):
+        elif isinstance(
+            update, (types.UpdateEditMessage, types.UpdateEditChannelMessage)
+        ):
             await self._handle_edit_message(update)
 
     def _handle_read_inbox(self, update: types.UpdateReadHistoryInbox) -> None:
         peer_str = self._peer_to_string(update.peer)
         if peer_str:
-            self._read_up_to[peer_str] = update.max_id
+            self._set_read_mark(peer_str, update.max_id)
+
+    def _set_read_mark(self, peer_str: str, max_id: int) -> None:
+        self._read_up_to[peer_str] = max_id
+        # Entries older than this mark were cached before it and expire
+        # first; newer ones are unread until the next mark extends it. An
+        # edit that extends an entry extends the mark with it.
+        self._read_expiry.schedule(peer_str, time.time() + CACHE_TTL_S)
+        if self._store is not None:
+            self._store.put_read_state(peer_str, max_id)
 
     def _handle_dialog_unread_mark(
         self, update: types.UpdateDialogUnreadMark
@@ -236,7 +740,8 @@ class DeletedMessageTracker:
             return
         peer_str = self._peer_to_string(update.peer.peer)
         if peer_str:
-            self._preserved_unread.pop(peer_str, None)
+            for message_id in self._preserved_unread.pop(peer_str, ()):
+                self._preserved_expiry.discard((peer_str, message_id))
 
     def preserve_unread(self, message: types.Message) -> None:
         """Keep an auto-processed message logically unread for this tracker."""
@@ -244,63 +749,137 @@ class DeletedMessageTracker:
         if not peer_str:
             return
         self._preserved_unread.setdefault(peer_str, set()).add(message.id)
+        self._preserved_expiry.schedule(
+            (peer_str, message.id), time.time() + CACHE_TTL_S
+        )
 
     async def _handle_delete_messages(
-        self, update: types.UpdateDeleteMessages
+        self, update: types.UpdateDeleteMessages | types.UpdateDeleteChannelMessages
     ) -> None:
+        # Plain deletes carry no chat: message ids are unique per account
+        # outside channels and supergroups.
+        channel_id = (
+            str(update.channel_id)
+            if isinstance(update, types.UpdateDeleteChannelMessages)
+            else None
+        )
         for msg_id in update.messages:
-            key = self._make_cache_key(msg_id, None)
+            key = self._make_cache_key(msg_id, channel_id)
             cached = self._cache.get(key)
             if not cached:
                 continue
+            # An edit still in its quiet period goes out ahead of the deletion.
+            self._settle_edit(key)
             if self._should_skip_peer(cached.peer):
-                self._cache.pop(key, None)
-                self._forget_preserved_unread(cached)
+                self._drop_entry(key, cached)
                 continue
-            if self._is_unread(cached):
-                try:
-                    await self._send_to_saved("\U0001f5d1 Удалённое сообщение", cached)
-                except Exception:
-                    logger.exception("[DeletedMessageTracker] forward error")
-            self._cache.pop(key, None)
-            self._forget_preserved_unread(cached)
+            if not self._is_unread(cached):
+                self._drop_entry(key, cached)
+                continue
+            chat = cached.peer_key or key
+            pending = self._batcher.pending(chat)
+            if not any(p.key == key and p.kind == "deleted" for p in pending):
+                # Dropped once forwarded: the media must outlive the window.
+                self._batcher.add(chat, PendingForward("deleted", key, cached))
 
     async def _handle_edit_message(
-        self, update: types.UpdateEditMessage
+        self, update: types.UpdateEditMessage | types.UpdateEditChannelMessage
     ) -> None:
         msg = update.message
         if not isinstance(msg, types.Message):
             return
-        if not isinstance(msg.peer_id, types.PeerUser):
+        key = self._message_key(msg)
+        if key is None:
             return
-        key = self._make_cache_key(msg.id, None)
         cached = self._cache.get(key)
-        if not cached or not self._is_unread(cached):
+        if not cached or (key not in self._edit_drafts and not self._is_unread(cached)):
             return
 
         new_text = msg.message
         new_media = await self._extract_cached_media(msg)
-        media_changed = self._is_media_changed(cached.media, new_media)
-        text_changed = cached.text != new_text
-        if text_changed and not media_changed:
-            if _count_changed_chars(cached.text, new_text) < MIN_EDIT_CHAR_THRESHOLD:
-                text_changed = False
-        if text_changed or media_changed:
-            try:
-                await self._send_edited_to_saved(cached, new_text, media_changed)
-            except Exception:
-                logger.exception("[DeletedMessageTracker] edit forward error")
+        # The diff is posted once the message has been quiet for a while,
+        # from the version cached before the first edit to the latest one.
+        self._edits_seen += 1
+        draft = self._edit_drafts.get(key)
+        timer = asyncio.get_running_loop().call_later(
+            self._edit_quiet_s, self._settle_edit, key
+        )
+        if draft is None:
+            self._edit_drafts[key] = _EditDraft(cached.text, cached.media, timer)
+        else:
+            draft.timer.cancel()
+            draft.timer = timer
 
         cached.text = new_text
         cached.media = new_media
         cached.media_description = format_media_message(msg)
         cached.cached_at = time.time()
+        self._entry_expiry.schedule(key, cached.cached_at + CACHE_TTL_S)
+        self._keep_read_mark_until(cached, cached.cached_at + CACHE_TTL_S)
+        if self._store is not None:
+            # The store evicts on ``cached_at`` too; queue the bumped row
+            # before awaiting so an eviction pass cannot see the stale one.
+            self._store.put(key, cached)
+        if new_media is not None:
+            await self._media_budget.add(key, new_media)
+        else:
+            self._media_budget.release(key)
+        self._charge_quota(key, cached)
 
-    def _is_unread(self, cached: CachedMessage) -> bool:
+    def _settle_edit(self, key: str) -> None:
+        """Queue one diff for all edits of ``key`` since it was last quiet."""
+        draft = self._edit_drafts.pop(key, None)
+        cached = self._cache.get(key)
+        if draft is None or cached is None:
+            return
+        draft.timer.cancel()
+        self._edits_settled += 1
+        media_changed = self._is_media_changed(draft.media, cached.media)
+        text_changed = draft.text != cached.text
+        if text_changed and not media_changed:
+            if _count_changed_chars(draft.text, cached.text) < MIN_EDIT_CHAR_THRESHOLD:
+                text_changed = False
+        if not (text_changed or media_changed):
+            return
+        self._batcher.add(
+            cached.peer_key or key,
+            PendingForward(
+                "edited",
+                key,
+                cached,
+                old_text=draft.text,
+                new_text=cached.text,
+                media_changed=media_changed,
+            ),
+        )
+
+    def _drop_entry(self, key: str, cached: CachedMessage) -> None:
+        draft = self._edit_drafts.pop(key, None)
+        if draft is not None:
+            draft.timer.cancel()
+        self._cache.pop(key, None)
+        self._release_quota(key, cached)
+        self._entry_expiry.discard(key)
+        self._media_budget.release(key)
+        self._forget_preserved_unread(cached)
+        if self._store is not None:
+            self._store.delete(key)
+
+    @staticmethod
+    def _read_key(cached: CachedMessage) -> str | None:
         if cached.channel_id:
-            peer_str = f"channel:{cached.channel_id}"
-        else:
-            peer_str = self._peer_to_string(cached.peer)
+            return f"channel:{cached.channel_id}"
+        return cached.peer_key
+
+    def _keep_read_mark_until(self, cached: CachedMessage, deadline: float) -> None:
+        """Without its read mark a read entry would count as unread."""
+        peer_str = self._read_key(cached)
+        current = self._read_expiry.deadline(peer_str) if peer_str else None
+        if current is not None and current < deadline:
+            self._read_expiry.schedule(peer_str, deadline)
+
+    def _is_unread(self, cached: CachedMessage) -> bool:
+        peer_str = self._read_key(cached)
         if not peer_str:
             return True
         if cached.message_id in self._preserved_unread.get(peer_str, set()):
@@ -311,13 +890,14 @@ class DeletedMessageTracker:
         return cached.message_id > max_read
 
     def _forget_preserved_unread(self, cached: CachedMessage) -> None:
-        peer_str = self._peer_to_string(cached.peer)
+        peer_str = cached.peer_key
         if not peer_str:
             return
         message_ids = self._preserved_unread.get(peer_str)
         if not message_ids:
             return
         message_ids.discard(cached.message_id)
+        self._preserved_expiry.discard((peer_str, cached.message_id))
         if not message_ids:
             self._preserved_unread.pop(peer_str, None)
 
@@ -356,15 +936,26 @@ class DeletedMessageTracker:
     ) -> None:
         header = self._build_header(title, cached, tag)
 
+        sent = False
         if cached.media:
             caption = f"{header}\n\n{cached.text}" if cached.text else header
-            await self._send_media(cached.media, caption)
-        else:
+            sent = await self._send_uploaded_copy(cached.media, caption)
+            if not sent:
+                data = await self._resolve_media(cached)
+                if data is not None:
+                    message = await self._send_media(cached.media, caption, data)
+                    self._media_budget.remember_upload(
+                        cached.media, getattr(message, "media", None)
+                    )
+                    sent = True
+        if not sent:
             lines = [header]
             if cached.text:
                 lines.extend(["", cached.text])
             if cached.media_description:
                 lines.append(cached.media_description)
+            if cached.media:
+                lines.append("(медиа уже недоступно)")
             if not cached.text and not cached.media_description:
                 lines.append("(пустое сообщение)")
             await self._client.send_message(self._channel_id, "\n".join(lines))
@@ -376,87 +967,260 @@ class DeletedMessageTracker:
             cached.sender_name,
         )
 
-    async def _send_edited_to_saved(
-        self, cached: CachedMessage, new_text: str | None, media_changed: bool = False
-    ) -> None:
-        header = self._build_header("\u270f\ufe0f Изменённое сообщение", cached, "edited")
-        lines = [header, ""]
-        if media_changed:
-            lines.append("Медиа изменено.")
-
-        old = cached.text
-        new = new_text
-        if old and new:
-            diff_lines = list(
-                difflib.unified_diff(
-                    old.splitlines(keepends=True),
-                    new.splitlines(keepends=True),
-                    lineterm="",
-                )
-            )
-            # skip --- / +++ headers
-            diff_body = [l for l in diff_lines if not l.startswith(("---", "+++"))]
-            if diff_body:
-                lines.append("\n".join(diff_body))
-            else:
-                lines.append("(текст не изменён)")
-        elif old:
-            lines.append(f"Было:\n{old}")
-        elif new:
-            lines.append(f"Стало:\n{new}")
-
-        await self._client.send_message(self._channel_id, "\n".join(lines))
+    async def _send_edited_to_saved(self, item: PendingForward) -> None:
+        cached = item.cached
+        header = self._build_header(EDITED_TITLE, cached, "edited")
+        summary = _edit_summary(item.old_text, item.new_text, item.media_changed)
+        await self._client.send_message(self._channel_id, f"{header}\n\n{summary}")
         logger.info(
             "[DeletedMessageTracker] forwarded edit of msg %d from %s",
             cached.message_id,
             cached.sender_name,
         )
 
+    async def flush_forwards(self) -> None:
+        """Forward everything still waiting for its quiet period or batch
+        window."""
+        for key in list(self._edit_drafts):
+            self._settle_edit(key)
+        await self._batcher.flush_all()
+
+    async def _forward_batch(self, items: list[PendingForward]) -> None:
+        try:
+            if len(items) < self._digest_threshold:
+                for item in items:
+                    await self._forward_live(item)
+            else:
+                await self._forward_digest(items)
+        finally:
+            for item in items:
+                if item.kind == "deleted":
+                    self._drop_entry(item.key, item.cached)
+
+    async def _forward_live(self, item: PendingForward) -> None:
+        self._live_forwards += 1
+        try:
+            if item.kind == "deleted":
+                await self._send_to_saved(DELETED_TITLE, item.cached)
+            else:
+                await self._send_edited_to_saved(item)
+        except Exception:
+            logger.exception("[DeletedMessageTracker] forward error")
+
+    async def _forward_digest(self, items: list[PendingForward]) -> None:
+        """One text digest for the whole burst, then its media as albums."""
+        deleted = sum(1 for item in items if item.kind == "deleted")
+        first = items[0].cached
+        header = (
+            f"\U0001f5c2 Удалено: {deleted}, изменено: {len(items) - deleted} #digest\n"
+            f"Чат: {first.chat_label}"
+        )
+        lines = [
+            digest_line(
+                item,
+                _edit_summary(item.old_text, item.new_text, item.media_changed)
+                if item.kind == "edited"
+                else None,
+            )
+            for item in items
+        ]
+        for chunk in split_digest(header, lines):
+            await self._client.send_message(self._channel_id, chunk)
+        self._digests += 1
+
+        groups: dict[str, list[PendingForward]] = {}
+        for item in items:
+            media = item.cached.media
+            if item.kind != "deleted" or media is None:
+                continue
+            kind = album_kind(media)
+            if kind is None:
+                await self._forward_live(item)
+                continue
+            group = groups.setdefault(kind, [])
+            group.append(item)
+            if len(group) == ALBUM_MAX:
+                await self._send_album(kind, group)
+                groups[kind] = []
+        for kind, group in groups.items():
+            if group:
+                await self._send_album(kind, group)
+
+    async def _send_album(self, kind: str, items: list[PendingForward]) -> None:
+        files: list[object] = []
+        sent_items: list[PendingForward] = []
+        for item in items:
+            media = item.cached.media
+            assert media is not None
+            uploaded = self._media_budget.uploaded(media)
+            if uploaded is not None:
+                files.append(uploaded)
+            else:
+                data = await self._resolve_media(item.cached)
+                if data is None:
+                    continue
+                files.append(self._make_named_file(data, media.file_name))
+            sent_items.append(item)
+        if not files:
+            return
+        captions = [album_caption(item) for item in sent_items]
+        try:
+            messages = await self._client.send_file(
+                self._channel_id,
+                files,
+                caption=captions,
+                force_document=kind == "file",
+            )
+        except Exception:
+            logger.warning(
+                "[DeletedMessageTracker] album failed; sending one by one",
+                exc_info=True,
+            )
+            for item in sent_items:
+                await self._forward_live(item)
+            return
+        self._albums += 1
+        for item, message in zip(sent_items, messages or []):
+            self._media_budget.remember_upload(
+                item.cached.media, getattr(message, "media", None)
+            )
+
     def _make_named_file(self, data: bytes, name: str) -> io.BytesIO:
         buf = io.BytesIO(data)
         buf.name = name
         return buf
 
-    async def _send_media(self, media: CachedMedia, caption: str) -> None:
-        dest = self._channel_id
-        if media.media_type == "photo":
-            f = self._make_named_file(media.data, media.file_name)
-            await self._client.send_file(
-                dest, f, caption=caption, force_document=False
+    async def _resolve_media(self, cached: CachedMessage) -> bytes | None:
+        """The cached bytes, or a download from the stored reference for
+        media that was not worth fetching up front."""
+        media = cached.media
+        assert media is not None
+        if not media.is_deferred:
+            self._eager_used += 1
+            return await asyncio.to_thread(media.read)
+        reference = media.reference
+        if reference is None:
+            return None
+        try:
+            try:
+                data = await self._download_reference(reference)
+            except errors.FileReferenceExpiredError:
+                if not await self._refresh_reference(cached, reference):
+                    raise
+                self._references_refreshed += 1
+                data = await self._download_reference(reference)
+        except Exception:
+            self._deferred_missed += 1
+            logger.warning(
+                "[DeletedMessageTracker] media of msg %d is no longer served",
+                cached.message_id,
+                exc_info=True,
             )
-        elif media.media_type == "voiceNote":
-            f = self._make_named_file(media.data, "voice.ogg")
-            await self._client.send_file(
-                dest, f, caption=caption, voice_note=True
+            return None
+        self._deferred_recovered += 1
+        return data
+
+    async def _download_reference(self, reference: MediaReference) -> bytes:
+        data = await self._client.download_file(
+            reference.location, bytes, dc_id=reference.dc_id
+        )
+        if not data:
+            raise IOError("empty download")
+        return data
+
+    async def _refresh_reference(
+        self, cached: CachedMessage, reference: MediaReference
+    ) -> bool:
+        """Re-read the message for a fresh file reference; only works while
+        the message itself still exists (edits)."""
+        try:
+            message = await self._client.get_messages(cached.peer, ids=cached.message_id)
+        except Exception:
+            return False
+        fresh = _media_reference(message) if isinstance(message, types.Message) else None
+        if fresh is None or fresh.media_id != reference.media_id:
+            return False
+        reference.location = fresh.location
+        return True
+
+    async def _send_uploaded_copy(self, media: CachedMedia, caption: str) -> bool:
+        """Re-send an earlier channel copy of the same file; no upload and,
+        for deferred media, no download."""
+        uploaded = self._media_budget.uploaded(media)
+        if uploaded is None:
+            return False
+        try:
+            await self._send_media(media, caption, uploaded)
+        except Exception:
+            # The copy's file reference expired or the copy was deleted.
+            logger.debug("[DeletedMessageTracker] stale channel copy", exc_info=True)
+            self._media_budget.forget_upload(media)
+            return False
+        return True
+
+    async def _send_media(
+        self,
+        media: CachedMedia,
+        caption: str,
+        file: bytes | types.TypeMessageMedia,
+    ) -> types.Message:
+        dest = self._channel_id
+        if isinstance(file, bytes):
+            name = _UPLOAD_NAMES.get(media.media_type, media.file_name)
+            file = self._make_named_file(file, name)
+        if media.media_type == "voiceNote":
+            return await self._client.send_file(
+                dest, file, caption=caption, voice_note=True
             )
-        elif media.media_type == "videoNote":
+        if media.media_type == "videoNote":
             await self._client.send_message(dest, caption)
-            f = self._make_named_file(media.data, "video_note.mp4")
-            await self._client.send_file(dest, f, video_note=True)
-        else:
-            f = self._make_named_file(media.data, media.file_name)
-            await self._client.send_file(
-                dest,
-                f,
-                caption=caption,
-                force_document=False,
-            )
+            return await self._client.send_file(dest, file, video_note=True)
+        return await self._client.send_file(
+            dest, file, caption=caption, force_document=False
+        )
 
     async def _extract_cached_media(self, message: types.Message) -> CachedMedia | None:
-        media_info = _detect_media_type(message)
+        media_info = detect_media_type(message)
         if not media_info:
             return None
+        if getattr(message.media, "ttl_seconds", None):
+            # Self-destructing media is saved by its own capture lane; a
+            # second download here would only compete with it for the TTL.
+            return None
+        m_type, m_mime, m_fname = media_info
+        size = _media_size(message)
+        if not self._media_budget.admits(m_type, size):
+            return None
+
+        reference = _media_reference(message)
+        # Media already in the pool gets the shared bytes in ``add``.
+        pooled = reference is not None and self._media_budget.has_media(
+            reference.media_id
+        )
+        if reference is not None and (
+            pooled or not self._media_budget.prefers_eager(m_type, size)
+        ):
+            if not pooled:
+                self._captured_deferred += 1
+            return CachedMedia(
+                data=None,
+                media_type=m_type,
+                mime_type=m_mime,
+                file_name=m_fname,
+                reference=reference,
+            )
 
         try:
-            data = await self._client.download_media(message, file=bytes)
-            if not isinstance(data, bytes):
+            data = await media_fetcher.fetch_bytes(self._client, message)
+            if data is None:
                 return None
-            m_type, m_mime, m_fname = media_info
+            self._captured_eager += 1
             return CachedMedia(
                 data=data,
                 media_type=m_type,
                 mime_type=m_mime,
                 file_name=m_fname,
+                reference=reference,
             )
         except Exception:
             logger.exception("[DeletedMessageTracker] media download error")
@@ -468,12 +1232,48 @@ class DeletedMessageTracker:
             return False
         if old is None or new is None:
             return True
-        return (
+        if (
             old.media_type != new.media_type
             or old.mime_type != new.mime_type
             or old.file_name != new.file_name
-            or old.data != new.data
-        )
+        ):
+            return True
+        if old.reference is not None and new.reference is not None:
+            return old.reference.media_id != new.reference.media_id
+        return old.digest() != new.digest()
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "entries": len(self._cache),
+            "captured_eager": self._captured_eager,
+            "captured_deferred": self._captured_deferred,
+            "eager_used": self._eager_used,
+            "deferred_recovered": self._deferred_recovered,
+            "deferred_missed": self._deferred_missed,
+            "references_refreshed": self._references_refreshed,
+            "expired": self._expired,
+            "read_marks": len(self._read_up_to),
+            "unread_overrides": len(self._preserved_expiry),
+            "batched_pending": len(self._batcher),
+            "live_forwards": self._live_forwards,
+            "digests": self._digests,
+            "albums": self._albums,
+            "edits_seen": self._edits_seen,
+            "edits_settled": self._edits_settled,
+            "group_chats": len(self._chat_usage),
+            "group_entries": sum(len(u) for u in self._chat_usage.values()),
+            "quota_evictions": self._quota_evictions,
+            "archived_peers": len(self._archived_peer_ids),
+            "archive_updates": self._archive_updates,
+            "archive_drifts": self._archive_drifts,
+            "archive_rescans": self._archive_rescans,
+            "primed_read_marks": self._primed_read_marks,
+            "primed_dialogs": self._primed_dialogs,
+            "primed_messages": self._primed_messages,
+            "prime_s": (
+                round(self._prime_s, 1) if self._prime_s is not None else None
+            ),
+        }
 
     def _make_cache_key(self, message_id: int, channel_id: str | None) -> str:
         if channel_id:
@@ -481,29 +1281,65 @@ class DeletedMessageTracker:
         return f"msg:{message_id}"
 
     def _peer_to_string(self, peer: types.TypePeer) -> str | None:
-        if isinstance(peer, types.PeerUser):
-            return f"user:{peer.user_id}"
-        if isinstance(peer, types.PeerChat):
-            return f"chat:{peer.chat_id}"
-        if isinstance(peer, types.PeerChannel):
-            return f"channel:{peer.channel_id}"
-        return None
+        return peer_to_string(peer)
 
     async def _evict_loop(self) -> None:
+        next_maintenance = time.monotonic() + EVICT_INTERVAL_S
+        next_archive_check = time.monotonic() + ARCHIVE_CHECK_INTERVAL_S
         while True:
-            await asyncio.sleep(EVICT_INTERVAL_S)
-            now = time.time()
-            expired = [k for k, v in self._cache.items() if now - v.cached_at > CACHE_TTL_S]
-            for k in expired:
-                cached = self._cache.pop(k)
-                self._forget_preserved_unread(cached)
-            if expired:
-                logger.info(
-                    "[DeletedMessageTracker] evicted %d expired entries, %d remaining",
-                    len(expired),
-                    len(self._cache),
-                )
-            try:
-                await self._refresh_archived_peers()
-            except Exception:
-                logger.exception("[DeletedMessageTracker] archive refresh failed")
+            await asyncio.sleep(self._evict_delay())
+            while self._evict_expired(time.time()) == EVICT_SLICE:
+                await asyncio.sleep(0)
+            if time.monotonic() >= next_archive_check:
+                next_archive_check = time.monotonic() + ARCHIVE_CHECK_INTERVAL_S
+                try:
+                    await self._check_archived_peers()
+                except Exception:
+                    logger.exception("[DeletedMessageTracker] archive check failed")
+            if time.monotonic() < next_maintenance:
+                continue
+            next_maintenance = time.monotonic() + EVICT_INTERVAL_S
+            if self._store is not None:
+                try:
+                    await self._store.evict_expired()
+                except Exception:
+                    logger.exception("[DeletedMessageTracker] store eviction failed")
+
+    def _evict_delay(self) -> float:
+        deadlines = [
+            d
+            for d in (
+                self._entry_expiry.next_deadline(),
+                self._read_expiry.next_deadline(),
+                self._preserved_expiry.next_deadline(),
+            )
+            if d is not None
+        ]
+        if not deadlines:
+            return EVICT_MAX_SLEEP_S
+        return min(max(min(deadlines) - time.time(), 0.0), EVICT_MAX_SLEEP_S)
+
+    def _evict_expired(self, now: float) -> int:
+        """Drop at most one slice of expired state; returns how much."""
+        keys = self._entry_expiry.pop_expired(now, EVICT_SLICE)
+        for key in keys:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._drop_entry(key, cached)
+        done = len(keys)
+        for peer_str, message_id in self._preserved_expiry.pop_expired(
+            now, EVICT_SLICE - done
+        ):
+            message_ids = self._preserved_unread.get(peer_str)
+            if message_ids is not None:
+                message_ids.discard(message_id)
+                if not message_ids:
+                    del self._preserved_unread[peer_str]
+            done += 1
+        for peer_str in self._read_expiry.pop_expired(now, EVICT_SLICE - done):
+            self._read_up_to.pop(peer_str, None)
+            if self._store is not None:
+                self._store.delete_read_state(peer_str)
+            done += 1
+        self._expired += len(keys)
+        return done
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from telethon import TelegramClient
+from telethon.tl import types
+
+from src_py.telegram_utils.parallel_download import ParallelDownloader
+from src_py.telegram_utils.utils import get_media_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+# Consumers of one arrival (tracker, transcription, TTL capture) ask within
+# seconds of each other; after that the bytes are not worth the memory.
+DEFAULT_TTL_S = 5 * 60
+
+
+@dataclass
+class _Entry:
+    data: bytes
+    stored_at: float
+
+
+class MediaFetcher:
+    """Downloads each document/photo once per arrival and shares the result.
+
+    Requests are keyed by media id: concurrent callers join the download
+    already in flight, and finished downloads are kept for a few minutes
+    within a byte budget so later consumers of the same message are served
+    from memory. ``bytes`` are immutable, so every caller gets the same
+    buffer; callers that need a file get the buffer written to their path,
+    unless the media could never be cached, in which case its parts are
+    written straight to disk.
+    """
+
+    def __init__(
+        self,
+        *,
+        budget_bytes: int = DEFAULT_BUDGET_BYTES,
+        ttl_s: float = DEFAULT_TTL_S,
+    ) -> None:
+        self._budget_bytes = budget_bytes
+        self._ttl_s = ttl_s
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[bytes | None]] = {}
+        self._downloader: ParallelDownloader | None = None
+        self._size = 0
+        self._downloads = 0
+        self._hits = 0
+        self._joined = 0
+        self._bytes_downloaded = 0
+        self._bytes_saved = 0
+        self._evicted = 0
+        self._streamed = 0
+
+    def configure(
+        self,
+        *,
+        budget_bytes: int | None = None,
+        ttl_s: float | None = None,
+        downloader: ParallelDownloader | None = None,
+    ) -> None:
+        if budget_bytes is not None:
+            self._budget_bytes = budget_bytes
+        if ttl_s is not None:
+            self._ttl_s = ttl_s
+        if downloader is not None:
+            self._downloader = downloader
+        self._prune()
+
+    async def fetch_bytes(
+        self, client: TelegramClient, message: types.Message
+    ) -> bytes | None:
+        """The message's media as bytes, or None when it has none."""
+        key = get_media_key(message)
+        if key is None:
+            return await self._download_media(client, message)
+
+        entry = self._get(key)
+        if entry is not None:
+            self._hits += 1
+            self._bytes_saved += len(entry.data)
+            return entry.data
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._download(client, message, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+            return await asyncio.shield(task)
+
+        self._joined += 1
+        data = await asyncio.shield(task)
+        if data is not None:
+            self._bytes_saved += len(data)
+        return data
+
+    async def fetch_to_file(
+        self, client: TelegramClient, message: types.Message, dest: str
+    ) -> str:
+        """Write the message's media to ``dest`` and return the path."""
+        key = get_media_key(message)
+        shareable = key is not None and (
+            key in self._inflight
+            or key in self._entries
+            or _media_size(message) <= self._budget_bytes
+        )
+        if not shareable:
+            # Nothing to share it with: keep large files out of RAM.
+            self._streamed += 1
+            if self._downloader is not None:
+                saved = await self._downloader.download_to_file(message, dest)
+            else:
+                saved = await client.download_media(message, file=dest)
+            if not saved:
+                raise ValueError(f"message {message.id} has no downloadable media")
+            return saved
+        data = await self.fetch_bytes(client, message)
+        if data is None:
+            raise ValueError(f"message {message.id} has no downloadable media")
+        await asyncio.to_thread(_write_file, dest, data)
+        return dest
+
+    async def _download(
+        self, client: TelegramClient, message: types.Message, key: str
+    ) -> bytes | None:
+        data = await self._download_media(client, message)
+        if data is None:
+            return None
+        self._downloads += 1
+        self._bytes_downloaded += len(data)
+        if len(data) <= self._budget_bytes:
+            self._entries[key] = _Entry(data=data, stored_at=time.time())
+            self._size += len(data)
+            self._prune()
+        return data
+
+    async def _download_media(
+        self, client: TelegramClient, message: types.Message
+    ) -> bytes | None:
+        if self._downloader is not None:
+            return await self._downloader.download_media(message)
+        data = await client.download_media(message, file=bytes)
+        return data if isinstance(data, bytes) else None
+
+    def _get(self, key: str) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at > self._ttl_s:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _prune(self) -> None:
+        now = time.time()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if (
+                self._size <= self._budget_bytes
+                and now - entry.stored_at <= self._ttl_s
+            ):
+                break
+            self._drop(key)
+            self._evicted += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.data)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "entries": len(self._entries),
+            "cached_kb": self._size // 1024,
+            "downloads": self._downloads,
+            "hits": self._hits,
+            "joined": self._joined,
+            "downloaded_kb": self._bytes_downloaded // 1024,
+            "saved_kb": self._bytes_saved // 1024,
+            "evicted": self._evicted,
+            "streamed": self._streamed,
+        }
+
+
+def _media_size(message: types.Message) -> int:
+    """Declared size of a document; photos are always small enough."""
+    media = message.media
+    if isinstance(media, types.MessageMediaDocument) and isinstance(
+        media.document, types.Document
+    ):
+        return media.document.size or 0
+    return 0
+
+
+def _write_file(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+# Shared by every subsystem so one arrival is downloaded once in total.
+media_fetcher = MediaFetcher()
@@ -0,0 +1,370 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from telethon import TelegramClient
+from telethon.network import MTProtoSender
+from telethon.tl import functions, types
+from telethon.tl.alltlobjects import LAYER
+
+logger = logging.getLogger(__name__)
+
+# GetFile limits: parts are multiples of 4 KiB, at most 512 KiB, and a part
+# may not cross a 1 MiB boundary, so fixed 512 KiB parts are always valid.
+PART_SIZE = 512 * 1024
+DEFAULT_CONNECTIONS = 4
+# Below this a single request stream is as fast and needs no extra sockets.
+DEFAULT_MIN_PARALLEL_BYTES = 2 * 1024 * 1024
+# Extra pooled connections outlive a download by this much, so a burst of
+# media from one DC pays the auth export and TCP handshake once.
+DEFAULT_IDLE_S = 10 * 60
+# One connection per DC stays open this long after its last download, so the
+# next media from that DC starts without a handshake; the home DC's is kept
+# for the whole session.
+DEFAULT_KEEP_WARM_S = 60 * 60
+
+
+@dataclass
+class _DcPool:
+    dc_id: int
+    auth_key: object | None
+    senders: list[MTProtoSender] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.time)
+    active: int = 0
+
+
+def _plan_parts(size: int, part_size: int = PART_SIZE) -> list[tuple[int, int]]:
+    """``(offset, limit)`` of every part needed to cover ``size`` bytes."""
+    return [(offset, part_size) for offset in range(0, size, part_size)]
+
+
+def _open_preallocated(path: str, size: int) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _discard(fd: int, path: str) -> None:
+    os.close(fd)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _document_location(
+    message: types.Message,
+) -> tuple[types.InputDocumentFileLocation, int, int] | None:
+    media = message.media
+    if not isinstance(media, types.MessageMediaDocument):
+        return None
+    doc = media.document
+    if not isinstance(doc, types.Document):
+        return None
+    location = types.InputDocumentFileLocation(
+        id=doc.id,
+        access_hash=doc.access_hash,
+        file_reference=doc.file_reference,
+        thumb_size="",
+    )
+    return location, doc.dc_id, doc.size
+
+
+class ParallelDownloader:
+    """Fetches large documents as concurrent part ranges over a pool of
+    per-DC connections.
+
+    Connections to the home DC reuse the session's auth key; other DCs get
+    one exported authorization that every pooled connection to that DC
+    shares. After ``idle_s`` without downloads a pool is trimmed to a single
+    connection, which Telethon reconnects on its own if the socket drops;
+    that one is closed only after ``keep_warm_s``, and never for the home
+    DC. Photos, small documents and any failure fall back to the client's
+    own ``download_media``.
+    """
+
+    def __init__(
+        self,
+        client: TelegramClient,
+        *,
+        connections: int = DEFAULT_CONNECTIONS,
+        min_parallel_bytes: int = DEFAULT_MIN_PARALLEL_BYTES,
+        idle_s: float = DEFAULT_IDLE_S,
+        keep_warm_s: float = DEFAULT_KEEP_WARM_S,
+    ) -> None:
+        self._client = client
+        self._connections = max(1, connections)
+        self._min_parallel_bytes = min_parallel_bytes
+        self._idle_s = idle_s
+        self._keep_warm_s = keep_warm_s
+        self._pools: dict[int, _DcPool] = {}
+        self._parallel = 0
+        self._fallbacks = 0
+        self._failures = 0
+        self._auth_exports = 0
+        self._bytes = 0
+        self._seconds = 0.0
+        self._last_mbps = 0.0
+
+    async def download_media(self, message: types.Message) -> bytes | None:
+        """Drop-in for ``client.download_media(message, file=bytes)``."""
+        info = _document_location(message)
+        if info is None or info[2] < self._min_parallel_bytes:
+            return await self._fallback(message)
+
+        location, dc_id, size = info
+        chunks: dict[int, bytes] = {}
+
+        async def keep(offset: int, data: bytes) -> None:
+            chunks[offset] = data
+
+        started = time.monotonic()
+        try:
+            await self._download_parts(location, dc_id, size, keep)
+        except Exception:
+            self._download_failed(message)
+            return await self._fallback(message)
+        self._record(size, started)
+        return b"".join(chunks[offset] for offset in sorted(chunks))
+
+    async def download_to_file(self, message: types.Message, dest: str) -> str | None:
+        """Drop-in for ``client.download_media(message, file=dest)``.
+
+        Parts are written at their offsets into a preallocated file, so a
+        large document never has to fit in memory.
+        """
+        info = _document_location(message)
+        if info is None or info[2] < self._min_parallel_bytes:
+            return await self._fallback_to_file(message, dest)
+
+        location, dc_id, size = info
+        fd = await asyncio.to_thread(_open_preallocated, dest, size)
+        writes: set[asyncio.Future[int]] = set()
+
+        async def write(offset: int, data: bytes) -> None:
+            done = asyncio.ensure_future(
+                asyncio.to_thread(os.pwrite, fd, data, offset)
+            )
+            writes.add(done)
+            done.add_done_callback(writes.discard)
+            await asyncio.shield(done)
+
+        started = time.monotonic()
+        try:
+            await self._download_parts(location, dc_id, size, write)
+        except Exception:
+            self._download_failed(message)
+            await asyncio.to_thread(_discard, fd, dest)
+            return await self._fallback_to_file(message, dest)
+        except BaseException:
+            # A cancelled write still runs in its thread; close after it.
+            await asyncio.gather(*writes, return_exceptions=True)
+            await asyncio.to_thread(_discard, fd, dest)
+            raise
+        await asyncio.to_thread(os.close, fd)
+        self._record(size, started)
+        return dest
+
+    async def _fallback(self, message: types.Message) -> bytes | None:
+        self._fallbacks += 1
+        data = await self._client.download_media(message, file=bytes)
+        return data if isinstance(data, bytes) else None
+
+    async def _fallback_to_file(self, message: types.Message, dest: str) -> str | None:
+        self._fallbacks += 1
+        saved = await self._client.download_media(message, file=dest)
+        return saved if isinstance(saved, str) else None
+
+    def _download_failed(self, message: types.Message) -> None:
+        self._failures += 1
+        logger.warning(
+            "Parallel download of msg %d failed; retrying with a single stream",
+            message.id,
+            exc_info=True,
+        )
+
+    def _record(self, size: int, started: float) -> None:
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self._parallel += 1
+        self._bytes += size
+        self._seconds += elapsed
+        self._last_mbps = size / elapsed / (1024 * 1024)
+
+    async def _download_parts(
+        self,
+        location: types.InputDocumentFileLocation,
+        dc_id: int,
+        size: int,
+        write: Callable[[int, bytes], Awaitable[None]],
+    ) -> None:
+        """Fetch every part of the document and hand each to ``write`` with
+        its offset, in whatever order the parts arrive."""
+        parts = _plan_parts(size)
+        pool = await self._pool(dc_id)
+        senders = await self._senders(pool, min(self._connections, len(parts)))
+        next_part = iter(parts)
+        errors: list[Exception] = []
+        received = 0
+
+        async def worker(sender: MTProtoSender) -> None:
+            nonlocal received
+            # Workers stop on the first error rather than being cancelled, so
+            # no write is still running once the caller closes its sink.
+            for offset, limit in next_part:
+                if errors:
+                    return
+                try:
+                    data = await self._fetch_part(sender, location, offset, limit)
+                    await write(offset, data)
+                except Exception as e:
+                    errors.append(e)
+                    return
+                received += len(data)
+
+        pool.active += 1
+        try:
+            await asyncio.gather(*(worker(s) for s in senders))
+        finally:
+            pool.active -= 1
+            pool.last_used = time.time()
+        if errors:
+            raise errors[0]
+        # Every part is capped at its slot, so a short part shows up here.
+        if received != size:
+            raise IOError(f"expected {size} bytes, got {received}")
+
+    async def _fetch_part(
+        self,
+        sender: MTProtoSender,
+        location: types.InputDocumentFileLocation,
+        offset: int,
+        limit: int,
+    ) -> bytes:
+        result = await self._client._call(
+            sender,
+            functions.upload.GetFileRequest(
+                location=location, offset=offset, limit=limit, precise=False
+            ),
+        )
+        if not isinstance(result, types.upload.File):
+            # CDN redirects need a different protocol; let Telethon handle them.
+            raise IOError(f"unexpected GetFile result {type(result).__name__}")
+        return result.bytes
+
+    async def warm(self, dc_id: int) -> None:
+        """Open one pooled connection to ``dc_id`` ahead of the first download."""
+        await self._senders(await self._pool(dc_id), 1)
+
+    async def _pool(self, dc_id: int) -> _DcPool:
+        await self._close_idle()
+        pool = self._pools.get(dc_id)
+        if pool is None:
+            home = self._client.session.dc_id == dc_id
+            pool = _DcPool(
+                dc_id=dc_id,
+                auth_key=self._client.session.auth_key if home else None,
+            )
+            self._pools[dc_id] = pool
+        return pool
+
+    async def _senders(self, pool: _DcPool, count: int) -> list[MTProtoSender]:
+        async with pool.lock:
+            # A sender whose automatic reconnects gave up is replaced.
+            pool.senders = [s for s in pool.senders if s.is_connected()]
+            while len(pool.senders) < count:
+                pool.senders.append(await self._connect(pool))
+            pool.last_used = time.time()
+            return pool.senders[:count]
+
+    async def _connect(self, pool: _DcPool) -> MTProtoSender:
+        client = self._client
+        dc = await client._get_dc(pool.dc_id)
+        sender = MTProtoSender(pool.auth_key, loggers=client._log)
+        await sender.connect(
+            client._connection(
+                dc.ip_address,
+                dc.port,
+                dc.id,
+                loggers=client._log,
+                proxy=client._proxy,
+                local_addr=client._local_addr,
+            )
+        )
+        if pool.auth_key is None:
+            auth = await client(functions.auth.ExportAuthorizationRequest(pool.dc_id))
+            query = functions.auth.ImportAuthorizationRequest(
+                id=auth.id, bytes=auth.bytes
+            )
+            self._auth_exports += 1
+        else:
+            query = functions.help.GetConfigRequest()
+        init = client._init_request
+        await sender.send(
+            functions.InvokeWithLayerRequest(
+                LAYER,
+                functions.InitConnectionRequest(
+                    api_id=init.api_id,
+                    device_model=init.device_model,
+                    system_version=init.system_version,
+                    app_version=init.app_version,
+                    system_lang_code=init.system_lang_code,
+                    lang_pack=init.lang_pack,
+                    lang_code=init.lang_code,
+                    query=query,
+                    proxy=init.proxy,
+                ),
+            )
+        )
+        # Further connections to this DC reuse the imported key.
+        pool.auth_key = sender.auth_key
+        return sender
+
+    async def _close_idle(self) -> None:
+        now = time.time()
+        home_dc = self._client.session.dc_id
+        for pool in self._pools.values():
+            idle = now - pool.last_used
+            if pool.active or idle <= self._idle_s:
+                continue
+            keep = 0 if pool.dc_id != home_dc and idle > self._keep_warm_s else 1
+            # The exported key stays valid; keep it to skip the next export.
+            await self._disconnect(pool, pool.senders[keep:])
+            del pool.senders[keep:]
+
+    async def _disconnect(
+        self, pool: _DcPool, senders: list[MTProtoSender] | None = None
+    ) -> None:
+        for sender in pool.senders if senders is None else senders:
+            try:
+                await sender.disconnect()
+            except Exception:
+                logger.debug("Error closing pooled sender for DC %d", pool.dc_id)
+
+    async def close(self) -> None:
+        for pool in self._pools.values():
+            await self._disconnect(pool)
+        self._pools.clear()
+
+    def stats(self) -> dict[str, object]:
+        avg = self._bytes / self._seconds / (1024 * 1024) if self._seconds else 0.0
+        return {
+            "parallel": self._parallel,
+            "fallbacks": self._fallbacks,
+            "failures": self._failures,
+            "auth_exports": self._auth_exports,
+            "downloaded_mb": round(self._bytes / (1024 * 1024), 1),
+            "avg_mb_s": round(avg, 2),
+            "last_mb_s": round(self._last_mbps, 2),
+            "connections": {
+                dc_id: len(pool.senders) for dc_id, pool in self._pools.items()
+            },
+        }
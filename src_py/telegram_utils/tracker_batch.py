@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from src_py.telegram_utils.tracker_entries import CachedMedia, CachedMessage
+
+logger = logging.getLogger(__name__)
+
+# Deletions and edits of one chat arriving within this window go out together.
+DEFAULT_WINDOW_S = 2.0
+# Batches this large become a digest plus albums instead of one post each.
+DEFAULT_DIGEST_THRESHOLD = 5
+ALBUM_MAX = 10
+MESSAGE_MAX_CHARS = 4096
+CAPTION_MAX_CHARS = 1024
+
+
+@dataclass(slots=True)
+class PendingForward:
+    kind: str  # "deleted" | "edited"
+    key: str
+    cached: CachedMessage
+    # Edits only: the text before the edit and what it became.
+    old_text: str | None = None
+    new_text: str | None = None
+    media_changed: bool = False
+
+
+class ForwardBatcher:
+    """Holds tracker forwards per chat for a short window.
+
+    The first item for a chat starts its timer; everything that arrives
+    for that chat before it fires is handed to ``flush`` as one list, so
+    a cleared chat costs a few posts instead of one per message. Flushes
+    run one at a time to keep the channel in order.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[PendingForward]], Awaitable[None]],
+        *,
+        window_s: float = DEFAULT_WINDOW_S,
+    ) -> None:
+        self._flush = flush
+        self._window_s = window_s
+        self._pending: dict[str, list[PendingForward]] = {}
+        self._timers: dict[str, asyncio.Task] = {}
+        # Timers that have fired and own their chat's items until sent.
+        self._flushing: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    def add(self, chat: str, item: PendingForward) -> None:
+        self._pending.setdefault(chat, []).append(item)
+        if chat not in self._timers:
+            self._timers[chat] = asyncio.create_task(self._flush_later(chat))
+
+    def pending(self, chat: str) -> list[PendingForward]:
+        return self._pending.get(chat, [])
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._pending.values())
+
+    async def _flush_later(self, chat: str) -> None:
+        await asyncio.sleep(self._window_s)
+        task = self._timers.pop(chat)
+        self._flushing.add(task)
+        try:
+            await self._flush_chat(chat)
+        finally:
+            self._flushing.discard(task)
+
+    async def _flush_chat(self, chat: str) -> None:
+        items = self._pending.pop(chat, [])
+        if not items:
+            return
+        async with self._lock:
+            try:
+                await self._flush(items)
+            except Exception:
+                logger.exception("[ForwardBatcher] flush of %s failed", chat)
+
+    async def flush_all(self) -> None:
+        """Send everything pending now, e.g. on shutdown."""
+        # Only timers still sleeping are cancelled; their items stay pending
+        # and are sent below. Fired ones are mid-send and run to completion.
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+        for chat in list(self._pending):
+            await self._flush_chat(chat)
+
+
+def album_kind(media: CachedMedia) -> str | None:
+    """Which album the media can share, or None when it must go alone.
+
+    Telegram only groups photos with videos, and documents with documents;
+    voice and video notes are never grouped.
+    """
+    if media.media_type in ("voiceNote", "videoNote"):
+        return None
+    if media.media_type == "photo" or media.mime_type.startswith("video/"):
+        return "visual"
+    return "file"
+
+
+def short_time(date: object) -> str:
+    if isinstance(date, datetime):
+        return date.strftime("%H:%M")
+    if isinstance(date, (int, float)):
+        return datetime.fromtimestamp(date, tz=timezone.utc).strftime("%H:%M")
+    return "--:--"
+
+
+def digest_line(item: PendingForward, edit_summary: str | None = None) -> str:
+    cached = item.cached
+    prefix = f"[{short_time(cached.date)}] {cached.sender_name}"
+    if item.kind == "edited":
+        return f"✏️ {prefix}:\n{edit_summary or ''}".rstrip()
+    parts = [cached.text or "", cached.media_description or ""]
+    body = " ".join(p for p in parts if p) or "(пустое сообщение)"
+    return f"\U0001f5d1 {prefix}: {body}"
+
+
+def split_digest(header: str, lines: list[str]) -> list[str]:
+    """Pack ``lines`` under ``header`` into messages of at most 4096 chars."""
+    chunks: list[str] = []
+    current = header
+    for line in lines:
+        if len(line) > MESSAGE_MAX_CHARS - len(header) - 2:
+            line = line[: MESSAGE_MAX_CHARS - len(header) - 3] + "…"
+        if len(current) + 2 + len(line) > MESSAGE_MAX_CHARS:
+            chunks.append(current)
+            current = header
+        current = f"{current}\n\n{line}"
+    chunks.append(current)
+    return chunks
+
+
+def album_caption(item: PendingForward) -> str:
+    cached = item.cached
+    caption = f"[{short_time(cached.date)}] {cached.sender_name}"
+    if cached.text:
+        caption = f"{caption}\n{cached.text}"
+    if len(caption) > CAPTION_MAX_CHARS:
+        caption = caption[: CAPTION_MAX_CHARS - 1] + "…"
+    return caption
@@ -0,0 +1,189 @@
+import hashlib
+import sys
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+MediaType = str  # "photo" | "voiceNote" | "videoNote" | "document"
+FileLocation = types.InputDocumentFileLocation | types.InputPhotoFileLocation
+
+# Texts at least this long are kept zlib-compressed until read.
+TEXT_COMPRESS_MIN_CHARS = 256
+
+
+def peer_to_string(peer: types.TypePeer) -> str | None:
+    if isinstance(peer, types.PeerUser):
+        return f"user:{peer.user_id}"
+    if isinstance(peer, types.PeerChat):
+        return f"chat:{peer.chat_id}"
+    if isinstance(peer, types.PeerChannel):
+        return f"channel:{peer.channel_id}"
+    return None
+
+
+def peer_from_string(value: str) -> types.TypePeer | None:
+    kind, _, raw_id = value.partition(":")
+    if not raw_id.lstrip("-").isdigit():
+        return None
+    if kind == "user":
+        return types.PeerUser(int(raw_id))
+    if kind == "chat":
+        return types.PeerChat(int(raw_id))
+    if kind == "channel":
+        return types.PeerChannel(int(raw_id))
+    return None
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(slots=True)
+class MediaReference:
+    """Enough to download the file later without the original message."""
+
+    location: FileLocation
+    dc_id: int
+    size: int
+
+    @property
+    def media_id(self) -> int:
+        return self.location.id
+
+
+@dataclass(slots=True)
+class CachedMedia:
+    data: bytes | None
+    media_type: MediaType
+    mime_type: str
+    file_name: str
+    # Set for media restored from the persistent store: ``data`` stays None
+    # until a deletion actually needs the bytes.
+    blob_path: str | None = None
+    sha256: str | None = None
+    # Kept for every media; when it is all there is, the bytes are only
+    # fetched if the message is deleted or edited while still unread.
+    reference: MediaReference | None = None
+
+    @property
+    def is_deferred(self) -> bool:
+        return self.data is None and self.blob_path is None
+
+    def read(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        if self.blob_path is None:
+            return b""
+        with open(self.blob_path, "rb") as f:
+            return f.read()
+
+    def __post_init__(self) -> None:
+        self.media_type = sys.intern(self.media_type)
+        self.mime_type = sys.intern(self.mime_type)
+        self.file_name = sys.intern(self.file_name)
+
+    def digest(self) -> str:
+        if self.sha256 is None:
+            self.sha256 = hashlib.sha256(self.read()).hexdigest()
+        return self.sha256
+
+
+class CachedMessage:
+    """A tracked message, kept small because tens of thousands are cached.
+
+    Slotted; the peer is held as its interned ``user:42`` key, the date
+    as a timestamp and long texts zlib-compressed. Sender names, labels
+    and ids are interned, so repeats across messages share one string.
+    The Telethon peer, the datetime and the text are rebuilt on access,
+    which in practice means when a message is forwarded.
+    """
+
+    __slots__ = (
+        "message_id",
+        "_text",
+        "_date",
+        "cached_at",
+        "sender_id",
+        "sender_name",
+        "_peer",
+        "chat_label",
+        "media_description",
+        "media",
+        "channel_id",
+    )
+
+    def __init__(
+        self,
+        message_id: int,
+        text: str | None,
+        date: object,
+        cached_at: float,
+        sender_id: str | None,
+        sender_name: str,
+        peer: types.TypePeer,
+        chat_label: str,
+        media_description: str | None,
+        media: CachedMedia | None,
+        channel_id: str | None,
+    ) -> None:
+        self.message_id = message_id
+        self.text = text
+        self.date = date
+        self.cached_at = cached_at
+        self.sender_id = _intern(sender_id)
+        self.sender_name = sys.intern(sender_name)
+        self.peer = peer
+        self.chat_label = sys.intern(chat_label)
+        self.media_description = _intern(media_description)
+        self.media = media
+        self.channel_id = _intern(channel_id)
+
+    @property
+    def text(self) -> str | None:
+        text = self._text
+        if isinstance(text, bytes):
+            return zlib.decompress(text).decode("utf-8")
+        return text
+
+    @text.setter
+    def text(self, value: str | None) -> None:
+        if value is not None and len(value) >= TEXT_COMPRESS_MIN_CHARS:
+            packed = zlib.compress(value.encode("utf-8"))
+            if len(packed) < len(value):
+                self._text = packed
+                return
+        self._text = value
+
+    @property
+    def date(self) -> object:
+        date = self._date
+        if isinstance(date, float):
+            return datetime.fromtimestamp(date, tz=timezone.utc)
+        return date
+
+    @date.setter
+    def date(self, value: object) -> None:
+        self._date = value.timestamp() if isinstance(value, datetime) else value
+
+    @property
+    def peer(self) -> types.TypePeer:
+        peer = self._peer
+        return peer_from_string(peer) if isinstance(peer, str) else peer
+
+    @peer.setter
+    def peer(self, value: types.TypePeer) -> None:
+        key = peer_to_string(value)
+        self._peer = sys.intern(key) if key is not None else value
+
+    @property
+    def peer_key(self) -> str | None:
+        """The ``user:42`` form of the peer, without rebuilding it."""
+        return self._peer if isinstance(self._peer, str) else None
+
+    def __repr__(self) -> str:
+        return (
+            f"CachedMessage(message_id={self.message_id!r}, "
+            f"peer={self.peer_key!r}, sender_name={self.sender_name!r})"
+        )
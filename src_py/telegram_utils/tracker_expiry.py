@@ -0,0 +1,68 @@
+import heapq
+import itertools
+from collections.abc import Hashable
+
+# Stale heap items (rescheduled or discarded keys) are dropped in one
+# rebuild once they outnumber the live ones this many times over.
+COMPACT_FACTOR = 2
+
+
+class ExpiryIndex:
+    """Deadlines for a set of keys, earliest first.
+
+    A min-heap with lazy deletion: rescheduling or discarding a key only
+    updates the deadline map, and the outdated heap item is skipped when
+    it surfaces. ``pop_expired`` hands out at most ``limit`` keys per
+    call, so callers can evict in small slices between other work.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._deadlines: dict[Hashable, float] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+        self._maybe_compact()
+
+    def deadline(self, key: Hashable) -> float | None:
+        return self._deadlines.get(key)
+
+    def discard(self, key: Hashable) -> None:
+        if self._deadlines.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def next_deadline(self) -> float | None:
+        self._skip_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: float, limit: int) -> list[Hashable]:
+        expired: list[Hashable] = []
+        while len(expired) < limit:
+            self._skip_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _deadline, _seq, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            expired.append(key)
+        return expired
+
+    def _skip_stale(self) -> None:
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > (COMPACT_FACTOR + 1) * max(len(self._deadlines), 64):
+            self._heap = [
+                (deadline, next(self._counter), key)
+                for key, deadline in self._deadlines.items()
+            ]
+            heapq.heapify(self._heap)
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from telethon.tl import types
+
+from src_py.telegram_utils.tracker_entries import CachedMedia, MediaType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BYTES = 128 * 1024 * 1024
+# Anything larger goes straight to disk instead of displacing many small items.
+DEFAULT_INLINE_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_SPILL_DIR = os.path.join(os.getcwd(), "tracker_spill")
+# Downloaded on arrival: short-lived and most often deleted right after
+# sending. Everything else is fetched from its file reference on delete.
+EAGER_MEDIA_TYPES = {"voiceNote", "videoNote", "photo"}
+DEFAULT_EAGER_MAX_BYTES = 2 * 1024 * 1024
+# Channel copies remembered for re-sending without an upload.
+MAX_UPLOADS = 512
+
+
+@dataclass
+class _Blob:
+    """One stored copy of some content, shared by every entry holding it."""
+
+    size: int
+    data: bytes | None
+    path: str | None = None
+    media_ids: set[int] = field(default_factory=set)
+    users: dict[str, CachedMedia] = field(default_factory=dict)
+
+
+class TrackerMediaBudget:
+    """Bounds the RAM held by the deleted-message tracker's media.
+
+    Media is pooled by content: a blob is found by Telegram media id, or
+    by sha256 when the id is new, and is shared and reference-counted by
+    every cache entry holding it, so a sticker sent ten times costs one
+    copy. Blobs live in memory under a byte budget, least recently used
+    first out; evicted or oversized blobs spill to content-addressed files
+    (plain files, so they can be mmapped or streamed back). With a
+    persistent store, ``blob_path`` points spills at the store's own blob
+    files, so each content is on disk once and the store removes it when
+    no entry needs it any more. Per-type caps
+    decide before downloading whether an item is worth keeping at all;
+    above the cap only metadata is kept. Only small, short-lived media is
+    downloaded on arrival; the rest is kept as a file reference.
+    """
+
+    def __init__(
+        self,
+        *,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        inline_max_bytes: int = DEFAULT_INLINE_MAX_BYTES,
+        type_caps: dict[MediaType, int] | None = None,
+        spill_dir: str = DEFAULT_SPILL_DIR,
+        eager_max_bytes: int = DEFAULT_EAGER_MAX_BYTES,
+        blob_path: Callable[[str], str] | None = None,
+    ) -> None:
+        self._memory_bytes = memory_bytes
+        self._inline_max_bytes = inline_max_bytes
+        self._type_caps = type_caps or {}
+        self._spill_dir = spill_dir
+        self._eager_max_bytes = eager_max_bytes
+        self._blob_path = blob_path
+        # Spill writes and removals of released files go through one lock,
+        # so a removal never races a new spill of the same content.
+        self._file_lock = asyncio.Lock()
+        self._removals: set[asyncio.Task] = set()
+        self._blobs: dict[str, _Blob] = {}
+        self._by_media_id: dict[int, str] = {}
+        self._entry_blob: dict[str, str] = {}
+        self._resident: OrderedDict[str, None] = OrderedDict()
+        self._resident_bytes = 0
+        self._spilled_bytes = 0
+        self._logical_bytes = 0
+        self._uploads: OrderedDict[str, types.TypeMessageMedia] = OrderedDict()
+        self._spills = 0
+        self._evictions = 0
+        self._skipped = 0
+        self._dedup_hits = 0
+        self._upload_reuses = 0
+
+    def admits(self, media_type: MediaType, size: int) -> bool:
+        """Whether media of this type and size should be downloaded at all."""
+        cap = self._type_caps.get(media_type)
+        if cap is not None and size > cap:
+            self._skipped += 1
+            return False
+        return True
+
+    def prefers_eager(self, media_type: MediaType, size: int) -> bool:
+        """Download now rather than keeping only the file reference."""
+        return media_type in EAGER_MEDIA_TYPES and size <= self._eager_max_bytes
+
+    def has_media(self, media_id: int) -> bool:
+        """Whether the pool already holds this file, so no download is needed."""
+        return media_id in self._by_media_id
+
+    async def add(self, key: str, media: CachedMedia) -> None:
+        """Attach ``media`` of cache entry ``key`` to the pool.
+
+        Media whose id is already pooled gets the shared bytes even when it
+        arrived without any; other bytes-less media is left alone.
+        """
+        sha = None
+        if media.reference is not None:
+            sha = self._by_media_id.get(media.reference.media_id)
+        if sha is None and media.data is not None:
+            sha = media.digest()
+        if sha is not None and self._entry_blob.get(key) == sha:
+            # Same file as before, e.g. only the caption was edited.
+            self._entry_blob.pop(key)
+            self._logical_bytes -= self._blobs[sha].size
+            self._attach(key, sha, self._blobs[sha], media)
+            return
+        self.release(key)
+        if sha is None:
+            return
+
+        blob = self._blobs.get(sha)
+        if blob is not None:
+            self._dedup_hits += 1
+            self._attach(key, sha, blob, media)
+            if sha in self._resident:
+                self._resident.move_to_end(sha)
+            return
+        if media.data is None:
+            return
+
+        blob = _Blob(size=len(media.data), data=media.data)
+        self._blobs[sha] = blob
+        self._attach(key, sha, blob, media)
+        if blob.size > self._inline_max_bytes or blob.size > self._memory_bytes:
+            await self._spill(sha, blob)
+            return
+        self._resident[sha] = None
+        self._resident_bytes += blob.size
+        while self._resident_bytes > self._memory_bytes and self._resident:
+            old_sha, _ = self._resident.popitem(last=False)
+            old_blob = self._blobs[old_sha]
+            self._resident_bytes -= old_blob.size
+            self._evictions += 1
+            await self._spill(old_sha, old_blob)
+
+    def _attach(self, key: str, sha: str, blob: _Blob, media: CachedMedia) -> None:
+        media.data = blob.data
+        media.blob_path = blob.path
+        media.sha256 = sha
+        if media.reference is not None:
+            blob.media_ids.add(media.reference.media_id)
+            self._by_media_id[media.reference.media_id] = sha
+        blob.users[key] = media
+        self._entry_blob[key] = sha
+        self._logical_bytes += blob.size
+
+    def stored_size(self, key: str) -> int:
+        """Bytes held for entry ``key``, in memory or spilled; 0 if none."""
+        sha = self._entry_blob.get(key)
+        return self._blobs[sha].size if sha is not None else 0
+
+    def touch(self, key: str) -> None:
+        sha = self._entry_blob.get(key)
+        if sha in self._resident:
+            self._resident.move_to_end(sha)
+
+    def release(self, key: str) -> None:
+        sha = self._entry_blob.pop(key, None)
+        if sha is None:
+            return
+        blob = self._blobs[sha]
+        blob.users.pop(key, None)
+        self._logical_bytes -= blob.size
+        if blob.users:
+            return
+        del self._blobs[sha]
+        for media_id in blob.media_ids:
+            if self._by_media_id.get(media_id) == sha:
+                del self._by_media_id[media_id]
+        if sha in self._resident:
+            del self._resident[sha]
+            self._resident_bytes -= blob.size
+        if blob.path is not None:
+            self._spilled_bytes -= blob.size
+            if self._blob_path is None:
+                self._schedule_removal(sha, blob.path)
+
+    def _schedule_removal(self, sha: str, path: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _remove_file(path)
+            return
+        task = loop.create_task(self._remove_released(sha, path))
+        self._removals.add(task)
+        task.add_done_callback(self._removals.discard)
+
+    async def _remove_released(self, sha: str, path: str) -> None:
+        async with self._file_lock:
+            if sha not in self._blobs:
+                await asyncio.to_thread(_remove_file, path)
+
+    async def wait_removals(self) -> None:
+        """Let pending spill-file removals finish."""
+        if self._removals:
+            await asyncio.gather(*self._removals)
+
+    def _spill_path(self, sha: str) -> str:
+        if self._blob_path is not None:
+            return self._blob_path(sha)
+        return os.path.join(self._spill_dir, sha)
+
+    async def _spill(self, sha: str, blob: _Blob) -> None:
+        data = blob.data
+        if data is None:
+            return
+        path = self._spill_path(sha)
+        async with self._file_lock:
+            await asyncio.to_thread(_write_file, path, data)
+        if self._blobs.get(sha) is not blob:
+            # Released while the write was in flight.
+            if self._blob_path is None:
+                self._schedule_removal(sha, path)
+            return
+        self._spilled_bytes += blob.size
+        self._spills += 1
+        blob.path = path
+        blob.data = None
+        for media in blob.users.values():
+            media.blob_path = path
+            media.data = None
+
+    def uploaded(self, media: CachedMedia) -> types.TypeMessageMedia | None:
+        """The media of an earlier channel copy of the same file, if any."""
+        for key in _upload_keys(media):
+            sent = self._uploads.get(key)
+            if sent is not None:
+                self._uploads.move_to_end(key)
+                self._upload_reuses += 1
+                return sent
+        return None
+
+    def remember_upload(
+        self, media: CachedMedia, sent: types.TypeMessageMedia | None
+    ) -> None:
+        if sent is None:
+            return
+        for key in _upload_keys(media):
+            self._uploads[key] = sent
+            self._uploads.move_to_end(key)
+        while len(self._uploads) > MAX_UPLOADS:
+            self._uploads.popitem(last=False)
+
+    def forget_upload(self, media: CachedMedia) -> None:
+        for key in _upload_keys(media):
+            self._uploads.pop(key, None)
+
+    def clear_spill(self) -> None:
+        """Remove spill files left behind by a previous run."""
+        if not os.path.isdir(self._spill_dir):
+            return
+        for name in os.listdir(self._spill_dir):
+            if name not in self._blobs:
+                try:
+                    os.remove(os.path.join(self._spill_dir, name))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict[str, object]:
+        stored = self._resident_bytes + self._spilled_bytes
+        return {
+            "memory_kb": self._resident_bytes // 1024,
+            "memory_items": len(self._resident),
+            "spilled_kb": self._spilled_bytes // 1024,
+            "spilled_items": len(self._blobs) - len(self._resident),
+            "spills": self._spills,
+            "evictions": self._evictions,
+            "skipped_by_cap": self._skipped,
+            "dedup_hits": self._dedup_hits,
+            "dedup_ratio": round(self._logical_bytes / stored, 2) if stored else 1.0,
+            "upload_reuses": self._upload_reuses,
+        }
+
+
+def _upload_keys(media: CachedMedia) -> list[str]:
+    keys = []
+    if media.reference is not None:
+        keys.append(f"id:{media.reference.media_id}")
+    if media.sha256 is not None:
+        keys.append(f"sha:{media.sha256}")
+    return keys
+
+
+def _write_file(path: str, data: bytes) -> None:
+    if os.path.exists(path):
+        # Content-addressed: the file already holds these bytes.
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
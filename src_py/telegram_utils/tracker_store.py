@@ -0,0 +1,378 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from telethon.extensions import BinaryReader
+
+from src_py.telegram_utils.tracker_entries import (
+    CachedMedia,
+    CachedMessage,
+    MediaReference,
+    peer_from_string,
+    peer_to_string,
+)
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_S = 1.0
+# A burst this large is written without waiting for the interval.
+MAX_BATCH = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    key TEXT PRIMARY KEY,
+    message_id INTEGER NOT NULL,
+    text TEXT,
+    date REAL NOT NULL,
+    cached_at REAL NOT NULL,
+    sender_id TEXT,
+    sender_name TEXT NOT NULL,
+    peer TEXT NOT NULL,
+    chat_label TEXT NOT NULL,
+    media_description TEXT,
+    channel_id TEXT,
+    media_type TEXT,
+    mime_type TEXT,
+    file_name TEXT,
+    blob_sha TEXT,
+    ref_location BLOB,
+    ref_dc INTEGER,
+    ref_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS messages_cached_at ON messages (cached_at);
+CREATE TABLE IF NOT EXISTS read_state (
+    peer TEXT PRIMARY KEY,
+    max_id INTEGER NOT NULL
+);
+"""
+_COLUMNS = (
+    "key",
+    "message_id",
+    "text",
+    "date",
+    "cached_at",
+    "sender_id",
+    "sender_name",
+    "peer",
+    "chat_label",
+    "media_description",
+    "channel_id",
+    "media_type",
+    "mime_type",
+    "file_name",
+    "blob_sha",
+    "ref_location",
+    "ref_dc",
+    "ref_size",
+)
+# Columns added after the first release of the schema.
+_ADDED_COLUMNS = {"ref_location": "BLOB", "ref_dc": "INTEGER", "ref_size": "INTEGER"}
+
+
+class TrackerStore:
+    """Keeps the deleted-message tracker's cache on disk across restarts.
+
+    Metadata lives in SQLite with an index on ``cached_at`` for TTL
+    eviction; media goes to a content-addressed blob directory, so a
+    file forwarded to several chats is stored once. Writes are queued and
+    flushed in batches from a worker thread, away from the update
+    handlers. Entries loaded at startup carry only a blob path; the bytes
+    are read when a deletion actually needs them.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        ttl_s: float,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ) -> None:
+        self._directory = directory
+        self._blob_dir = os.path.join(directory, "blobs")
+        self._ttl_s = ttl_s
+        self._flush_interval_s = flush_interval_s
+        self._db: sqlite3.Connection | None = None
+        self._pending: dict[str, CachedMessage | None] = {}
+        self._pending_read: dict[str, int | None] = {}
+        self._wakeup = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._loaded = 0
+        self._written = 0
+        self._deleted = 0
+        self._batches = 0
+        self._blobs_written = 0
+        self._blobs_removed = 0
+
+    async def open(self) -> tuple[dict[str, CachedMessage], dict[str, int]]:
+        """Open the store and return the live entries and read marks."""
+        entries, read_state = await asyncio.to_thread(self._open_sync)
+        self._loaded = len(entries)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return entries, read_state
+
+    def put(self, key: str, cached: CachedMessage) -> None:
+        self._pending[key] = cached
+        self._kick()
+
+    def delete(self, key: str) -> None:
+        self._pending[key] = None
+        self._kick()
+
+    def put_read_state(self, peer: str, max_id: int) -> None:
+        self._pending_read[peer] = max_id
+        self._kick()
+
+    def delete_read_state(self, peer: str) -> None:
+        self._pending_read[peer] = None
+        self._kick()
+
+    def blob_path(self, sha: str) -> str:
+        return os.path.join(self._blob_dir, sha[:2], sha)
+
+    def _kick(self) -> None:
+        if len(self._pending) >= MAX_BATCH:
+            self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("[TrackerStore] flush failed")
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if self._db is None or (not self._pending and not self._pending_read):
+                return
+            batch, self._pending = self._pending, {}
+            read_batch, self._pending_read = self._pending_read, {}
+            await asyncio.to_thread(self._write_sync, batch, read_batch)
+
+    async def evict_expired(self) -> int:
+        async with self._lock:
+            if self._db is None:
+                return 0
+            # Blob collection keeps files that rows point at, so queued rows
+            # (whose media may have just been spilled here) go in first.
+            batch, self._pending = self._pending, {}
+            read_batch, self._pending_read = self._pending_read, {}
+            if batch or read_batch:
+                await asyncio.to_thread(self._write_sync, batch, read_batch)
+            return await asyncio.to_thread(self._evict_sync, time.time())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _open_sync(self) -> tuple[dict[str, CachedMessage], dict[str, int]]:
+        os.makedirs(self._blob_dir, exist_ok=True)
+        db = sqlite3.connect(
+            os.path.join(self._directory, "tracker.db"), check_same_thread=False
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        existing = {row[1] for row in db.execute("PRAGMA table_info(messages)")}
+        for column, kind in _ADDED_COLUMNS.items():
+            if column not in existing:
+                db.execute(f"ALTER TABLE messages ADD COLUMN {column} {kind}")
+        self._db = db
+        self._evict_sync(time.time())
+
+        entries: dict[str, CachedMessage] = {}
+        for row in db.execute(f"SELECT {', '.join(_COLUMNS)} FROM messages"):
+            cached = self._row_to_cached(row)
+            if cached is not None:
+                entries[row[0]] = cached
+        read_state = dict(db.execute("SELECT peer, max_id FROM read_state"))
+        return entries, read_state
+
+    def _row_to_cached(self, row: tuple) -> CachedMessage | None:
+        (
+            _key,
+            message_id,
+            text,
+            date,
+            cached_at,
+            sender_id,
+            sender_name,
+            peer,
+            chat_label,
+            media_description,
+            channel_id,
+            media_type,
+            mime_type,
+            file_name,
+            blob_sha,
+            ref_location,
+            ref_dc,
+            ref_size,
+        ) = row
+        parsed_peer = peer_from_string(peer)
+        if parsed_peer is None:
+            return None
+        reference = None
+        if ref_location:
+            reference = MediaReference(
+                location=BinaryReader(ref_location).tgread_object(),
+                dc_id=ref_dc,
+                size=ref_size or 0,
+            )
+        has_blob = bool(blob_sha) and os.path.exists(self.blob_path(blob_sha))
+        media = None
+        if has_blob or reference is not None:
+            media = CachedMedia(
+                data=None,
+                media_type=media_type,
+                mime_type=mime_type,
+                file_name=file_name,
+                blob_path=self.blob_path(blob_sha) if has_blob else None,
+                sha256=blob_sha if has_blob else None,
+                reference=reference,
+            )
+        return CachedMessage(
+            message_id=message_id,
+            text=text,
+            date=datetime.fromtimestamp(date, tz=timezone.utc),
+            cached_at=cached_at,
+            sender_id=sender_id,
+            sender_name=sender_name,
+            peer=parsed_peer,
+            chat_label=chat_label,
+            media_description=media_description,
+            media=media,
+            channel_id=channel_id,
+        )
+
+    def _write_sync(
+        self,
+        batch: dict[str, CachedMessage | None],
+        read_batch: dict[str, int | None],
+    ) -> None:
+        db = self._db
+        assert db is not None
+        upserts = []
+        deletes = []
+        for key, cached in batch.items():
+            if cached is None:
+                deletes.append((key,))
+                continue
+            peer = cached.peer_key
+            if peer is None:
+                continue
+            media = cached.media
+            blob_sha = None
+            if media is not None and not media.is_deferred:
+                blob_sha = self._write_blob(media)
+            reference = media.reference if media is not None else None
+            date = cached.date
+            upserts.append(
+                (
+                    key,
+                    cached.message_id,
+                    cached.text,
+                    date.timestamp() if isinstance(date, datetime) else float(date),
+                    cached.cached_at,
+                    cached.sender_id,
+                    cached.sender_name,
+                    peer,
+                    cached.chat_label,
+                    cached.media_description,
+                    cached.channel_id,
+                    cached.media.media_type if cached.media else None,
+                    cached.media.mime_type if cached.media else None,
+                    cached.media.file_name if cached.media else None,
+                    blob_sha,
+                    bytes(reference.location) if reference else None,
+                    reference.dc_id if reference else None,
+                    reference.size if reference else None,
+                )
+            )
+        read_upserts = [(p, m) for p, m in read_batch.items() if m is not None]
+        read_deletes = [(p,) for p, m in read_batch.items() if m is None]
+        with db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO messages ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                upserts,
+            )
+            db.executemany("DELETE FROM messages WHERE key = ?", deletes)
+            db.executemany(
+                "INSERT OR REPLACE INTO read_state VALUES (?, ?)", read_upserts
+            )
+            db.executemany("DELETE FROM read_state WHERE peer = ?", read_deletes)
+        self._written += len(upserts)
+        self._deleted += len(deletes)
+        self._batches += 1
+
+    def _write_blob(self, media: CachedMedia) -> str | None:
+        sha = media.digest()
+        path = self.blob_path(sha)
+        if os.path.exists(path):
+            return sha
+        try:
+            data = media.read()
+        except OSError:
+            # Spilled media released before this flush; keep the metadata.
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._blobs_written += 1
+        return sha
+
+    def _evict_sync(self, now: float) -> int:
+        db = self._db
+        assert db is not None
+        with db:
+            removed = db.execute(
+                "DELETE FROM messages WHERE cached_at < ?", (now - self._ttl_s,)
+            ).rowcount
+        self._collect_blobs()
+        return removed
+
+    def _collect_blobs(self) -> None:
+        """Remove blobs no row points at any more."""
+        db = self._db
+        assert db is not None
+        referenced = {
+            sha
+            for (sha,) in db.execute(
+                "SELECT DISTINCT blob_sha FROM messages WHERE blob_sha IS NOT NULL"
+            )
+        }
+        for root, _dirs, files in os.walk(self._blob_dir):
+            for name in files:
+                if name not in referenced and not name.endswith(".tmp"):
+                    try:
+                        os.remove(os.path.join(root, name))
+                        self._blobs_removed += 1
+                    except OSError:
+                        logger.warning("[TrackerStore] could not remove blob %s", name)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "loaded_at_start": self._loaded,
+            "pending": len(self._pending) + len(self._pending_read),
+            "written": self._written,
+            "deleted": self._deleted,
+            "batches": self._batches,
+            "blobs_written": self._blobs_written,
+            "blobs_removed": self._blobs_removed,
+        }
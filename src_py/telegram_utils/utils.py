@@ -1,11 +1,15 @@
 from telethon import TelegramClient
 from telethon.tl import types
+from telethon.tl.functions.messages import MarkDialogUnreadRequest
 
 from src_py import messages
 
 TELEGRAM_MAX_MESSAGE_LENGTH = 4096
 PREFIX_LENGTH = len(messages.USERBOT_MARK) + 1  # mark + \n
 MAX_TEXT_LENGTH = TELEGRAM_MAX_MESSAGE_LENGTH - PREFIX_LENGTH
+# Room kept free in transcript chunks while the TL;DR is still being built,
+# so it can be edited in later without re-splitting the transcript.
+SUMMARY_RESERVED_CHARS = 1200
 
 
 def is_voice_message(message: types.Message) -> bool:
@@ -35,6 +39,60 @@ def is_video_note(message: types.Message) -> bool:
     return False
 
 
+def is_transcribable_media(message: types.Message) -> bool:
+    """Any document with an audio track worth transcribing: music, audio
+    files, videos, video notes. Stickers and GIF animations are excluded."""
+    media = message.media
+    if not isinstance(media, types.MessageMediaDocument):
+        return False
+    doc = media.document
+    if not isinstance(doc, types.Document):
+        return False
+    has_av_attr = False
+    for attr in doc.attributes or []:
+        if isinstance(
+            attr, (types.DocumentAttributeSticker, types.DocumentAttributeAnimated)
+        ):
+            return False
+        if isinstance(
+            attr, (types.DocumentAttributeAudio, types.DocumentAttributeVideo)
+        ):
+            has_av_attr = True
+    mime = (doc.mime_type or "").lower()
+    return has_av_attr or mime.startswith(("audio/", "video/"))
+
+
+def get_media_key(message: types.Message) -> str | None:
+    """Stable id of the message's file: the same document or photo has the
+    same key wherever it is sent or forwarded."""
+    media = message.media
+    if isinstance(media, types.MessageMediaDocument) and isinstance(
+        media.document, types.Document
+    ):
+        return f"doc:{media.document.id}"
+    if isinstance(media, types.MessageMediaPhoto) and isinstance(
+        media.photo, types.Photo
+    ):
+        return f"photo:{media.photo.id}"
+    return None
+
+
+def get_media_duration(message: types.Message) -> float:
+    """Duration in seconds of an audio/video document, 0 when unknown."""
+    media = message.media
+    if not isinstance(media, types.MessageMediaDocument):
+        return 0.0
+    doc = media.document
+    if not isinstance(doc, types.Document):
+        return 0.0
+    for attr in doc.attributes or []:
+        if isinstance(
+            attr, (types.DocumentAttributeAudio, types.DocumentAttributeVideo)
+        ):
+            return float(attr.duration or 0)
+    return 0.0
+
+
 def is_private_peer(peer: types.TypePeer | None) -> bool:
     return isinstance(peer, types.PeerUser)
 
@@ -72,6 +130,14 @@ def get_peer_id(message: types.Message) -> str | None:
     return None
 
 
+def get_message_link(message: types.Message) -> str:
+    """t.me link for group/channel messages; private and basic-group
+    messages have no public link, so they are referred to by id."""
+    if isinstance(message.peer_id, types.PeerChannel):
+        return f"https://t.me/c/{message.peer_id.channel_id}/{message.id}"
+    return f"#{message.id}"
+
+
 async def get_replied_message(
     client: TelegramClient, message: types.Message
 ) -> types.Message | None:
@@ -85,6 +151,10 @@ async def get_replied_message(
     return fetched if isinstance(fetched, types.Message) else None
 
 
+async def mark_dialog_unread(client: TelegramClient, peer: types.TypePeer) -> None:
+    await client(MarkDialogUnreadRequest(peer=peer, unread=True))
+
+
 def _utf16_len(text: str) -> int:
     """Telegram counts entity offsets in UTF-16 code units, not codepoints."""
     return len(text.encode("utf-16-le")) // 2
@@ -115,8 +185,8 @@ def _split_text(text: str, max_length: int = MAX_TEXT_LENGTH) -> list[str]:
 
 async def reply_to(
     client: TelegramClient, message: types.Message, text: str
-) -> None:
-    await send_formatted_reply(
+) -> list[types.Message]:
+    return await send_formatted_reply(
         client, message.peer_id, text, reply_to_msg_id=message.id
     )
 
@@ -126,8 +196,9 @@ async def send_formatted_reply(
     peer: object,
     text: str,
     reply_to_msg_id: int | None = None,
-) -> None:
+) -> list[types.Message]:
     chunks = _split_text(text)
+    sent: list[types.Message] = []
 
     for i, chunk in enumerate(chunks):
         final_text = f"{messages.USERBOT_MARK}\n{chunk}"
@@ -140,45 +211,105 @@ async def send_formatted_reply(
             )
         ]
 
-        await client.send_message(
-            peer,
-            final_text,
-            reply_to=reply_to_msg_id if i == 0 else None,
-            formatting_entities=entities,
+        sent.append(
+            await client.send_message(
+                peer,
+                final_text,
+                reply_to=reply_to_msg_id if i == 0 else None,
+                formatting_entities=entities,
+            )
         )
 
+    return sent
+
+
+def _transcription_head(summary: str | None) -> str:
+    if summary:
+        return f"TL;DR:\n{summary}\n\nРасшифровка:\n"
+    return "Расшифровка:\n"
+
+
+def _transcription_chunks(transcript: str, head: str, reserve: int = 0) -> list[str]:
+    max_chunk = MAX_TEXT_LENGTH - len(head) - reserve
+    return _split_text(transcript, max_chunk) if max_chunk > 0 else [transcript]
+
+
+def _format_transcription_chunk(
+    chunk: str, head: str
+) -> tuple[str, list[types.TypeMessageEntity]]:
+    prefix = f"{messages.USERBOT_MARK}\n{head}"
+    entities = [
+        types.MessageEntityBlockquote(
+            offset=_utf16_len(prefix),
+            length=_utf16_len(chunk),
+            collapsed=True,
+        )
+    ]
+    return prefix + chunk, entities
+
 
 async def send_transcription_reply(
     client: TelegramClient,
     message: types.Message,
     transcript: str,
     summary: str | None = None,
-) -> None:
+    *,
+    summary_pending: bool = False,
+) -> list[types.Message]:
     """Reply with a transcript; when a summary exists it stays visible above
-    the collapsed transcript quote."""
-    if not summary:
-        await reply_to(client, message, f"Расшифровка:\n{transcript}")
-        return
+    the collapsed transcript quote.
 
-    head = f"TL;DR:\n{summary}\n\nРасшифровка:\n"
-    max_chunk = MAX_TEXT_LENGTH - len(head)
-    chunks = _split_text(transcript, max_chunk) if max_chunk > 0 else [transcript]
+    With ``summary_pending`` the reply uses the same layout minus the TL;DR
+    and leaves room for ``edit_transcription_summary`` to patch it in.
+    """
+    if not summary and not summary_pending:
+        return await reply_to(client, message, f"Расшифровка:\n{transcript}")
 
-    for i, chunk in enumerate(chunks):
-        prefix = f"{messages.USERBOT_MARK}\n" + (head if i == 0 else "")
-        final_text = prefix + chunk
+    head = _transcription_head(summary)
+    reserve = SUMMARY_RESERVED_CHARS if summary_pending else 0
+    chunks = _transcription_chunks(transcript, head, reserve)
 
-        entities = [
-            types.MessageEntityBlockquote(
-                offset=_utf16_len(prefix),
-                length=_utf16_len(chunk),
-                collapsed=True,
+    sent: list[types.Message] = []
+    for i, chunk in enumerate(chunks):
+        final_text, entities = _format_transcription_chunk(
+            chunk, head if i == 0 else ""
+        )
+        sent.append(
+            await client.send_message(
+                message.peer_id,
+                final_text,
+                reply_to=message.id if i == 0 else None,
+                formatting_entities=entities,
             )
-        ]
+        )
+    return sent
 
-        await client.send_message(
-            message.peer_id,
-            final_text,
-            reply_to=message.id if i == 0 else None,
-            formatting_entities=entities,
+
+async def edit_transcription_summary(
+    client: TelegramClient,
+    first_reply: types.Message,
+    transcript: str,
+    summary: str,
+) -> None:
+    """Patch a TL;DR into the first message of a ``summary_pending`` reply."""
+    chunk = _transcription_chunks(
+        transcript, _transcription_head(None), SUMMARY_RESERVED_CHARS
+    )[0]
+    head = _transcription_head(summary)
+    final_text, entities = _format_transcription_chunk(chunk, head)
+    if len(final_text) > TELEGRAM_MAX_MESSAGE_LENGTH:
+        # An unusually long summary: keep the transcript intact and post the
+        # TL;DR as its own reply instead.
+        await send_formatted_reply(
+            client,
+            first_reply.peer_id,
+            f"TL;DR:\n{summary}",
+            reply_to_msg_id=first_reply.id,
         )
+        return
+    await client.edit_message(
+        first_reply.peer_id,
+        first_reply.id,
+        final_text,
+        formatting_entities=entities,
+    )
@@ -4,6 +4,7 @@ import time
 from telethon import TelegramClient
 from telethon.tl import types
 
+from src_py.telegram_utils.media_fetch import media_fetcher
 from src_py.telegram_utils.utils import get_peer_label
 
 VOICES_DIR = os.path.join(os.getcwd(), "voices")
@@ -23,19 +24,10 @@ async def _save_media(
 ) -> str:
     await _ensure_voices_dir()
     dest = os.path.join(VOICES_DIR, filename)
-    await client.download_media(message, file=dest)
-    return dest
+    return await media_fetcher.fetch_to_file(client, message, dest)
 
 
 async def save_voice_from_message(
     client: TelegramClient, message: types.Message
 ) -> str:
     return await _save_media(client, message, _build_voice_filename(message))
-
-
-async def save_video_note_from_message(
-    client: TelegramClient, message: types.Message
-) -> str:
-    peer = get_peer_label(message)
-    filename = f"videonote-{peer}-{message.id}-{int(time.time() * 1000)}.mp4"
-    return await _save_media(client, message, filename)
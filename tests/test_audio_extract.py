@@ -0,0 +1,128 @@
+import os
+import struct
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from telethon.tl import types
+
+from src_py.telegram_utils import audio_extract
+from src_py.telegram_utils.audio_extract import (
+    SpoolLimitError,
+    _mp4_index_at_end,
+    extract_audio_track,
+)
+from src_py.telegram_utils.utils import is_transcribable_media
+
+
+def _box(name: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), name) + payload
+
+
+def _doc_message(mime: str, attributes: list, size: int = 1000) -> types.Message:
+    doc = types.Document(
+        id=1,
+        access_hash=0,
+        file_reference=b"",
+        date=datetime.now(timezone.utc),
+        mime_type=mime,
+        size=size,
+        dc_id=2,
+        attributes=attributes,
+    )
+    return types.Message(
+        id=1,
+        peer_id=types.PeerUser(1),
+        date=datetime.now(timezone.utc),
+        message="",
+        media=types.MessageMediaDocument(document=doc),
+    )
+
+
+class Mp4IndexAtEndTest(unittest.TestCase):
+    def test_faststart_file_streams(self) -> None:
+        head = _box(b"ftyp", b"isom") + _box(b"moov") + _box(b"mdat")
+        self.assertFalse(_mp4_index_at_end(head))
+
+    def test_mdat_before_moov_needs_spool(self) -> None:
+        head = _box(b"ftyp", b"isom") + _box(b"free") + _box(b"mdat", b"x" * 16)
+        self.assertTrue(_mp4_index_at_end(head))
+
+    def test_non_mp4_streams(self) -> None:
+        self.assertFalse(_mp4_index_at_end(b"OggS\x00\x02" + b"\x00" * 32))
+        self.assertFalse(_mp4_index_at_end(b""))
+
+
+class StubClient:
+    def __init__(self, chunks: list[bytes]) -> None:
+        self.chunks = chunks
+        self.served = 0
+
+    def iter_download(self, _media):
+        return self._serve()
+
+    async def _serve(self):
+        for chunk in self.chunks:
+            self.served += 1
+            yield chunk
+
+
+class SpoolLimitTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patch = patch.object(audio_extract, "VOICES_DIR", self._tmp.name)
+        self._patch.start()
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    async def test_declared_size_over_cap_fails_before_spooling(self) -> None:
+        head = _box(b"ftyp", b"isom") + _box(b"mdat", b"x" * 16)
+        client = StubClient([head, b"y" * 64])
+        message = _doc_message("video/mp4", [], size=10_000)
+
+        with self.assertRaises(SpoolLimitError):
+            await extract_audio_track(client, message, max_spool_bytes=1000)
+
+        self.assertEqual(client.served, 1)
+        self.assertEqual(os.listdir(self._tmp.name), [])
+
+    async def test_spool_stops_at_cap_without_declared_size(self) -> None:
+        head = _box(b"ftyp", b"isom") + _box(b"mdat", b"x" * 16)
+        client = StubClient([head] + [b"y" * 400] * 5)
+        message = _doc_message("video/mp4", [], size=0)
+
+        with self.assertRaises(SpoolLimitError):
+            await extract_audio_track(client, message, max_spool_bytes=1000)
+
+        self.assertLess(client.served, 5)
+        self.assertEqual(os.listdir(self._tmp.name), [])
+
+
+class TranscribableMediaTest(unittest.TestCase):
+    def test_audio_and_video_files(self) -> None:
+        self.assertTrue(is_transcribable_media(_doc_message("audio/mpeg", [])))
+        self.assertTrue(is_transcribable_media(_doc_message("video/mp4", [])))
+        audio_attr = types.DocumentAttributeAudio(duration=10)
+        self.assertTrue(
+            is_transcribable_media(_doc_message("application/octet-stream", [audio_attr]))
+        )
+
+    def test_stickers_and_gifs_are_skipped(self) -> None:
+        video = types.DocumentAttributeVideo(duration=3, w=512, h=512)
+        self.assertFalse(
+            is_transcribable_media(
+                _doc_message("video/mp4", [video, types.DocumentAttributeAnimated()])
+            )
+        )
+        sticker = types.DocumentAttributeSticker(
+            alt="", stickerset=types.InputStickerSetEmpty()
+        )
+        self.assertFalse(is_transcribable_media(_doc_message("video/webm", [sticker])))
+        self.assertFalse(is_transcribable_media(_doc_message("application/pdf", [])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -38,7 +38,7 @@ class BotUnreadPreservationTest(unittest.IsolatedAsyncioTestCase):
             message="video note",
         )
 
-        await bot._preserve_dialog_unread(message)
+        await bot.preserve_dialog_unread(message)
 
         self.assertEqual(len(client.requests), 1)
         self.assertIsInstance(client.requests[0], MarkDialogUnreadRequest)
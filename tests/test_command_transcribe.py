@@ -0,0 +1,127 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from telethon.tl import types
+
+from src_py.application.use_cases import command_transcribe
+from src_py.application.use_cases.command_transcribe import (
+    ALL_UNREAD_ARG,
+    MAX_BACKFILL,
+    _parse_backfill_arg,
+    command_transcribe_voice,
+)
+
+
+def _voice(msg_id: int, *, unread: bool = False, out: bool = False) -> types.Message:
+    return types.Message(
+        id=msg_id,
+        peer_id=types.PeerChannel(5),
+        from_id=types.PeerUser(42),
+        date=datetime.now(timezone.utc),
+        message="",
+        media_unread=unread,
+        out=out,
+    )
+
+
+class StubClient:
+    def __init__(self, history: list[types.Message]) -> None:
+        self.history = history
+        self.sent: list[str] = []
+
+    async def iter_messages(self, _peer, *, limit=None, **_kwargs):
+        for msg in sorted(self.history, key=lambda m: -m.id)[:limit]:
+            yield msg
+
+    async def send_message(self, _peer, text, **_kwargs):
+        self.sent.append(text)
+
+
+class ParseBackfillArgTest(unittest.TestCase):
+    def test_parses_count_and_all_unread(self) -> None:
+        self.assertIsNone(_parse_backfill_arg(".convert"))
+        self.assertEqual(_parse_backfill_arg(".convert 3"), 3)
+        self.assertEqual(_parse_backfill_arg(".convert 999"), MAX_BACKFILL)
+        self.assertEqual(_parse_backfill_arg(".convert all-unread"), ALL_UNREAD_ARG)
+        self.assertIsNone(_parse_backfill_arg(".convert 0"))
+
+
+class BackfillTest(unittest.IsolatedAsyncioTestCase):
+    async def _run(self, client: StubClient, command: str) -> None:
+        async def fake_transcribe(_client, message, **_kwargs) -> str:
+            return f"текст {message.id}"
+
+        async def fake_name(_client, _message) -> str:
+            return "Sender"
+
+        with patch.object(
+            command_transcribe, "transcribe_voice_message", fake_transcribe
+        ), patch.object(command_transcribe, "get_sender_display_name", fake_name):
+            command_message = types.Message(
+                id=100,
+                peer_id=types.PeerChannel(5),
+                date=datetime.now(timezone.utc),
+                message=command,
+            )
+            await command_transcribe_voice(
+                client, command_message, transcriber=object()
+            )
+
+    async def test_last_n_notes_in_one_ordered_reply(self) -> None:
+        client = StubClient([_voice(i) for i in (10, 11, 12, 13)])
+
+        await self._run(client, ".convert 3")
+
+        self.assertEqual(len(client.sent), 1)
+        reply = client.sent[0]
+        self.assertNotIn("текст 10", reply)
+        self.assertLess(reply.index("текст 11"), reply.index("текст 13"))
+        self.assertIn("https://t.me/c/5/12", reply)
+
+    async def test_all_unread_takes_only_unplayed_notes(self) -> None:
+        client = StubClient([_voice(10, unread=True), _voice(11), _voice(12, unread=True)])
+
+        await self._run(client, ".convert all-unread")
+
+        reply = client.sent[0]
+        self.assertIn("текст 10", reply)
+        self.assertNotIn("текст 11", reply)
+        self.assertIn("текст 12", reply)
+        self.assertNotIn("только самые свежие", reply)
+
+    async def test_all_unread_skips_own_notes(self) -> None:
+        client = StubClient(
+            [_voice(10, unread=True), _voice(11, unread=True, out=True)]
+        )
+
+        await self._run(client, ".convert all-unread")
+
+        reply = client.sent[0]
+        self.assertIn("текст 10", reply)
+        self.assertNotIn("текст 11", reply)
+
+    async def test_all_unread_reports_notes_left_out(self) -> None:
+        history = [_voice(i, unread=True) for i in range(1, MAX_BACKFILL + 3)]
+        client = StubClient(history)
+
+        await self._run(client, ".convert all-unread")
+
+        reply = client.sent[0]
+        self.assertIn(f"Расшифровка голосовых: {MAX_BACKFILL}", reply)
+        self.assertIn("только самые свежие", reply)
+        self.assertNotIn("текст 2\n", reply)
+
+    async def test_all_unread_scans_past_played_notes(self) -> None:
+        history = [_voice(1, unread=True)] + [
+            _voice(i) for i in range(2, MAX_BACKFILL + 10)
+        ]
+        client = StubClient(history)
+
+        await self._run(client, ".convert all-unread")
+
+        self.assertIn("текст 1\n", client.sent[0] + "\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,81 @@
+import asyncio
+import random
+import tempfile
+import time
 import unittest
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from unittest.mock import AsyncMock
 
+from telethon import errors
 from telethon.tl import types
 
 from src_py.telegram_utils.deleted_message_tracker import (
+    CACHE_TTL_S,
+    EVICT_SLICE,
+    CachedMedia,
     CachedMessage,
     DeletedMessageTracker,
+    _count_changed_chars,
 )
+from src_py.telegram_utils.tracker_entries import MediaReference
+from src_py.telegram_utils.tracker_store import TrackerStore
+
+
+def _document_message(msg_id: int, *, size: int, voice: bool = False) -> types.Message:
+    attributes = [types.DocumentAttributeAudio(duration=3, voice=True)] if voice else []
+    doc = types.Document(
+        id=500 + msg_id,
+        access_hash=1,
+        file_reference=b"old",
+        date=datetime.now(timezone.utc),
+        mime_type="audio/ogg" if voice else "application/pdf",
+        size=size,
+        dc_id=2,
+        attributes=attributes,
+    )
+    return types.Message(
+        id=msg_id,
+        peer_id=types.PeerUser(42),
+        from_id=types.PeerUser(42),
+        date=datetime.now(timezone.utc),
+        message="",
+        media=types.MessageMediaDocument(document=doc),
+    )
+
+
+class ReferenceClient:
+    """Serves deferred downloads; the first one fails with an expired reference."""
+
+    def __init__(self, *, expire_first: bool = False) -> None:
+        self.expire_first = expire_first
+        self.downloads = 0
+        self.sent_files: list[object] = []
+
+    async def download_file(self, location, file=None, **_kwargs):
+        self.downloads += 1
+        if self.expire_first and location.file_reference == b"old":
+            raise errors.FileReferenceExpiredError(request=None)
+        return b"%PDF"
+
+    async def get_messages(self, _peer, ids=None):
+        fresh = _document_message(ids, size=10_000_000)
+        fresh.media.document.file_reference = b"new"
+        return fresh
+
+    async def download_media(self, _message, file=None):
+        return b"OggS"
+
+    async def send_file(self, _peer, f, **_kwargs):
+        self.sent_files.append(f)
+        return types.Message(
+            id=len(self.sent_files),
+            peer_id=types.PeerChannel(123),
+            media=types.MessageMediaUnsupported(),
+        )
+
+    async def send_message(self, _peer, _text, **_kwargs):
+        pass
 
 
 class DeletedMessageTrackerUnreadOverrideTest(unittest.IsolatedAsyncioTestCase):
@@ -64,6 +132,7 @@ class DeletedMessageTrackerUnreadOverrideTest(unittest.IsolatedAsyncioTestCase):
                 pts_count=1,
             )
         )
+        await self.tracker.flush_forwards()
         self.tracker._send_to_saved.assert_awaited_once()
 
     async def test_opening_marked_dialog_clears_logical_unread_override(self) -> None:
@@ -94,8 +163,615 @@ class DeletedMessageTrackerUnreadOverrideTest(unittest.IsolatedAsyncioTestCase):
                 pts_count=1,
             )
         )
+        await self.tracker.flush_forwards()
         self.tracker._send_to_saved.assert_not_awaited()
 
 
+class DeletedMessageTrackerCapturePolicyTest(unittest.IsolatedAsyncioTestCase):
+    async def test_small_voice_is_eager_and_large_document_is_deferred(self) -> None:
+        client = ReferenceClient()
+        tracker = DeletedMessageTracker(client, self_user_id="1", channel_id=-100123)
+
+        voice = await tracker._extract_cached_media(
+            _document_message(1, size=900, voice=True)
+        )
+        document = await tracker._extract_cached_media(
+            _document_message(2, size=10_000_000)
+        )
+
+        self.assertEqual(voice.data, b"OggS")
+        self.assertTrue(document.is_deferred)
+        self.assertEqual(document.reference.media_id, 502)
+
+    async def test_deferred_media_is_fetched_on_delete_with_refreshed_reference(
+        self,
+    ) -> None:
+        client = ReferenceClient(expire_first=True)
+        tracker = DeletedMessageTracker(client, self_user_id="1", channel_id=-100123)
+        message = _document_message(2, size=10_000_000)
+        media = await tracker._extract_cached_media(message)
+        cached = CachedMessage(
+            message_id=2,
+            text=None,
+            date=message.date,
+            cached_at=0,
+            sender_id="42",
+            sender_name="Sender",
+            peer=message.peer_id,
+            chat_label="user-42",
+            media_description="Document",
+            media=media,
+            channel_id=None,
+        )
+
+        await tracker._send_to_saved("Deleted", cached)
+
+        self.assertEqual(client.downloads, 2)
+        self.assertEqual(len(client.sent_files), 1)
+        stats = tracker.stats()
+        self.assertEqual(stats["deferred_recovered"], 1)
+        self.assertEqual(stats["references_refreshed"], 1)
+
+    async def test_repeated_voice_is_pooled_and_reuses_the_channel_copy(self) -> None:
+        client = ReferenceClient()
+        tracker = DeletedMessageTracker(client, self_user_id="1", channel_id=-100123)
+        cached = []
+        for msg_id in (3, 4):
+            message = _document_message(msg_id, size=900, voice=True)
+            message.media.document.id = 777
+            media = await tracker._extract_cached_media(message)
+            await tracker._media_budget.add(f"msg:{msg_id}", media)
+            cached.append(
+                CachedMessage(
+                    message_id=msg_id,
+                    text=None,
+                    date=message.date,
+                    cached_at=0,
+                    sender_id="42",
+                    sender_name="Sender",
+                    peer=message.peer_id,
+                    chat_label="user-42",
+                    media_description="Voice",
+                    media=media,
+                    channel_id=None,
+                )
+            )
+
+        self.assertEqual(tracker.stats()["captured_eager"], 1)
+        self.assertIs(cached[1].media.data, cached[0].media.data)
+
+        for entry in cached:
+            await tracker._send_to_saved("Deleted", entry)
+
+        self.assertEqual(len(client.sent_files), 2)
+        self.assertIsInstance(client.sent_files[1], types.MessageMediaUnsupported)
+        self.assertEqual(tracker._media_budget.stats()["upload_reuses"], 1)
+
+
+class DeletedMessageTrackerExpiryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tracker = DeletedMessageTracker(
+            client=object(), self_user_id="1", channel_id=-100123
+        )
+
+    def _add(self, msg_id: int, cached_at: float) -> None:
+        key = f"msg:{msg_id}"
+        self.tracker._cache[key] = CachedMessage(
+            message_id=msg_id,
+            text="hi",
+            date=datetime.now(timezone.utc),
+            cached_at=cached_at,
+            sender_id="42",
+            sender_name="Sender",
+            peer=types.PeerUser(42),
+            chat_label="user-42",
+            media_description=None,
+            media=None,
+            channel_id=None,
+        )
+        self.tracker._entry_expiry.schedule(key, cached_at + CACHE_TTL_S)
+
+    def test_expired_entries_are_dropped_in_slices(self) -> None:
+        now = time.time()
+        for msg_id in range(EVICT_SLICE + 10):
+            self._add(msg_id, cached_at=now - CACHE_TTL_S - 1)
+        self._add(10_000, cached_at=now)
+
+        self.assertEqual(self.tracker._evict_expired(now), EVICT_SLICE)
+        self.assertEqual(self.tracker._evict_expired(now), 10)
+        self.assertEqual(self.tracker._evict_expired(now), 0)
+        self.assertEqual(list(self.tracker._cache), ["msg:10000"])
+
+    def test_read_marks_and_unread_overrides_expire(self) -> None:
+        peer = types.PeerUser(42)
+        self.tracker._handle_read_inbox(
+            types.UpdateReadHistoryInbox(
+                peer=peer, max_id=5, still_unread_count=0, pts=1, pts_count=1
+            )
+        )
+        self.tracker.preserve_unread(
+            types.Message(id=5, peer_id=peer, date=None, message="")
+        )
+
+        self.tracker._evict_expired(time.time())
+        self.assertIn("user:42", self.tracker._read_up_to)
+
+        self.tracker._evict_expired(time.time() + CACHE_TTL_S + 1)
+        self.assertEqual(self.tracker._read_up_to, {})
+        self.assertEqual(self.tracker._preserved_unread, {})
+
+
+class BurstClient:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+        self.albums: list[list[object]] = []
+        self.single_files = 0
+
+    async def send_message(self, _peer, text, **_kwargs):
+        self.messages.append(text)
+
+    async def send_file(self, _peer, f, **_kwargs):
+        if isinstance(f, list):
+            self.albums.append(f)
+            return [types.Message(id=i, peer_id=types.PeerChannel(1)) for i in range(len(f))]
+        self.single_files += 1
+        return types.Message(id=0, peer_id=types.PeerChannel(1))
+
+
+class DeletedMessageTrackerBurstTest(unittest.IsolatedAsyncioTestCase):
+    def _tracker(self, client: BurstClient) -> DeletedMessageTracker:
+        tracker = DeletedMessageTracker(
+            client, self_user_id="1", channel_id=-100123, digest_threshold=5
+        )
+        for msg_id in range(1, 15):
+            media = None
+            if msg_id > 10:
+                media = CachedMedia(
+                    data=b"jpeg%d" % msg_id,
+                    media_type="photo",
+                    mime_type="image/jpeg",
+                    file_name="photo.jpg",
+                )
+            tracker._cache[f"msg:{msg_id}"] = CachedMessage(
+                message_id=msg_id,
+                text=f"text {msg_id}",
+                date=datetime.now(timezone.utc),
+                cached_at=0,
+                sender_id="42",
+                sender_name="Sender",
+                peer=types.PeerUser(42),
+                chat_label="user-42",
+                media_description=None,
+                media=media,
+                channel_id=None,
+            )
+        return tracker
+
+    async def _delete(self, tracker: DeletedMessageTracker, ids: list[int]) -> None:
+        await tracker._handle_delete_messages(
+            types.UpdateDeleteMessages(messages=ids, pts=1, pts_count=len(ids))
+        )
+        await tracker.flush_forwards()
+
+    async def test_cleared_chat_becomes_one_digest_and_an_album(self) -> None:
+        client = BurstClient()
+        tracker = self._tracker(client)
+
+        await self._delete(tracker, list(range(1, 15)))
+
+        self.assertEqual(len(client.messages), 1)
+        self.assertIn("Удалено: 14", client.messages[0])
+        self.assertIn("text 3", client.messages[0])
+        self.assertEqual([len(album) for album in client.albums], [4])
+        self.assertEqual(tracker._cache, {})
+        self.assertEqual(tracker.stats()["digests"], 1)
+
+    async def test_small_batches_are_forwarded_live(self) -> None:
+        client = BurstClient()
+        tracker = self._tracker(client)
+
+        await self._delete(tracker, [1, 11])
+
+        self.assertEqual(len(client.messages), 1)
+        self.assertNotIn("#digest", client.messages[0])
+        self.assertEqual(client.single_files, 1)
+        self.assertEqual(client.albums, [])
+        self.assertEqual(tracker.stats()["live_forwards"], 2)
+
+
+class DeletedMessageTrackerEditDebounceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.client = BurstClient()
+        self.tracker = DeletedMessageTracker(
+            self.client,
+            self_user_id="1",
+            channel_id=-100123,
+            batch_window_s=0,
+            edit_quiet_s=0.02,
+        )
+        self.tracker._cache["msg:5"] = CachedMessage(
+            message_id=5,
+            text="встреча в 10 утра",
+            date=datetime.now(timezone.utc),
+            cached_at=0,
+            sender_id="42",
+            sender_name="Sender",
+            peer=types.PeerUser(42),
+            chat_label="user-42",
+            media_description=None,
+            media=None,
+            channel_id=None,
+        )
+
+    async def _edit(self, text: str) -> None:
+        await self.tracker._handle_edit_message(
+            types.UpdateEditMessage(
+                message=types.Message(
+                    id=5,
+                    peer_id=types.PeerUser(42),
+                    from_id=types.PeerUser(42),
+                    date=datetime.now(timezone.utc),
+                    message=text,
+                ),
+                pts=1,
+                pts_count=1,
+            )
+        )
+
+    async def test_repeated_edits_post_one_diff_from_the_original(self) -> None:
+        for text in ("встреча в 11 утра", "встреча в 11:30 утра", "встреча в 12 дня"):
+            await self._edit(text)
+        self.assertEqual(self.client.messages, [])
+
+        await asyncio.sleep(0.05)
+        await self.tracker.flush_forwards()
+
+        self.assertEqual(len(self.client.messages), 1)
+        self.assertIn("-встреча в 10 утра", self.client.messages[0])
+        self.assertIn("+встреча в 12 дня", self.client.messages[0])
+        stats = self.tracker.stats()
+        self.assertEqual((stats["edits_seen"], stats["edits_settled"]), (3, 1))
+
+    async def test_edits_back_to_the_original_post_nothing(self) -> None:
+        await self._edit("встреча в 11 утра")
+        await self._edit("встреча в 10 утра")
+
+        await asyncio.sleep(0.05)
+        await self.tracker.flush_forwards()
+
+        self.assertEqual(self.client.messages, [])
+
+    async def test_edit_keeps_the_read_mark_alive_with_the_entry(self) -> None:
+        await self._edit("встреча отменяется")
+        # Read while the edit is still settling; the mark is set before the
+        # next edit, so on its own it would expire first.
+        self.tracker._set_read_mark("user:42", 5)
+        self.tracker._read_expiry.schedule("user:42", time.time() + 10)
+        await self._edit("встреча переносится")
+
+        self.tracker._evict_expired(time.time() + 100)
+
+        self.assertIn("msg:5", self.tracker._cache)
+        self.assertFalse(self.tracker._is_unread(self.tracker._cache["msg:5"]))
+
+    async def test_edit_moves_the_stored_row_past_eviction(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = TrackerStore(tmp.name, ttl_s=CACHE_TTL_S, flush_interval_s=60)
+        await store.open()
+        self.addAsyncCleanup(store.close)
+        self.tracker._store = store
+        store.put("msg:5", self.tracker._cache["msg:5"])
+        await store.flush()
+        evicted: list[int] = []
+
+        async def extract(_msg):
+            return CachedMedia(
+                data=b"jpeg",
+                media_type="photo",
+                mime_type="image/jpeg",
+                file_name="photo.jpg",
+            )
+
+        async def add_media(_key, _media):
+            # An eviction pass lands while the edit waits on the media budget.
+            evicted.append(await store.evict_expired())
+
+        self.tracker._extract_cached_media = extract
+        self.tracker._media_budget.add = add_media
+        await self._edit("встреча отменяется")
+        await store.close()
+
+        entries, _read_state = await store.open()
+        self.assertEqual(evicted, [0])
+        self.assertEqual(entries["msg:5"].text, "встреча отменяется")
+        self.assertGreater(entries["msg:5"].cached_at, time.time() - 60)
+
+    async def test_deletion_flushes_the_pending_edit_first(self) -> None:
+        await self._edit("встреча отменяется")
+        await self.tracker._handle_delete_messages(
+            types.UpdateDeleteMessages(messages=[5], pts=2, pts_count=1)
+        )
+        await self.tracker.flush_forwards()
+
+        self.assertEqual(len(self.client.messages), 2)
+        self.assertIn("#edited", self.client.messages[0])
+        self.assertIn("#deleted", self.client.messages[1])
+
+
+class DeletedMessageTrackerGroupTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.client = BurstClient()
+        self.tracker = DeletedMessageTracker(
+            self.client,
+            self_user_id="1",
+            channel_id=-100123,
+            batch_window_s=0,
+            group_ids={"777", "55"},
+            group_max_entries=3,
+            group_max_bytes=1024,
+        )
+
+    async def _post(self, peer: types.TypePeer, msg_id: int, text: str) -> None:
+        await self.tracker.cache_message(
+            types.Message(
+                id=msg_id, peer_id=peer, date=datetime.now(timezone.utc), message=text
+            )
+        )
+
+    async def test_opted_in_supergroup_deletions_are_forwarded(self) -> None:
+        await self._post(types.PeerChannel(777), 10, "важное")
+
+        await self.tracker._handle_delete_messages(
+            types.UpdateDeleteChannelMessages(
+                channel_id=777, messages=[10], pts=1, pts_count=1
+            )
+        )
+        await self.tracker.flush_forwards()
+
+        self.assertEqual(len(self.client.messages), 1)
+        self.assertIn("важное", self.client.messages[0])
+        self.assertEqual(self.tracker._cache, {})
+        self.assertEqual(self.tracker.stats()["group_chats"], 0)
+
+    async def test_groups_not_listed_are_ignored(self) -> None:
+        await self._post(types.PeerChannel(888), 10, "шум")
+        await self._post(types.PeerChat(999), 11, "шум")
+
+        self.assertEqual(self.tracker._cache, {})
+
+    async def test_quota_drops_the_chats_oldest_entries(self) -> None:
+        await self._post(types.PeerUser(42), 1, "личное")
+        for msg_id in range(2, 7):
+            await self._post(types.PeerChat(55), msg_id, f"группа {msg_id}")
+        await self._post(types.PeerChat(55), 7, "x" * 2000)
+
+        # The oversized message pushes everything older out of the chat.
+        self.assertEqual(list(self.tracker._cache), ["msg:1", "msg:7"])
+        stats = self.tracker.stats()
+        self.assertEqual(stats["quota_evictions"], 5)
+        self.assertEqual(stats["group_entries"], 1)
+
+    async def test_large_deferred_file_does_not_evict_the_chats_texts(self) -> None:
+        await self._post(types.PeerChat(55), 1, "первое")
+        await self._post(types.PeerChat(55), 2, "второе")
+        cached = CachedMessage(
+            message_id=3,
+            text=None,
+            date=datetime.now(timezone.utc),
+            cached_at=time.time(),
+            sender_id="42",
+            sender_name="Sender",
+            peer=types.PeerChat(55),
+            chat_label="chat-55",
+            media_description="[Видео]",
+            media=CachedMedia(
+                data=None,
+                media_type="document",
+                mime_type="video/mp4",
+                file_name="long.mp4",
+                reference=MediaReference(
+                    location=types.InputDocumentFileLocation(
+                        id=3, access_hash=0, file_reference=b"", thumb_size=""
+                    ),
+                    dc_id=2,
+                    size=20 * 1024 * 1024,
+                ),
+            ),
+            channel_id=None,
+        )
+        self.tracker._cache["msg:3"] = cached
+        self.tracker._charge_quota("msg:3", cached)
+
+        self.assertEqual(list(self.tracker._cache), ["msg:1", "msg:2", "msg:3"])
+        self.assertEqual(self.tracker.stats()["quota_evictions"], 0)
+        self.assertLess(self.tracker._chat_bytes["chat:55"], 1024)
+
+
+class ArchiveClient:
+    def __init__(self, archived: list[types.TypePeer]) -> None:
+        self.archived = archived
+        self.requests: list[object] = []
+        self.scans = 0
+
+    async def __call__(self, request: object) -> object:
+        self.requests.append(request)
+        return types.messages.DialogsSlice(
+            count=len(self.archived), dialogs=[], messages=[], chats=[], users=[]
+        )
+
+    async def iter_dialogs(self, folder: int):
+        self.scans += 1
+        for peer in self.archived:
+            yield SimpleNamespace(dialog=SimpleNamespace(peer=peer))
+
+
+class DeletedMessageTrackerArchiveTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.client = ArchiveClient([types.PeerUser(42), types.PeerChannel(7)])
+        self.tracker = DeletedMessageTracker(
+            self.client, self_user_id="1", channel_id=-100123
+        )
+        await self.tracker._refresh_archived_peers()
+
+    async def _move(self, peer: types.TypePeer, folder_id: int) -> None:
+        await self.tracker._on_raw_update(
+            types.UpdateFolderPeers(
+                folder_peers=[types.FolderPeer(peer=peer, folder_id=folder_id)],
+                pts=1,
+                pts_count=1,
+            )
+        )
+
+    async def test_folder_updates_keep_the_archive_current(self) -> None:
+        await self._move(types.PeerUser(42), 0)
+        await self._move(types.PeerChat(9), 1)
+
+        self.assertFalse(self.tracker._should_skip_peer(types.PeerUser(42)))
+        self.assertTrue(self.tracker._should_skip_peer(types.PeerChat(9)))
+        self.assertTrue(self.tracker._should_skip_peer(types.PeerChannel(7)))
+
+    async def test_check_rescans_only_on_drift(self) -> None:
+        await self.tracker._check_archived_peers()
+        self.assertEqual(self.client.scans, 1)
+        self.assertEqual(self.client.requests[0].limit, 1)
+
+        # Archived from a session whose update never reached us.
+        self.client.archived.append(types.PeerUser(43))
+        await self.tracker._check_archived_peers()
+
+        self.assertEqual(self.client.scans, 2)
+        self.assertTrue(self.tracker._should_skip_peer(types.PeerUser(43)))
+        self.assertEqual(self.tracker.stats()["archive_drifts"], 1)
+
+
+class PrimeClient:
+    def __init__(self) -> None:
+        self.peer_dialog_requests: list[object] = []
+        self.history_calls: list[tuple[object, int, int]] = []
+
+    async def iter_dialogs(self, limit: int, folder: int):
+        for user_id, read_max, unread in ((42, 100, 2), (43, 7, 0)):
+            yield SimpleNamespace(
+                dialog=types.Dialog(
+                    peer=types.PeerUser(user_id),
+                    top_message=read_max + unread,
+                    read_inbox_max_id=read_max,
+                    read_outbox_max_id=0,
+                    unread_count=unread,
+                    unread_mentions_count=0,
+                    unread_reactions_count=0,
+                    unread_poll_votes_count=0,
+                    notify_settings=types.PeerNotifySettings(),
+                ),
+                unread_count=unread,
+                input_entity=types.InputPeerUser(user_id, 0),
+            )
+
+    async def get_input_entity(self, peer):
+        return types.InputPeerUser(peer.user_id, 0)
+
+    async def get_entity(self, peer):
+        return types.User(id=peer.user_id, first_name="Sender")
+
+    async def __call__(self, request: object) -> object:
+        self.peer_dialog_requests.append(request)
+        return SimpleNamespace(
+            dialogs=[
+                SimpleNamespace(
+                    peer=types.PeerUser(p.peer.user_id), read_inbox_max_id=30
+                )
+                for p in request.peers
+            ]
+        )
+
+    async def get_messages(self, peer, limit: int, min_id: int):
+        self.history_calls.append((peer, limit, min_id))
+        return [
+            types.Message(
+                id=msg_id,
+                peer_id=types.PeerUser(42),
+                date=datetime.now(timezone.utc),
+                message=f"пропущенное {msg_id}",
+            )
+            for msg_id in (102, 101)
+        ]
+
+
+class DeletedMessageTrackerPrimeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cold_start_restores_read_state_and_unread_tail(self) -> None:
+        client = PrimeClient()
+        tracker = DeletedMessageTracker(
+            client, self_user_id="1", channel_id=-100123, prime_interval_s=0
+        )
+        # Restored from disk, in a chat beyond the recent-dialog page.
+        tracker._cache["msg:20"] = CachedMessage(
+            message_id=20,
+            text="старое",
+            date=datetime.now(timezone.utc),
+            cached_at=time.time(),
+            sender_id="77",
+            sender_name="Old",
+            peer=types.PeerUser(77),
+            chat_label="user-77",
+            media_description=None,
+            media=None,
+            channel_id=None,
+        )
+        tracker._read_up_to["user:43"] = 9
+
+        await tracker._prime()
+
+        self.assertEqual(
+            tracker._read_up_to, {"user:42": 100, "user:43": 9, "user:77": 30}
+        )
+        self.assertEqual(len(client.peer_dialog_requests), 1)
+        self.assertEqual(len(client.history_calls), 1)
+        self.assertEqual(client.history_calls[0][1:], (2, 100))
+        self.assertEqual(list(tracker._cache), ["msg:20", "msg:101", "msg:102"])
+        self.assertTrue(tracker._is_unread(tracker._cache["msg:101"]))
+        self.assertFalse(tracker._is_unread(tracker._cache["msg:20"]))
+        stats = tracker.stats()
+        self.assertEqual((stats["primed_dialogs"], stats["primed_messages"]), (1, 2))
+
+
+class CountChangedCharsTest(unittest.TestCase):
+    def test_matches_full_edit_distance_below_the_cap(self) -> None:
+        rng = random.Random(7)
+        for _ in range(2000):
+            old = "".join(rng.choice("аб ") for _ in range(rng.randrange(12)))
+            new = list(old)
+            for _ in range(rng.randrange(5)):
+                pos = rng.randrange(len(new) + 1)
+                if rng.random() < 0.5 or not new:
+                    new.insert(pos, rng.choice("аб "))
+                else:
+                    del new[min(pos, len(new) - 1)]
+            new = "".join(new)
+            for limit in (1, 3, 5):
+                self.assertEqual(
+                    _count_changed_chars(old, new, limit),
+                    min(_levenshtein(old, new), limit),
+                    (old, new, limit),
+                )
+
+    def test_long_texts_stop_at_the_cap(self) -> None:
+        old = "слово " * 1000
+        self.assertEqual(_count_changed_chars(old, old.replace("с", "c", 1)), 1)
+        self.assertEqual(_count_changed_chars(old, old[::-1]), 3)
+        self.assertEqual(_count_changed_chars(None, "abcd"), 3)
+        self.assertEqual(_count_changed_chars("ab", None), 2)
+
+
+def _levenshtein(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        cur = [i]
+        for j, other in enumerate(b, 1):
+            cur.append(min(prev[j - 1] + (char != other), prev[j] + 1, cur[-1] + 1))
+        prev = cur
+    return prev[-1]
+
+
 if __name__ == "__main__":
     unittest.main()
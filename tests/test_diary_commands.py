@@ -0,0 +1,97 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from telethon.tl import types
+
+from src_py.application.diary import commands
+from src_py.application.diary.commands import command_diary
+
+
+def _voice_doc() -> types.MessageMediaDocument:
+    return types.MessageMediaDocument(
+        document=types.Document(
+            id=7,
+            access_hash=0,
+            file_reference=b"",
+            date=datetime.now(timezone.utc),
+            mime_type="audio/ogg",
+            size=100,
+            dc_id=2,
+            attributes=[types.DocumentAttributeAudio(duration=5, voice=True)],
+        )
+    )
+
+
+class StubDeadHand:
+    def is_released(self) -> bool:
+        return False
+
+
+class StubClient:
+    def __init__(self) -> None:
+        self.events: list[str] = []
+
+    async def send_message(self, _peer, text, **kwargs):
+        self.events.append(f"send:{text.splitlines()[0]}:{kwargs.get('reply_to')}")
+
+    async def forward_messages(self, _peer, msg):
+        self.events.append("forward")
+        return types.Message(id=500, peer_id=types.PeerChannel(9), message="")
+
+    async def delete_messages(self, _peer, _ids, **_kwargs):
+        self.events.append("delete")
+
+
+class CommandDiaryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_entry_is_stored_before_transcription_finishes(self) -> None:
+        release = asyncio.Event()
+
+        async def slow_transcribe(_client, _message, **kwargs) -> str:
+            self.assertTrue(kwargs["on_demand"])
+            await release.wait()
+            return "привет"
+
+        voice = types.Message(
+            id=10,
+            peer_id=types.PeerUser(1),
+            from_id=types.PeerUser(1),
+            date=datetime.now(timezone.utc),
+            message="",
+            media=_voice_doc(),
+        )
+        command = types.Message(id=11, peer_id=types.PeerUser(1), message=".diary")
+
+        async def replied(_client, _message):
+            return voice
+
+        async def sender_name(_client, _message):
+            return "Alice"
+
+        client = StubClient()
+        with (
+            patch.object(commands, "transcribe_voice_message", slow_transcribe),
+            patch.object(commands, "get_replied_message", replied),
+            patch.object(commands, "get_sender_display_name", sender_name),
+        ):
+            await command_diary(
+                client,
+                command,
+                channel_id=9,
+                dead_hand=StubDeadHand(),
+                transcriber=object(),
+            )
+            self.assertEqual(client.events[-1], "delete")
+            self.assertFalse(any("#transcript" in e for e in client.events))
+
+            release.set()
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+        self.assertTrue(client.events[-1].startswith("send:#diary #transcript"))
+        self.assertTrue(client.events[-1].endswith(":500"))
+
+
+if __name__ == "__main__":
+    unittest.main()
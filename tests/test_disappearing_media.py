@@ -0,0 +1,118 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from telethon.tl import types
+
+from src_py.application.use_cases import disappearing_media
+from src_py.application.use_cases.disappearing_media import DisappearingMediaCapture
+from src_py.telegram_utils.media_fetch import MediaFetcher
+
+
+def _ttl_voice(msg_id: int, size: int = 4) -> types.Message:
+    doc = types.Document(
+        id=9,
+        access_hash=0,
+        file_reference=b"",
+        date=datetime.now(timezone.utc),
+        mime_type="audio/ogg",
+        size=size,
+        dc_id=2,
+        attributes=[types.DocumentAttributeAudio(duration=3, voice=True)],
+    )
+    return types.Message(
+        id=msg_id,
+        peer_id=types.PeerUser(7),
+        from_id=types.PeerUser(7),
+        date=datetime.now(timezone.utc),
+        message="",
+        media=types.MessageMediaDocument(document=doc, ttl_seconds=30),
+    )
+
+
+class StubClient:
+    def __init__(self, suffix: str = "") -> None:
+        self.suffix = suffix
+        self.downloads: list[object] = []
+        self.uploads: list[tuple[str, dict]] = []
+
+    async def download_media(self, _message, file=None):
+        self.downloads.append(file)
+        if file is bytes:
+            return b"OggS"
+        # Like Telethon, which may append an extension to the given path.
+        path = file + self.suffix
+        with open(path, "wb") as f:
+            f.write(b"OggS")
+        return path
+
+    async def send_file(self, _peer, path, **kwargs):
+        self.uploads.append((os.path.basename(path), kwargs))
+
+    async def send_message(self, _peer, _text, **_kwargs):
+        pass
+
+
+class DisappearingMediaCaptureTest(unittest.IsolatedAsyncioTestCase):
+    async def test_voice_is_captured_once_with_its_real_type(self) -> None:
+        client = StubClient()
+        capture = DisappearingMediaCapture(client, channel_id="me")
+
+        async def sender_name(_client, _message):
+            return "Alice"
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(disappearing_media, "CAPTURE_DIR", tmp),
+            patch.object(disappearing_media, "get_sender_display_name", sender_name),
+            patch.object(disappearing_media, "media_fetcher", MediaFetcher()),
+        ):
+            update = types.UpdateNewMessage(message=_ttl_voice(5), pts=1, pts_count=1)
+            await capture._on_raw_update(update)
+            await capture._on_raw_update(update)
+            for _ in range(100):
+                if not os.listdir(tmp) and client.uploads:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(os.listdir(tmp), [])
+
+        self.assertEqual(len(client.downloads), 1)
+        name, kwargs = client.uploads[0]
+        self.assertTrue(name.endswith("voice.ogg"))
+        self.assertTrue(kwargs["voice_note"])
+        self.assertIn("#disappearing", kwargs["caption"])
+        self.assertEqual(capture.stats()["captured"], 1)
+        self.assertEqual(capture.stats()["slower_than_ttl"], 0)
+
+    async def test_file_saved_under_another_name_is_removed(self) -> None:
+        client = StubClient(suffix=".oga")
+        capture = DisappearingMediaCapture(client, channel_id="me")
+
+        async def sender_name(_client, _message):
+            return "Alice"
+
+        fetcher = MediaFetcher(budget_bytes=1)
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(disappearing_media, "CAPTURE_DIR", tmp),
+            patch.object(disappearing_media, "get_sender_display_name", sender_name),
+            patch.object(disappearing_media, "media_fetcher", fetcher),
+        ):
+            await capture._capture(_ttl_voice(6, size=100))
+            self.assertEqual(os.listdir(tmp), [])
+
+        self.assertEqual(client.uploads[0][0], "user-7-6-voice.ogg.oga")
+
+    def test_sender_file_names_cannot_leave_the_capture_dir(self) -> None:
+        safe = disappearing_media._safe_file_name
+        self.assertEqual(safe("../../etc/passwd"), "passwd")
+        self.assertEqual(safe("..\\..\\boot.ini"), "boot.ini")
+        self.assertEqual(safe(".."), "file")
+        self.assertEqual(safe("отчёт.pdf"), "отчёт.pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+
+from src_py.impl.extractive_summarizer import (
+    ExtractiveSummarizer,
+    extract_key_sentences,
+)
+from src_py.impl.racing_summarizer import RacingSummarizer
+
+
+class ExtractKeySentencesTest(unittest.TestCase):
+    def test_picks_central_sentences_in_original_order(self) -> None:
+        text = (
+            "Завтра встречаемся у офиса в десять утра. "
+            "Погода сегодня странная. "
+            "Не забудь взять документы для встречи у офиса. "
+            "Кот опять уронил цветок. "
+            "После встречи у офиса подпишем документы."
+        )
+
+        sentences = extract_key_sentences(text, 2)
+
+        self.assertEqual(len(sentences), 2)
+        self.assertNotIn("Кот опять уронил цветок.", sentences)
+        positions = [text.index(s) for s in sentences]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_unpunctuated_text_is_split_into_windows(self) -> None:
+        text = " ".join(["слово"] * 200)
+
+        sentences = extract_key_sentences(text, 3)
+
+        self.assertEqual(len(sentences), 3)
+
+    def test_english_text(self) -> None:
+        text = (
+            "The deploy is scheduled for Friday evening. "
+            "I had pasta for lunch. "
+            "Please review the deploy checklist before Friday."
+        )
+
+        self.assertNotIn("I had pasta for lunch.", extract_key_sentences(text, 2))
+
+
+class ExtractiveSummarizerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_summary_uses_bullet_format(self) -> None:
+        text = "Первое важное предложение про проект. " * 60
+
+        summary = await ExtractiveSummarizer().summarize(text)
+
+        self.assertIsNotNone(summary)
+        self.assertTrue(all(line.startswith("• ") for line in summary.splitlines()))
+        self.assertLessEqual(len(summary.splitlines()), 4)
+
+
+class StaticSummarizer:
+    def __init__(self, result: str | None, delay: float = 0) -> None:
+        self.result = result
+        self.delay = delay
+
+    async def summarize(self, _text: str) -> str | None:
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+class RacingSummarizerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_primary_within_budget_wins(self) -> None:
+        racing = RacingSummarizer(
+            StaticSummarizer("• groq"), StaticSummarizer("• local"), latency_budget_s=1
+        )
+
+        self.assertEqual(await racing.summarize("text"), "• groq")
+
+    async def test_slow_primary_falls_back(self) -> None:
+        racing = RacingSummarizer(
+            StaticSummarizer("• groq", delay=1),
+            StaticSummarizer("• local"),
+            latency_budget_s=0.01,
+        )
+
+        self.assertEqual(await racing.summarize("text"), "• local")
+
+    async def test_failed_primary_falls_back(self) -> None:
+        racing = RacingSummarizer(
+            StaticSummarizer(None), StaticSummarizer("• local"), latency_budget_s=1
+        )
+
+        self.assertEqual(await racing.summarize("text"), "• local")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from src_py.impl import groq_summarizer
+from src_py.impl.groq_summarizer import (
+    REDUCE_PROMPT,
+    SYSTEM_PROMPT,
+    GroqSummarizer,
+    _split_into_chunks,
+)
+
+
+class SplitIntoChunksTest(unittest.TestCase):
+    def test_short_text_is_one_chunk(self) -> None:
+        self.assertEqual(_split_into_chunks("Привет. Как дела?", 100), ["Привет. Как дела?"])
+
+    def test_long_text_is_split_at_sentence_ends(self) -> None:
+        text = " ".join(f"Предложение номер {i}." for i in range(50))
+
+        chunks = _split_into_chunks(text, 120)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 120 for c in chunks))
+        self.assertTrue(all(c.endswith(".") for c in chunks))
+        self.assertEqual(" ".join(chunks), text)
+
+    def test_sentence_longer_than_chunk_is_split_at_spaces(self) -> None:
+        text = "слово " * 100
+
+        chunks = _split_into_chunks(text.strip(), 50)
+
+        self.assertTrue(all(len(c) <= 50 for c in chunks))
+        self.assertEqual(" ".join(chunks), text.strip())
+
+
+class MapReduceSummarizeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_long_transcript_is_mapped_then_reduced(self) -> None:
+        summarizer = GroqSummarizer("key")
+        calls: list[tuple[str, str]] = []
+
+        async def fake_complete(_session, system_prompt: str, text: str) -> str:
+            calls.append((system_prompt, text))
+            if system_prompt == REDUCE_PROMPT:
+                return "• итог"
+            return f"• часть {len(calls)}"
+
+        summarizer._complete = fake_complete
+        original = groq_summarizer.CHUNK_CHARS
+        groq_summarizer.CHUNK_CHARS = 100
+        try:
+            text = " ".join(f"Предложение номер {i}." for i in range(30))
+            result = await summarizer.summarize(text)
+        finally:
+            groq_summarizer.CHUNK_CHARS = original
+
+        self.assertEqual(result, "• итог")
+        map_calls = [c for c in calls if c[0] == SYSTEM_PROMPT]
+        self.assertGreater(len(map_calls), 1)
+        self.assertEqual(calls[-1][0], REDUCE_PROMPT)
+        self.assertIn("Часть 1:", calls[-1][1])
+
+    async def test_failed_part_does_not_drop_the_summary(self) -> None:
+        summarizer = GroqSummarizer("key")
+        calls: list[str] = []
+
+        async def fake_complete(_session, system_prompt: str, _text: str) -> str:
+            calls.append(system_prompt)
+            if len(calls) == 1:
+                raise TimeoutError()
+            return "• итог" if system_prompt == REDUCE_PROMPT else "• часть"
+
+        summarizer._complete = fake_complete
+        original = groq_summarizer.CHUNK_CHARS
+        groq_summarizer.CHUNK_CHARS = 100
+        try:
+            text = " ".join(f"Предложение номер {i}." for i in range(30))
+            result = await summarizer.summarize(text)
+        finally:
+            groq_summarizer.CHUNK_CHARS = original
+
+        self.assertEqual(result, "• итог")
+        self.assertEqual(calls[-1], REDUCE_PROMPT)
+
+    async def test_short_transcript_is_one_request(self) -> None:
+        summarizer = GroqSummarizer("key")
+        calls: list[str] = []
+
+        async def fake_complete(_session, system_prompt: str, _text: str) -> str:
+            calls.append(system_prompt)
+            return "• суть"
+
+        summarizer._complete = fake_complete
+
+        self.assertEqual(await summarizer.summarize("Короткий текст."), "• суть")
+        self.assertEqual(calls, [SYSTEM_PROMPT])
+
+
+if __name__ == "__main__":
+    unittest.main()
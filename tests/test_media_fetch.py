@@ -0,0 +1,133 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.telegram_utils.media_fetch import MediaFetcher
+
+
+def _doc_message(msg_id: int, doc_id: int, size: int = 4) -> types.Message:
+    doc = types.Document(
+        id=doc_id,
+        access_hash=0,
+        file_reference=b"",
+        date=datetime.now(timezone.utc),
+        mime_type="audio/ogg",
+        size=size,
+        dc_id=2,
+        attributes=[],
+    )
+    return types.Message(
+        id=msg_id,
+        peer_id=types.PeerUser(1),
+        date=datetime.now(timezone.utc),
+        message="",
+        media=types.MessageMediaDocument(document=doc),
+    )
+
+
+class StubClient:
+    def __init__(self, payload: bytes = b"OggS") -> None:
+        self.payload = payload
+        self.downloads = 0
+
+    async def download_media(self, _message, file=None):
+        self.downloads += 1
+        await asyncio.sleep(0.01)
+        if isinstance(file, str):
+            with open(file, "wb") as f:
+                f.write(self.payload)
+            return file
+        return self.payload
+
+
+class StubDownloader:
+    def __init__(self) -> None:
+        self.files: list[str] = []
+
+    async def download_to_file(self, _message, dest):
+        self.files.append(dest)
+        with open(dest, "wb") as f:
+            f.write(b"parts")
+        return dest
+
+
+class MediaFetcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_consumers_share_one_download(self) -> None:
+        fetcher = MediaFetcher()
+        client = StubClient()
+        message = _doc_message(1, doc_id=10)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "voice.ogg")
+            data, path = await asyncio.gather(
+                fetcher.fetch_bytes(client, message),
+                fetcher.fetch_to_file(client, message, dest),
+            )
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"OggS")
+
+        self.assertEqual(data, b"OggS")
+        self.assertEqual(client.downloads, 1)
+        self.assertEqual(fetcher.stats()["joined"], 1)
+
+    async def test_later_consumer_is_served_from_memory(self) -> None:
+        fetcher = MediaFetcher()
+        client = StubClient()
+
+        await fetcher.fetch_bytes(client, _doc_message(1, doc_id=10))
+        # A forward of the same document is the same media.
+        await fetcher.fetch_bytes(client, _doc_message(2, doc_id=10))
+
+        self.assertEqual(client.downloads, 1)
+        self.assertEqual(fetcher.stats()["hits"], 1)
+
+    async def test_byte_budget_evicts_oldest(self) -> None:
+        fetcher = MediaFetcher(budget_bytes=6)
+        client = StubClient()
+
+        await fetcher.fetch_bytes(client, _doc_message(1, doc_id=10))
+        await fetcher.fetch_bytes(client, _doc_message(2, doc_id=11))
+        await fetcher.fetch_bytes(client, _doc_message(3, doc_id=10))
+
+        self.assertEqual(client.downloads, 3)
+        self.assertEqual(fetcher.stats()["entries"], 1)
+
+    async def test_files_over_the_budget_stream_to_disk(self) -> None:
+        fetcher = MediaFetcher(budget_bytes=6)
+        client = StubClient()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "video.mp4")
+            path = await fetcher.fetch_to_file(
+                client, _doc_message(1, doc_id=10, size=100), dest
+            )
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"OggS")
+
+        stats = fetcher.stats()
+        self.assertEqual((stats["streamed"], stats["entries"]), (1, 0))
+
+    async def test_large_files_use_the_parallel_downloader(self) -> None:
+        fetcher = MediaFetcher(budget_bytes=6)
+        downloader = StubDownloader()
+        fetcher.configure(downloader=downloader)
+        client = StubClient()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "video.mp4")
+            path = await fetcher.fetch_to_file(
+                client, _doc_message(1, doc_id=10, size=100), dest
+            )
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"parts")
+
+        self.assertEqual(downloader.files, [dest])
+        self.assertEqual(client.downloads, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.telegram_utils.parallel_download import (
+    PART_SIZE,
+    ParallelDownloader,
+    _DcPool,
+    _plan_parts,
+)
+
+
+def _doc_message(size: int) -> types.Message:
+    doc = types.Document(
+        id=1,
+        access_hash=2,
+        file_reference=b"ref",
+        date=datetime.now(timezone.utc),
+        mime_type="video/mp4",
+        size=size,
+        dc_id=4,
+        attributes=[],
+    )
+    return types.Message(
+        id=1,
+        peer_id=types.PeerUser(1),
+        date=datetime.now(timezone.utc),
+        message="",
+        media=types.MessageMediaDocument(document=doc),
+    )
+
+
+class StubSession:
+    dc_id = 2
+    auth_key = None
+
+
+class StubClient:
+    def __init__(self) -> None:
+        self.fallbacks = 0
+        self.session = StubSession()
+
+    async def download_media(self, _message, file=None):
+        self.fallbacks += 1
+        if isinstance(file, str):
+            with open(file, "wb") as f:
+                f.write(b"single")
+            return file
+        return b"single"
+
+
+class FakePartsDownloader(ParallelDownloader):
+    """Serves parts from an in-memory blob instead of pooled senders."""
+
+    def __init__(self, client, blob: bytes, **kwargs) -> None:
+        super().__init__(client, **kwargs)
+        self.blob = blob
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _senders(self, pool, count):
+        return [object()] * count
+
+    async def _fetch_part(self, sender, location, offset, limit):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Later parts answer first so writes land out of order.
+        await asyncio.sleep(0.001 * (len(self.blob) - offset) / PART_SIZE)
+        self.in_flight -= 1
+        return self.blob[offset : offset + limit]
+
+
+class PlanPartsTest(unittest.TestCase):
+    def test_parts_cover_file_without_crossing_megabytes(self) -> None:
+        parts = _plan_parts(3 * PART_SIZE + 10)
+        self.assertEqual(len(parts), 4)
+        for offset, limit in parts:
+            self.assertEqual(offset // (1 << 20), (offset + limit - 1) // (1 << 20))
+
+
+class ParallelDownloaderTest(unittest.IsolatedAsyncioTestCase):
+    async def test_parts_are_fetched_concurrently_and_reassembled(self) -> None:
+        blob = bytes(range(256)) * (5 * PART_SIZE // 256) + b"tail"
+        client = StubClient()
+        downloader = FakePartsDownloader(client, blob, connections=3)
+
+        data = await downloader.download_media(_doc_message(len(blob)))
+
+        self.assertEqual(data, blob)
+        self.assertEqual(downloader.max_in_flight, 3)
+        self.assertEqual(client.fallbacks, 0)
+        self.assertEqual(downloader.stats()["parallel"], 1)
+
+    async def test_small_documents_use_single_stream(self) -> None:
+        client = StubClient()
+        downloader = FakePartsDownloader(client, b"")
+
+        data = await downloader.download_media(_doc_message(1000))
+
+        self.assertEqual(data, b"single")
+        self.assertEqual(client.fallbacks, 1)
+
+    async def test_short_read_falls_back(self) -> None:
+        client = StubClient()
+        downloader = FakePartsDownloader(client, b"x" * 100)
+
+        data = await downloader.download_media(_doc_message(5 * PART_SIZE))
+
+        self.assertEqual(data, b"single")
+        self.assertEqual(downloader.stats()["failures"], 1)
+
+
+class FakeSender:
+    def __init__(self) -> None:
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def disconnect(self) -> None:
+        self.connected = False
+
+
+class PooledSendersTest(unittest.IsolatedAsyncioTestCase):
+    def _pool(self, downloader, dc_id: int, idle_for: float) -> _DcPool:
+        pool = _DcPool(dc_id=dc_id, auth_key=None)
+        pool.senders = [FakeSender() for _ in range(3)]
+        pool.last_used -= idle_for
+        downloader._pools[dc_id] = pool
+        return pool
+
+    async def test_idle_pools_keep_one_warm_connection(self) -> None:
+        downloader = ParallelDownloader(StubClient(), idle_s=60, keep_warm_s=600)
+        recent = self._pool(downloader, 4, idle_for=120)
+        stale = self._pool(downloader, 5, idle_for=1200)
+        home = self._pool(downloader, StubSession.dc_id, idle_for=1200)
+
+        await downloader._close_idle()
+
+        self.assertEqual(len(recent.senders), 1)
+        self.assertTrue(recent.senders[0].is_connected())
+        self.assertEqual(stale.senders, [])
+        self.assertEqual(len(home.senders), 1)
+
+    async def test_dropped_sender_is_replaced(self) -> None:
+        downloader = ParallelDownloader(StubClient())
+        pool = self._pool(downloader, 4, idle_for=0)
+        pool.senders[0].connected = False
+        fresh = FakeSender()
+
+        async def connect(_pool):
+            return fresh
+
+        downloader._connect = connect
+        senders = await downloader._senders(pool, 3)
+
+        self.assertIn(fresh, senders)
+        self.assertTrue(all(s.is_connected() for s in senders))
+
+
+class ParallelFileDownloadTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self._tmp.name, "media", "video.mp4")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    async def test_parts_are_written_at_their_offsets(self) -> None:
+        blob = os.urandom(5 * PART_SIZE + 123)
+        client = StubClient()
+        downloader = FakePartsDownloader(client, blob, connections=3)
+
+        saved = await downloader.download_to_file(_doc_message(len(blob)), self.dest)
+
+        self.assertEqual(saved, self.dest)
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), blob)
+        self.assertEqual(client.fallbacks, 0)
+        self.assertEqual(downloader.stats()["parallel"], 1)
+
+    async def test_short_read_replaces_partial_file_with_fallback(self) -> None:
+        client = StubClient()
+        downloader = FakePartsDownloader(client, b"x" * 100)
+
+        saved = await downloader.download_to_file(
+            _doc_message(5 * PART_SIZE), self.dest
+        )
+
+        self.assertEqual(saved, self.dest)
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), b"single")
+        self.assertEqual(downloader.stats()["failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
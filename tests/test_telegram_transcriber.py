@@ -0,0 +1,108 @@
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+from telethon import errors
+from telethon.tl import types
+from telethon.tl.types.messages import TranscribedAudio
+
+from src_py.impl.telegram_transcriber import TelegramTranscriber
+
+
+class StubClient:
+    def __init__(self, response: object) -> None:
+        self.response = response
+        self.requests: list[object] = []
+
+    def add_event_handler(self, _handler) -> None:
+        pass
+
+    async def __call__(self, request: object) -> object:
+        self.requests.append(request)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+class TelegramTranscriberTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.message = types.Message(
+            id=17,
+            peer_id=types.PeerUser(42),
+            date=datetime.now(timezone.utc),
+            message="",
+        )
+        self.fallback = AsyncMock()
+
+    async def test_immediate_result(self) -> None:
+        client = StubClient(TranscribedAudio(transcription_id=1, text="привет"))
+        transcriber = TelegramTranscriber(client, self.fallback)
+
+        self.assertEqual(await transcriber.transcribe_message(self.message), "привет")
+
+    async def test_pending_result_completes_from_update(self) -> None:
+        client = StubClient(
+            TranscribedAudio(transcription_id=5, text="", pending=True)
+        )
+        transcriber = TelegramTranscriber(client, self.fallback)
+
+        task = asyncio.create_task(transcriber.transcribe_message(self.message))
+        await asyncio.sleep(0)
+        await transcriber._on_raw_update(
+            types.UpdateTranscribedAudio(
+                peer=self.message.peer_id,
+                msg_id=self.message.id,
+                transcription_id=5,
+                text="готово",
+                pending=False,
+            )
+        )
+
+        self.assertEqual(await task, "готово")
+
+    async def test_pending_result_times_out_to_fallback(self) -> None:
+        client = StubClient(
+            TranscribedAudio(transcription_id=5, text="", pending=True)
+        )
+        transcriber = TelegramTranscriber(
+            client, self.fallback, pending_timeout_s=0.01
+        )
+
+        self.assertIsNone(await transcriber.transcribe_message(self.message))
+
+    async def test_exhausted_trial_pauses_engine(self) -> None:
+        until = datetime.now(timezone.utc) + timedelta(days=7)
+        client = StubClient(
+            TranscribedAudio(
+                transcription_id=1,
+                text="последняя",
+                trial_remains_num=0,
+                trial_remains_until_date=until,
+            )
+        )
+        transcriber = TelegramTranscriber(client, self.fallback)
+
+        self.assertEqual(await transcriber.transcribe_message(self.message), "последняя")
+        self.assertIsNone(await transcriber.transcribe_message(self.message))
+        self.assertEqual(len(client.requests), 1)
+        self.assertGreater(transcriber._unavailable_until, time.time() + 6 * 86400)
+
+    async def test_premium_required_pauses_engine(self) -> None:
+        client = StubClient(errors.PremiumAccountRequiredError(request=None))
+        transcriber = TelegramTranscriber(client, self.fallback)
+
+        self.assertIsNone(await transcriber.transcribe_message(self.message))
+        self.assertIsNone(await transcriber.transcribe_message(self.message))
+        self.assertEqual(len(client.requests), 1)
+
+    async def test_file_methods_use_fallback(self) -> None:
+        self.fallback.transcribe_ogg_file.return_value = "из файла"
+        transcriber = TelegramTranscriber(StubClient(None), self.fallback)
+
+        self.assertEqual(await transcriber.transcribe_ogg_file("a.ogg"), "из файла")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.telegram_utils.tracker_batch import (
+    MESSAGE_MAX_CHARS,
+    ForwardBatcher,
+    PendingForward,
+    album_kind,
+    split_digest,
+)
+from src_py.telegram_utils.tracker_entries import CachedMedia, CachedMessage
+
+
+def _cached(msg_id: int) -> CachedMessage:
+    return CachedMessage(
+        message_id=msg_id,
+        text=f"text {msg_id}",
+        date=datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        cached_at=0,
+        sender_id="42",
+        sender_name="Sender",
+        peer=types.PeerUser(42),
+        chat_label="user-42",
+        media_description=None,
+        media=None,
+        channel_id=None,
+    )
+
+
+class ForwardBatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_items_of_one_chat_are_flushed_together(self) -> None:
+        flushed: list[list[int]] = []
+
+        async def flush(items: list[PendingForward]) -> None:
+            flushed.append([item.cached.message_id for item in items])
+
+        batcher = ForwardBatcher(flush, window_s=0.01)
+        for msg_id in (1, 2, 3):
+            item = PendingForward("deleted", f"msg:{msg_id}", _cached(msg_id))
+            batcher.add("user:42", item)
+        batcher.add("user:7", PendingForward("deleted", "msg:9", _cached(9)))
+        self.assertEqual(len(batcher), 4)
+
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(sorted(flushed), [[1, 2, 3], [9]])
+        self.assertEqual(len(batcher), 0)
+
+    async def test_flush_all_does_not_wait_for_the_window(self) -> None:
+        flushed: list[int] = []
+
+        async def flush(items: list[PendingForward]) -> None:
+            flushed.extend(item.cached.message_id for item in items)
+
+        batcher = ForwardBatcher(flush, window_s=60)
+        batcher.add("user:42", PendingForward("deleted", "msg:1", _cached(1)))
+
+        await batcher.flush_all()
+
+        self.assertEqual(flushed, [1])
+
+    async def test_flush_all_waits_for_flushes_already_sending(self) -> None:
+        flushed: list[int] = []
+        sending = asyncio.Event()
+        release = asyncio.Event()
+
+        async def flush(items: list[PendingForward]) -> None:
+            sending.set()
+            await release.wait()
+            flushed.extend(item.cached.message_id for item in items)
+
+        batcher = ForwardBatcher(flush, window_s=0)
+        batcher.add("user:42", PendingForward("deleted", "msg:1", _cached(1)))
+        await sending.wait()
+
+        shutdown = asyncio.create_task(batcher.flush_all())
+        await asyncio.sleep(0.01)
+        self.assertFalse(shutdown.done())
+        release.set()
+        await shutdown
+
+        self.assertEqual(flushed, [1])
+
+
+class DigestFormattingTest(unittest.TestCase):
+    def test_long_digests_are_split_under_the_message_limit(self) -> None:
+        lines = ["x" * 1000] * 10 + ["y" * (MESSAGE_MAX_CHARS * 2)]
+
+        chunks = split_digest("header", lines)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= MESSAGE_MAX_CHARS for c in chunks))
+        self.assertTrue(all(c.startswith("header") for c in chunks))
+
+    def test_album_kinds(self) -> None:
+        def media(media_type: str, mime: str) -> CachedMedia:
+            return CachedMedia(
+                data=b"", media_type=media_type, mime_type=mime, file_name="f"
+            )
+
+        self.assertEqual(album_kind(media("photo", "image/jpeg")), "visual")
+        self.assertEqual(album_kind(media("document", "video/mp4")), "visual")
+        self.assertEqual(album_kind(media("document", "application/pdf")), "file")
+        self.assertIsNone(album_kind(media("voiceNote", "audio/ogg")))
+
+
+if __name__ == "__main__":
+    unittest.main()
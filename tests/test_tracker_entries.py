@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.telegram_utils.tracker_entries import (
+    TEXT_COMPRESS_MIN_CHARS,
+    CachedMessage,
+)
+
+
+def _cached(text: str | None, user_id: int = 42) -> CachedMessage:
+    return CachedMessage(
+        message_id=1,
+        text=text,
+        date=datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        cached_at=0,
+        sender_id=str(user_id),
+        sender_name=f"User {user_id}",
+        peer=types.PeerUser(user_id),
+        chat_label=f"user-{user_id}",
+        media_description=None,
+        media=None,
+        channel_id=None,
+    )
+
+
+class CachedMessageTest(unittest.TestCase):
+    def test_fields_round_trip_through_the_compact_form(self) -> None:
+        long_text = "повтор " * TEXT_COMPRESS_MIN_CHARS
+        cached = _cached(long_text)
+
+        self.assertIsInstance(cached._text, bytes)
+        self.assertEqual(cached.text, long_text)
+        self.assertEqual(cached.peer, types.PeerUser(42))
+        self.assertEqual(cached.peer_key, "user:42")
+        self.assertEqual(cached.date, datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc))
+
+        cached.text = "short"
+        self.assertEqual(cached._text, "short")
+
+    def test_repeated_strings_are_shared(self) -> None:
+        first, second = _cached("a"), _cached("b")
+
+        self.assertIs(first.sender_name, second.sender_name)
+        self.assertIs(first.chat_label, second.chat_label)
+        self.assertIs(first.peer_key, second.peer_key)
+        self.assertFalse(hasattr(first, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
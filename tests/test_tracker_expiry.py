@@ -0,0 +1,40 @@
+import unittest
+
+from src_py.telegram_utils.tracker_expiry import ExpiryIndex
+
+
+class ExpiryIndexTest(unittest.TestCase):
+    def test_pops_due_keys_in_deadline_order_within_limit(self) -> None:
+        index = ExpiryIndex()
+        index.schedule("c", 30)
+        index.schedule("a", 10)
+        index.schedule("b", 20)
+
+        self.assertEqual(index.pop_expired(25, limit=1), ["a"])
+        self.assertEqual(index.pop_expired(25, limit=10), ["b"])
+        self.assertEqual(index.next_deadline(), 30)
+        self.assertEqual(len(index), 1)
+
+    def test_rescheduled_and_discarded_keys_are_skipped(self) -> None:
+        index = ExpiryIndex()
+        index.schedule("moved", 10)
+        index.schedule("gone", 10)
+        index.schedule("moved", 50)
+        index.discard("gone")
+
+        self.assertEqual(index.pop_expired(20, limit=10), [])
+        self.assertEqual(index.next_deadline(), 50)
+        self.assertEqual(index.pop_expired(50, limit=10), ["moved"])
+        self.assertIsNone(index.next_deadline())
+
+    def test_stale_items_are_compacted(self) -> None:
+        index = ExpiryIndex()
+        for deadline in range(1000):
+            index.schedule("key", deadline)
+
+        self.assertLess(len(index._heap), 300)
+        self.assertEqual(index.pop_expired(10_000, limit=10), ["key"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import unittest
+
+from telethon.tl import types
+
+from src_py.telegram_utils.tracker_entries import CachedMedia, MediaReference
+from src_py.telegram_utils.tracker_media import TrackerMediaBudget
+
+
+def _media(
+    data: bytes | None, media_type: str = "photo", media_id: int | None = None
+) -> CachedMedia:
+    reference = None
+    if media_id is not None:
+        reference = MediaReference(
+            location=types.InputDocumentFileLocation(
+                id=media_id, access_hash=1, file_reference=b"", thumb_size=""
+            ),
+            dc_id=2,
+            size=len(data or b""),
+        )
+    return CachedMedia(
+        data=data,
+        media_type=media_type,
+        mime_type="image/jpeg",
+        file_name="p.jpg",
+        reference=reference,
+    )
+
+
+class TrackerMediaBudgetTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _budget(self, **kwargs) -> TrackerMediaBudget:
+        return TrackerMediaBudget(spill_dir=self.tmp.name, **kwargs)
+
+    async def test_least_recently_used_spills_past_the_budget(self) -> None:
+        budget = self._budget(memory_bytes=10, inline_max_bytes=10)
+        first, second, third = _media(b"a" * 4), _media(b"b" * 4), _media(b"c" * 4)
+
+        await budget.add("msg:1", first)
+        await budget.add("msg:2", second)
+        budget.touch("msg:1")
+        await budget.add("msg:3", third)
+
+        self.assertIsNone(second.data)
+        self.assertEqual(second.read(), b"bbbb")
+        self.assertEqual(first.data, b"aaaa")
+        self.assertEqual(budget.stats()["memory_kb"], 0)
+        self.assertEqual(budget.stats()["evictions"], 1)
+
+    async def test_oversized_items_go_straight_to_disk(self) -> None:
+        budget = self._budget(inline_max_bytes=3)
+        big = _media(b"x" * 8)
+
+        await budget.add("msg:1", big)
+
+        self.assertIsNone(big.data)
+        self.assertTrue(os.path.exists(big.blob_path))
+
+    async def test_shared_spill_file_is_removed_with_the_last_entry(self) -> None:
+        budget = self._budget(inline_max_bytes=1)
+        one, two = _media(b"same"), _media(b"same")
+        await budget.add("msg:1", one)
+        await budget.add("msg:2", two)
+        path = one.blob_path
+
+        budget.release("msg:1")
+        await budget.wait_removals()
+        self.assertTrue(os.path.exists(path))
+        budget.release("msg:2")
+        await budget.wait_removals()
+        self.assertFalse(os.path.exists(path))
+
+    async def test_spills_reuse_the_store_blob_files(self) -> None:
+        store_dir = os.path.join(self.tmp.name, "blobs")
+        budget = self._budget(
+            inline_max_bytes=1, blob_path=lambda sha: os.path.join(store_dir, sha)
+        )
+        media = _media(b"same")
+        await budget.add("msg:1", media)
+        path = media.blob_path
+
+        self.assertEqual(os.path.dirname(path), store_dir)
+        budget.release("msg:1")
+        await budget.wait_removals()
+        # The store removes it once no row points at it.
+        self.assertTrue(os.path.exists(path))
+
+    async def test_repeated_media_is_stored_once(self) -> None:
+        budget = self._budget()
+        first = _media(b"sticker", media_id=7)
+        by_id = _media(None, media_id=7)
+        by_hash = _media(b"sticker", media_id=8)
+
+        await budget.add("msg:1", first)
+        await budget.add("msg:2", by_id)
+        await budget.add("msg:3", by_hash)
+
+        self.assertIs(by_id.data, first.data)
+        self.assertIs(by_hash.data, first.data)
+        self.assertTrue(budget.has_media(8))
+        stats = budget.stats()
+        self.assertEqual(stats["memory_items"], 1)
+        self.assertEqual(stats["dedup_hits"], 2)
+        self.assertEqual(stats["dedup_ratio"], 3.0)
+
+        budget.release("msg:1")
+        budget.release("msg:2")
+        self.assertTrue(budget.has_media(7))
+        budget.release("msg:3")
+        self.assertFalse(budget.has_media(7))
+        self.assertEqual(budget.stats()["memory_items"], 0)
+
+    async def test_unknown_media_without_bytes_is_not_pooled(self) -> None:
+        budget = self._budget()
+        deferred = _media(None, media_id=9)
+
+        await budget.add("msg:1", deferred)
+
+        self.assertTrue(deferred.is_deferred)
+        self.assertFalse(budget.has_media(9))
+
+    async def test_spill_moves_every_sharer_to_the_file(self) -> None:
+        budget = self._budget(memory_bytes=8, inline_max_bytes=8)
+        one, two = _media(b"a" * 4, media_id=1), _media(None, media_id=1)
+        await budget.add("msg:1", one)
+        await budget.add("msg:2", two)
+
+        await budget.add("msg:3", _media(b"b" * 8))
+
+        self.assertIsNone(two.data)
+        self.assertEqual(two.blob_path, one.blob_path)
+        self.assertEqual(two.read(), b"aaaa")
+
+    def test_uploads_are_found_by_id_or_content(self) -> None:
+        budget = self._budget()
+        sent = types.MessageMediaUnsupported()
+        original = _media(b"x", media_id=1)
+        original.digest()
+        budget.remember_upload(original, sent)
+
+        same_id = _media(None, media_id=1)
+        same_bytes = _media(b"x", media_id=2)
+        same_bytes.digest()
+        self.assertIs(budget.uploaded(same_id), sent)
+        self.assertIs(budget.uploaded(same_bytes), sent)
+        self.assertIsNone(budget.uploaded(_media(None, media_id=3)))
+
+        budget.forget_upload(original)
+        self.assertIsNone(budget.uploaded(same_id))
+        self.assertEqual(budget.stats()["upload_reuses"], 2)
+
+    def test_type_caps(self) -> None:
+        budget = self._budget(type_caps={"document": 100})
+        self.assertFalse(budget.admits("document", 101))
+        self.assertTrue(budget.admits("document", 100))
+        self.assertTrue(budget.admits("photo", 10**9))
+
+
+if __name__ == "__main__":
+    unittest.main()
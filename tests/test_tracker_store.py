@@ -0,0 +1,119 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.telegram_utils.tracker_entries import CachedMedia, CachedMessage
+from src_py.telegram_utils.tracker_store import TrackerStore
+
+
+def _cached(msg_id: int, *, cached_at: float, data: bytes | None = None) -> CachedMessage:
+    media = None
+    if data is not None:
+        media = CachedMedia(
+            data=data, media_type="photo", mime_type="image/jpeg", file_name="photo.jpg"
+        )
+    return CachedMessage(
+        message_id=msg_id,
+        text=f"text {msg_id}",
+        date=datetime.now(timezone.utc),
+        cached_at=cached_at,
+        sender_id="42",
+        sender_name="Sender",
+        peer=types.PeerUser(42),
+        chat_label="user-42",
+        media_description=None,
+        media=media,
+        channel_id=None,
+    )
+
+
+class TrackerStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _store(self) -> TrackerStore:
+        return TrackerStore(self.tmp.name, ttl_s=60, flush_interval_s=60)
+
+    async def test_entries_survive_restart_with_lazy_media(self) -> None:
+        store = self._store()
+        await store.open()
+        store.put("msg:1", _cached(1, cached_at=time.time(), data=b"jpeg"))
+        store.put("msg:2", _cached(2, cached_at=time.time(), data=b"jpeg"))
+        store.put_read_state("user:42", 1)
+        await store.close()
+
+        store = self._store()
+        entries, read_state = await store.open()
+        await store.close()
+
+        self.assertEqual(set(entries), {"msg:1", "msg:2"})
+        media = entries["msg:1"].media
+        self.assertIsNone(media.data)
+        self.assertEqual(media.read(), b"jpeg")
+        # Same content, one blob.
+        self.assertEqual(media.blob_path, entries["msg:2"].media.blob_path)
+        self.assertEqual(entries["msg:2"].text, "text 2")
+        self.assertEqual(read_state, {"user:42": 1})
+
+    async def test_deleted_read_state_is_gone_after_restart(self) -> None:
+        store = self._store()
+        await store.open()
+        store.put_read_state("user:42", 5)
+        store.put_read_state("user:43", 6)
+        await store.flush()
+        store.delete_read_state("user:42")
+        await store.close()
+
+        store = self._store()
+        _entries, read_state = await store.open()
+        await store.close()
+
+        self.assertEqual(read_state, {"user:43": 6})
+
+    async def test_expired_rows_and_orphan_blobs_are_evicted(self) -> None:
+        store = self._store()
+        await store.open()
+        store.put("msg:1", _cached(1, cached_at=time.time() - 120, data=b"old"))
+        store.put("msg:2", _cached(2, cached_at=time.time()))
+        await store.flush()
+
+        await store.evict_expired()
+        await store.close()
+
+        store = self._store()
+        entries, _ = await store.open()
+        await store.close()
+        self.assertEqual(set(entries), {"msg:2"})
+        blob_dir = os.path.join(self.tmp.name, "blobs")
+        blobs = [f for _, _, files in os.walk(blob_dir) for f in files]
+        self.assertEqual(blobs, [])
+
+    async def test_blob_spilled_before_its_row_is_written_survives_eviction(
+        self,
+    ) -> None:
+        store = self._store()
+        await store.open()
+        cached = _cached(1, cached_at=time.time(), data=b"spilled")
+        media = cached.media
+        # What TrackerMediaBudget does when it spills into the store.
+        path = store.blob_path(media.digest())
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(media.data)
+        media.data, media.blob_path = None, path
+        store.put("msg:1", cached)
+
+        await store.evict_expired()
+        await store.close()
+
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(store.stats()["blobs_written"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
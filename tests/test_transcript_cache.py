@@ -0,0 +1,100 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from src_py.application.use_cases import transcript_cache
+from src_py.application.use_cases.transcript_cache import TranscriptCache
+
+
+class TranscriptCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_requests_share_one_transcription(self) -> None:
+        cache = TranscriptCache()
+        calls = 0
+
+        async def transcribe() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "текст"
+
+        results = await asyncio.gather(
+            cache.get_or_transcribe("doc:1", transcribe),
+            cache.get_or_transcribe("doc:1", transcribe),
+        )
+
+        self.assertEqual(results, ["текст", "текст"])
+        self.assertEqual(calls, 1)
+        self.assertEqual(await cache.get_or_transcribe("doc:1", transcribe), "текст")
+        self.assertEqual(calls, 1)
+
+    async def test_prefetched_entry_counts_as_used_once_served(self) -> None:
+        cache = TranscriptCache()
+
+        async def transcribe() -> str:
+            return "текст"
+
+        await cache.get_or_transcribe("doc:1", transcribe, prefetch=True)
+        self.assertEqual(cache.stats()["prefetched"], 1)
+        self.assertEqual(cache.stats()["prefetch_used"], 0)
+
+        self.assertEqual(await cache.get_or_transcribe("doc:1", transcribe), "текст")
+        self.assertEqual(cache.stats()["prefetch_used"], 1)
+
+    async def test_unused_prefetch_is_reported_as_wasted(self) -> None:
+        cache = TranscriptCache(max_entries=1)
+
+        async def transcribe() -> str:
+            return "текст"
+
+        await cache.get_or_transcribe("doc:1", transcribe, prefetch=True)
+        await cache.get_or_transcribe("doc:2", transcribe, prefetch=True)
+
+        self.assertEqual(cache.stats()["prefetch_wasted"], 1)
+
+    async def test_failed_transcription_is_not_cached(self) -> None:
+        cache = TranscriptCache()
+        calls = 0
+
+        async def transcribe() -> str:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("Groq API error 503")
+            return "текст"
+
+        with self.assertRaises(RuntimeError):
+            await cache.get_or_transcribe("doc:1", transcribe)
+
+        self.assertEqual(await cache.get_or_transcribe("doc:1", transcribe), "текст")
+
+    async def test_parenthesised_transcript_is_cached(self) -> None:
+        cache = TranscriptCache()
+        calls = 0
+
+        async def transcribe() -> str:
+            nonlocal calls
+            calls += 1
+            return "(смеётся)"
+
+        await cache.get_or_transcribe("doc:1", transcribe)
+        await cache.get_or_transcribe("doc:1", transcribe)
+
+        self.assertEqual(calls, 1)
+
+    async def test_prefetch_does_not_serve_expired_entry(self) -> None:
+        cache = TranscriptCache(ttl_s=60)
+        results = iter(["старый", "новый"])
+
+        async def transcribe() -> str:
+            return next(results)
+
+        await cache.get_or_transcribe("doc:1", transcribe, prefetch=True)
+        later = time.time() + 120
+        with patch.object(transcript_cache.time, "time", return_value=later):
+            text = await cache.get_or_transcribe("doc:1", transcribe, prefetch=True)
+
+        self.assertEqual(text, "новый")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import unittest
+
+from src_py.application.use_cases.transcription_scheduler import (
+    BudgetExceeded,
+    TranscriptionScheduler,
+)
+
+
+class TranscriptionSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def _run_all(self, scheduler, jobs) -> list[str]:
+        order: list[str] = []
+        gate = asyncio.Event()
+
+        async def blocker() -> None:
+            await gate.wait()
+
+        async def job(name: str) -> None:
+            order.append(name)
+
+        # Occupy the only slot so everything below queues up first.
+        first = asyncio.create_task(scheduler.run("warmup", 1, blocker))
+        await asyncio.sleep(0)
+        tasks = []
+        for name, peer, kwargs in jobs:
+            tasks.append(
+                asyncio.create_task(
+                    scheduler.run(peer, 10, lambda n=name: job(n), **kwargs)
+                )
+            )
+            await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        return order
+
+    async def test_quiet_peer_is_not_stuck_behind_chatty_group(self) -> None:
+        scheduler = TranscriptionScheduler(max_concurrency=1)
+        jobs = [(f"group-{i}", "group", {}) for i in range(4)]
+        jobs.append(("private", "private", {}))
+
+        order = await self._run_all(scheduler, jobs)
+
+        self.assertLessEqual(order.index("private"), 1)
+
+    async def test_weights_give_larger_share(self) -> None:
+        scheduler = TranscriptionScheduler(max_concurrency=1, weights={"a": 3})
+        jobs = [(f"a-{i}", "a", {}) for i in range(4)]
+        jobs += [(f"b-{i}", "b", {}) for i in range(4)]
+
+        order = await self._run_all(scheduler, jobs)
+
+        self.assertEqual(sum(1 for n in order[:4] if n.startswith("a")), 3)
+
+    async def test_background_jobs_run_last(self) -> None:
+        scheduler = TranscriptionScheduler(max_concurrency=1)
+        jobs = [
+            ("prefetch", "group", {"background": True}),
+            ("auto", "other", {}),
+        ]
+
+        order = await self._run_all(scheduler, jobs)
+
+        self.assertEqual(order, ["auto", "prefetch"])
+
+    async def test_day_cap_rejects_auto_but_not_on_demand(self) -> None:
+        scheduler = TranscriptionScheduler(day_cap_s=15)
+
+        async def job() -> str:
+            return "ok"
+
+        self.assertEqual(await scheduler.run("group", 10, job), "ok")
+        with self.assertRaises(BudgetExceeded):
+            await scheduler.run("group", 10, job)
+        self.assertEqual(await scheduler.run("group", 10, job, on_demand=True), "ok")
+
+    async def test_minute_cap_defers_auto_jobs(self) -> None:
+        scheduler = TranscriptionScheduler(minute_cap_s=15)
+
+        async def job() -> str:
+            return "ok"
+
+        await scheduler.run("group", 10, job)
+        deferred = asyncio.create_task(scheduler.run("group", 10, job))
+        await asyncio.sleep(0.01)
+
+        self.assertFalse(deferred.done())
+        self.assertEqual(await scheduler.run("group", 10, job, on_demand=True), "ok")
+        deferred.cancel()
+
+    async def test_on_demand_jobs_have_their_own_slots(self) -> None:
+        scheduler = TranscriptionScheduler(max_concurrency=1, on_demand_concurrency=3)
+        gate = asyncio.Event()
+        running = 0
+        peak = 0
+
+        async def job() -> None:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await gate.wait()
+            running -= 1
+
+        auto = asyncio.create_task(scheduler.run("group", 10, job))
+        backfill = [
+            asyncio.create_task(scheduler.run("me", 10, job, on_demand=True))
+            for _ in range(4)
+        ]
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(peak, 4)
+        gate.set()
+        await asyncio.gather(auto, *backfill)
+
+    async def test_day_cap_counts_queued_jobs(self) -> None:
+        scheduler = TranscriptionScheduler(max_concurrency=1, day_cap_s=25)
+        gate = asyncio.Event()
+
+        async def job() -> None:
+            await gate.wait()
+
+        first = asyncio.create_task(scheduler.run("group", 10, job))
+        second = asyncio.create_task(scheduler.run("group", 10, job))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(BudgetExceeded):
+            await scheduler.run("group", 10, job)
+        gate.set()
+        await asyncio.gather(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
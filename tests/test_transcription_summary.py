@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+
+from telethon.tl import types
+
+from src_py.application.use_cases import transcription
+from src_py.application.use_cases.transcription import reply_with_transcript
+
+
+class RecordingClient:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+
+    async def send_message(self, peer, text, **_kwargs):
+        self.calls.append(("send", text))
+        return types.Message(
+            id=100 + len(self.calls),
+            peer_id=peer,
+            date=datetime.now(timezone.utc),
+            message=text,
+        )
+
+    async def edit_message(self, _peer, _msg_id, text, **_kwargs):
+        self.calls.append(("edit", text))
+
+
+class SlowSummarizer:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.calls = 0
+
+    async def summarize(self, text: str) -> str | None:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return "• суть"
+
+
+class AsyncSummaryReplyTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        transcription._summary_cache = transcription.SummaryCache()
+        self.message = types.Message(
+            id=7,
+            peer_id=types.PeerUser(42),
+            date=datetime.now(timezone.utc),
+            message="",
+        )
+        self.transcript = "слово " * 200
+
+    async def test_transcript_is_sent_before_summary_is_patched_in(self) -> None:
+        client = RecordingClient()
+        summarizer = SlowSummarizer(0.05)
+
+        await reply_with_transcript(
+            client, self.message, self.transcript, summarizer=summarizer
+        )
+
+        self.assertEqual([kind for kind, _ in client.calls], ["send"])
+        self.assertNotIn("TL;DR", client.calls[0][1])
+
+        await asyncio.sleep(0.1)
+
+        self.assertEqual([kind for kind, _ in client.calls], ["send", "edit"])
+        self.assertIn("TL;DR:\n• суть", client.calls[1][1])
+
+    async def test_summary_is_reused_from_cache(self) -> None:
+        client = RecordingClient()
+        summarizer = SlowSummarizer(0)
+
+        await reply_with_transcript(
+            client, self.message, self.transcript, summarizer=summarizer
+        )
+        await asyncio.sleep(0.01)
+        await reply_with_transcript(
+            client, self.message, self.transcript, summarizer=summarizer
+        )
+
+        self.assertEqual(summarizer.calls, 1)
+        self.assertIn("TL;DR", client.calls[-1][1])
+        self.assertEqual(client.calls[-1][0], "send")
+
+    async def test_late_summary_is_dropped(self) -> None:
+        client = RecordingClient()
+        original = transcription.SUMMARY_DEADLINE_S
+        transcription.SUMMARY_DEADLINE_S = 0.01
+        try:
+            await reply_with_transcript(
+                client, self.message, self.transcript, summarizer=SlowSummarizer(1)
+            )
+            await asyncio.sleep(0.05)
+        finally:
+            transcription.SUMMARY_DEADLINE_S = original
+
+        self.assertEqual([kind for kind, _ in client.calls], ["send"])
+
+
+if __name__ == "__main__":
+    unittest.main()
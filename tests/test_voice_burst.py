@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+from telethon.tl import types
+
+from src_py.application.use_cases import voice_burst
+from src_py.application.use_cases.voice_burst import VoiceBurstCoalescer
+
+
+def _voice(msg_id: int, sender: int) -> types.Message:
+    return types.Message(
+        id=msg_id,
+        peer_id=types.PeerChannel(5),
+        from_id=types.PeerUser(sender),
+        date=datetime.now(timezone.utc),
+        message="",
+    )
+
+
+class VoiceBurstCoalescerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        async def fake_transcribe(_client, message, **_kwargs) -> str:
+            return f"текст {message.id}"
+
+        self.reply = AsyncMock()
+        self.mark_unread = AsyncMock()
+        self.patches = [
+            patch.object(voice_burst, "transcribe_voice_message", fake_transcribe),
+            patch.object(voice_burst, "reply_with_transcript", self.reply),
+            patch.object(voice_burst, "mark_dialog_unread", self.mark_unread),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self) -> None:
+        for p in self.patches:
+            p.stop()
+
+    async def test_consecutive_notes_get_one_combined_reply(self) -> None:
+        coalescer = VoiceBurstCoalescer(transcriber=object(), window_s=0.02)
+
+        for msg_id in (1, 2, 3):
+            await coalescer.submit(object(), _voice(msg_id, sender=42))
+        await asyncio.sleep(0.05)
+
+        self.reply.assert_awaited_once()
+        replied_to, combined = self.reply.await_args.args[1:3]
+        self.assertEqual(replied_to.id, 3)
+        self.assertIn("1/3: текст 1", combined)
+        self.assertIn("3/3: текст 3", combined)
+        self.mark_unread.assert_awaited_once()
+
+    async def test_senders_are_coalesced_separately(self) -> None:
+        coalescer = VoiceBurstCoalescer(transcriber=object(), window_s=0.02)
+
+        await coalescer.submit(object(), _voice(1, sender=42))
+        await coalescer.submit(object(), _voice(2, sender=43))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.reply.await_count, 2)
+        self.assertEqual(self.reply.await_args.args[2], "текст 2")
+
+    async def test_unread_hook_gets_every_note_after_the_reply(self) -> None:
+        hook = AsyncMock()
+        coalescer = VoiceBurstCoalescer(transcriber=object(), window_s=0.02)
+        coalescer.set_unread_hook(hook)
+
+        for msg_id in (1, 2):
+            await coalescer.submit(object(), _voice(msg_id, sender=42))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual([m.id for m in hook.await_args.args], [1, 2])
+        self.mark_unread.assert_not_awaited()
+
+    async def test_failed_reply_leaves_the_dialog_alone(self) -> None:
+        self.reply.side_effect = RuntimeError("flood")
+        coalescer = VoiceBurstCoalescer(transcriber=object(), window_s=0.02)
+
+        with patch.object(voice_burst, "reply_to", AsyncMock()):
+            await coalescer.submit(object(), _voice(1, sender=42))
+            await asyncio.sleep(0.05)
+
+        self.mark_unread.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()